@@ -5,9 +5,9 @@ from typing import Dict, Any, Optional, List, Tuple
 from langchain_core.output_parsers import JsonOutputParser
 from backend.app.llm.ollama_client import get_ollama_client, invoke_with_retry
 from backend.app.llm.prompts import CHAT_PROMPT, BRAIN_PROMPT, REFLECTION_PROMPT
-from backend.app.vectorstore.retriever import retrieve_context
+from backend.app.vectorstore.retriever import aretrieve_context
 from backend.app.memory.conversation import get_conversation_memory
-from backend.app.memory.user_profile import UserProfile
+from backend.app.memory.user_profile import get_user_profile
 from backend.app.services.gap_detector import GapDetector
 from backend.app.services.assessment_service import AssessmentService
 from backend.app.services.validation_service import StateValidationService
@@ -68,7 +68,7 @@ class StudyAgent:
 
     async def _observe(self, user_id: str, user_input: str) -> Dict:
         """Observe current state - topic-centric model, no sessions."""
-        profile_obj = UserProfile(user_id)
+        profile_obj = get_user_profile(user_id)
         memory = get_conversation_memory(user_id)
         
         chat_history_vars = memory.load_memory_variables({})
@@ -89,8 +89,11 @@ class StudyAgent:
         if not profile.data:
             return False, "Profile data is missing or corrupted."
         
-        # Use StateValidationService to enforce protocol
-        is_valid, errors = StateValidationService.validate_profile(profile.data, obs["last_10_history"])
+        # Use StateValidationService to enforce protocol; any violation marks the
+        # session corrupted, so stop at the first failing check
+        is_valid, errors = StateValidationService.validate_profile(
+            profile.data, obs["last_10_history"], fail_fast=True
+        )
         if not is_valid:
             # Use corrupted state template
             logger.error(f"Validation failed for user {obs['user_id']}: {errors}")
@@ -107,14 +110,15 @@ class StudyAgent:
             profile.data = {
                 "mastery": 0.0,
                 "topics": {},
-                "weak_areas": [],
-                "strong_areas": [],
+                "weak_areas": set(),
+                "strong_areas": set(),
                 "conversation_history": [],
                 "mode": "idle",
                 "active_challenges": {},
                 "assessment_state": None,
                 "created_at": time.time()
             }
+            profile.invalidate_caches()
             profile.save()
             obs["memory"].clear()
             return {"content": "Profile reset. How can I help you today?"}
@@ -135,20 +139,21 @@ class StudyAgent:
             # 2. Repair Orphaned IDs
             topic_ids = {t["topic_id"] for t in profile.data.get("topics", {}).values()}
             for area in ["weak_areas", "strong_areas"]:
-                original = profile.data.get(area, [])
-                filtered = [tid for tid in original if tid in topic_ids]
+                original = profile.data.get(area, set())
+                filtered = {tid for tid in original if tid in topic_ids}
                 if len(filtered) != len(original):
                     profile.data[area] = filtered
                     errors_fixed.append(f"Cleaned {area}")
                     repaired = True
                     
             if repaired:
+                profile.invalidate_caches()
                 profile.save()
                 return {"content": f"Repair successful: {', '.join(errors_fixed)}."}
             return {"content": "No automatic repairs possible. Please use 'New' to reset."}
             
         elif action == "export":
-            return {"content": f"Current State:\n```json\n{json.dumps(profile.data, indent=2)}\n```"}
+            return {"content": f"Current State:\n```json\n{json.dumps(profile.to_dict(), indent=2)}\n```"}
             
         return {"content": "Invalid option. [Repair/New/Export]"}
 
@@ -272,7 +277,7 @@ class StudyAgent:
             # TODO: Implement smarter caching based on question hash + topic + depth
             
             # Compose explanation prompt based on depth
-            context = retrieve_context(user_input)
+            context = await aretrieve_context(user_input)
             input_vars = {
                 "knowledge_level": obs["profile"].to_frontend_format()["knowledge_level"],
                 "context": context,
@@ -3,7 +3,7 @@ from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 from backend.app.services.tutor_service import TutorService
 from backend.app.services.assessment_service import AssessmentService
-from backend.app.memory.user_profile import UserProfile
+from backend.app.memory.user_profile import get_user_profile
 from backend.app.errors import (
     MissingContextError,
     ValidationError,
@@ -71,7 +71,7 @@ async def generate_mcq(request: MCQGenerateRequest):
         raise ValidationError("user_id and topic are required", field="request")
     
     try:
-        profile = UserProfile(request.user_id)
+        profile = get_user_profile(request.user_id)
         # Check if topic exists (has been explained)
         if request.topic not in profile.data.get("topics", {}):
             raise MissingContextError(
@@ -134,7 +134,7 @@ async def generate_qna(request: QNAGenerateRequest):
         raise ValidationError("user_id and topic are required", field="request")
     
     try:
-        profile = UserProfile(request.user_id)
+        profile = get_user_profile(request.user_id)
         # Check if topic exists (has been explained)
         if request.topic not in profile.data.get("topics", {}):
             raise MissingContextError(
@@ -193,7 +193,7 @@ async def add_topic(request: AddTopicRequest):
         raise ValidationError("user_id and topic are required", field="request")
     
     try:
-        profile = UserProfile(request.user_id)
+        profile = get_user_profile(request.user_id)
         profile.add_topic(request.topic, explanation_summary=request.explanation_summary)
         return {"message": f"Topic '{request.topic}' added."}
     except Exception as e:
@@ -215,7 +215,7 @@ async def get_learning_areas(request: AreasRequest):
     Get weak and strong areas with metadata for the UI.
     Topic-centric model - no sessions.
     """
-    profile = UserProfile(request.user_id)
+    profile = get_user_profile(request.user_id)
     
     weak_areas = profile.get_weak_areas_with_metadata(max_display=10)
     strong_areas = profile.get_strong_areas_with_metadata(max_display=10)
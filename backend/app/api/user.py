@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from backend.app.memory.user_profile import UserProfile
+from backend.app.memory.user_profile import get_user_profile
 from backend.app.errors import (
     ValidationError,
     MissingContextError,
@@ -27,7 +27,7 @@ async def get_profile(user_id: str, session_id: str = None):
         raise ValidationError("user_id is required", field="user_id")
     
     try:
-        profile = UserProfile(user_id)
+        profile = get_user_profile(user_id)
         return profile.to_frontend_format()
     except Exception as e:
         log_error(
@@ -47,7 +47,7 @@ async def get_all_topics(user_id: str):
         raise ValidationError("user_id is required", field="user_id")
     
     try:
-        profile = UserProfile(user_id)
+        profile = get_user_profile(user_id)
         topics_data = profile.data.get("topics", {})
         
         all_topics = []
@@ -122,7 +122,7 @@ async def get_history(user_id: str):
     try:
         from backend.app.memory.conversation import get_conversation_memory
         memory = get_conversation_memory(user_id)
-        chat_history_vars = memory.load_memory_variables({})
+        chat_history_vars = memory.load_memory_variables({"max_messages": None})
         messages = chat_history_vars.get("chat_history", [])
         
         formatted_messages = []
@@ -159,12 +159,10 @@ async def clear_history(user_id: str):
         raise ValidationError("user_id is required", field="user_id")
     
     try:
-        history_path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_history.json")
+        from backend.app.memory.conversation import get_conversation_memory
         
-        # Clear the history file by writing an empty array
-        if os.path.exists(history_path):
-            with open(history_path, 'w') as f:
-                f.write('[]')
+        # Truncate the history log (migrating a legacy history file first)
+        get_conversation_memory(user_id).clear()
         
         return {"message": "Chat history cleared successfully", "topics_preserved": True}
     except Exception as e:
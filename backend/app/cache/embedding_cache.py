@@ -0,0 +1,105 @@
+"""
+Persistent cache of text embeddings.
+
+Embedding a chunk is an Ollama round-trip, and re-ingesting a notes directory
+after a small edit would otherwise re-embed every unchanged chunk. Vectors are
+stored by a hash of (model, text), so identical text is embedded once per model.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import List, Optional, Sequence
+
+from backend.app.config import settings
+from backend.app.utils.logger import logger
+
+
+# Keys looked up per SELECT; stays under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    """BLAKE2b-128 digest identifying a text under a model."""
+    return hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """SQLite-backed store of embedding vectors keyed by content hash."""
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            db_path: SQLite database file
+        """
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors.
+
+        Returns:
+            One entry per text: the vector, or None when it has not been embedded yet
+        """
+        keys = [embedding_key(model, text) for text in texts]
+        found = {}
+        try:
+            with self._lock:
+                for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                    batch = keys[i:i + LOOKUP_BATCH_SIZE]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return [None] * len(keys)
+
+        vectors = []
+        for key in keys:
+            blob = found.get(key)
+            vectors.append(array("d", blob).tolist() if blob is not None else None)
+        return vectors
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors for texts embedded under a model."""
+        rows = [
+            (embedding_key(model, text), array("d", vector).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+
+# Global instance
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the global embedding cache, stored next to the Chroma data."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    os.path.join(os.path.dirname(settings.CHROMA_PERSIST_DIRECTORY), "embedding_cache.sqlite3")
+                )
+    return _embedding_cache
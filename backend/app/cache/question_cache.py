@@ -0,0 +1,156 @@
+"""
+Shared pool of generated assessment questions.
+
+Generating an MCQ or QnA question is an LLM round-trip of several seconds.
+Generated questions are pooled per (kind, topic, difficulty); once a pool holds
+enough fresh questions, requests are served from it at random instead of
+calling the LLM again. Each user draws from a pool without replacement, so an
+assessment never repeats a question; once a user has seen every pooled
+question, the request falls through to generation and grows the pool.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import orjson
+
+from backend.app.config import settings
+from backend.app.utils.logger import logger
+
+
+# Questions collected per namespace before the pool starts serving
+POOL_SIZE = 5
+
+# Seconds a pooled question stays eligible
+POOL_TTL = 3600
+
+
+class QuestionCache:
+    """SQLite-backed pools of generated questions, shared by all users."""
+
+    def __init__(self, db_path: str, pool_size: int = POOL_SIZE, ttl: int = POOL_TTL):
+        """
+        Initialize the question cache.
+
+        Args:
+            db_path: SQLite database file
+            pool_size: Fresh questions required before a pool serves requests
+            ttl: Seconds a pooled question stays eligible
+        """
+        self.pool_size = pool_size
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions "
+            "(namespace TEXT NOT NULL, created_at REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_questions_namespace ON questions (namespace, created_at)"
+        )
+        # Pooled questions already served to each user
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS served "
+            "(user_id TEXT NOT NULL, question_id INTEGER NOT NULL, PRIMARY KEY (user_id, question_id))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def namespace(kind: str, topic: str, difficulty: str, variant: str = "") -> str:
+        """
+        Build the pool key for a question request.
+
+        Args:
+            kind: Question kind ("mcq" or "qna")
+            topic: Topic name (matched case-insensitively)
+            difficulty: Difficulty bucket derived from mastery
+            variant: Extra discriminator, e.g. QnA answer length
+        """
+        return f"{kind}|{topic.lower()}|{difficulty}|{variant}"
+
+    def get(self, namespace: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Draw a pooled question the user has not been served yet.
+
+        Args:
+            namespace: Pool key from namespace()
+            user_id: User the question is served to; it is not drawn for them again
+
+        Returns:
+            A question dict, or None while the pool has fewer than pool_size fresh
+            entries or the user has already seen all of them
+        """
+        cutoff = time.time() - self.ttl
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT q.rowid, q.payload, s.question_id IS NOT NULL FROM questions q "
+                    "LEFT JOIN served s ON s.question_id = q.rowid AND s.user_id = ? "
+                    "WHERE q.namespace = ? AND q.created_at >= ?",
+                    (user_id, namespace, cutoff)
+                ).fetchall()
+                unseen = [row for row in rows if not row[2]]
+                if len(rows) < self.pool_size or not unseen:
+                    return None
+                question_id, payload, _ = random.choice(unseen)
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO served (user_id, question_id) VALUES (?, ?)",
+                    (user_id, question_id)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Question cache read failed: {e}")
+            return None
+
+        return orjson.loads(payload)
+
+    def add(self, namespace: str, question: Dict[str, Any], user_id: Optional[str] = None):
+        """
+        Add a generated question to its pool, dropping expired entries.
+
+        Args:
+            namespace: Pool key from namespace()
+            question: Generated question dict
+            user_id: User the question was generated for; it is marked as served to them
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM served WHERE question_id IN "
+                    "(SELECT rowid FROM questions WHERE namespace = ? AND created_at < ?)",
+                    (namespace, now - self.ttl)
+                )
+                self._conn.execute(
+                    "DELETE FROM questions WHERE namespace = ? AND created_at < ?",
+                    (namespace, now - self.ttl)
+                )
+                cursor = self._conn.execute(
+                    "INSERT INTO questions (namespace, created_at, payload) VALUES (?, ?, ?)",
+                    (namespace, now, orjson.dumps(question))
+                )
+                if user_id is not None:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO served (user_id, question_id) VALUES (?, ?)",
+                        (user_id, cursor.lastrowid)
+                    )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Question cache write failed: {e}")
+
+
+# Global instance
+_question_cache = None
+
+
+def get_question_cache() -> QuestionCache:
+    """Get or create the global question cache."""
+    global _question_cache
+    if _question_cache is None:
+        _question_cache = QuestionCache(os.path.join(settings.USER_DATA_DIRECTORY, "question_cache.sqlite3"))
+    return _question_cache
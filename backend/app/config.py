@@ -18,11 +18,34 @@ class Settings(BaseSettings):
     # Timeouts (seconds)
     OLLAMA_TIMEOUT: int = 30
     MCQ_EVAL_TIMEOUT: int = 5
+    # Rubric grading writes a full evaluation, so it needs a generation-sized budget
+    QNA_EVAL_TIMEOUT: int = 30
     GENERATION_TIMEOUT: int = 60
     
+    # Concurrent in-flight requests per Ollama model. The server only runs them
+    # in parallel if its OLLAMA_NUM_PARALLEL is at least this value (see
+    # docker-compose.yml); otherwise extra requests queue server-side
+    OLLAMA_MAX_CONCURRENT: int = 4
+    # Concurrent generations per background question-pool fill; kept below
+    # OLLAMA_MAX_CONCURRENT so interactive requests still get a model slot
+    QUESTION_GENERATION_CONCURRENCY: int = 2
+    
+    # How long Ollama keeps a model loaded after a request. While loaded, the
+    # KV cache of a shared prompt prefix (static instructions first, per-call
+    # fields last) is reused instead of being recomputed
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    
     # Retry configuration
     RETRY_ATTEMPTS: int = 3
     RETRY_DELAY: float = 1.0
+    RETRY_MAX_DELAY: float = 5.0
+    # Consecutive failed LLM calls before failing fast, and for how long (seconds)
+    CIRCUIT_BREAKER_FAIL_MAX: int = 10
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = 30.0
+    # Run MCQ generation attempts concurrently (first valid wins); triples LLM load
+    OLLAMA_PARALLEL_ATTEMPTS: bool = False
+    # Gap detection costs an LLM call per chat turn and its profile updates are disabled
+    ENABLE_GAP_DETECTION: bool = False
     
     # Use absolute paths based on backend directory
     CHROMA_PERSIST_DIRECTORY: str = os.path.join(_BACKEND_DIR, "data", "chroma")
@@ -8,8 +8,13 @@ NOTE: session_id has been REMOVED. All state is now per-user, topic-centric.
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
+import hashlib
 import json
 
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic import ValidationError as PydanticValidationError
+
 from backend.app.errors import (
     StateCorruptionError,
     MissingContextError,
@@ -36,6 +41,15 @@ class UserState:
         }
 
 
+class UserStateModel(BaseModel):
+    """Schema for the validated slice of a user state."""
+    model_config = ConfigDict(strict=True)
+    
+    user_id: str = Field(min_length=1)
+    data: dict
+    created_at: Any
+
+
 class UserStateValidator:
     """Validates user state for corruption."""
     
@@ -56,23 +70,25 @@ class UserStateValidator:
             MissingContextError: If required fields are missing
             StateCorruptionError: If validation fails
         """
-        # Check for required fields
-        missing_fields = UserStateValidator.REQUIRED_FIELDS - set(state.keys())
-        if missing_fields:
-            raise MissingContextError(
-                message="User state missing required fields",
-                required_fields=list(missing_fields)
-            )
-        
-        # Validate data structure
-        if not isinstance(state.get("data"), dict):
-            raise StateCorruptionError(
-                message="User data is corrupted (invalid format)",
-                session_state=state
-            )
-        
-        # Validate IDs are non-empty strings
-        if not isinstance(state.get("user_id"), str) or not state["user_id"]:
+        # Validate the whole state in a single schema pass
+        try:
+            UserStateModel.model_validate(state)
+        except PydanticValidationError as e:
+            errors = e.errors()
+            missing_fields = [err["loc"][0] for err in errors if err["type"] == "missing"]
+            if missing_fields:
+                raise MissingContextError(
+                    message="User state missing required fields",
+                    required_fields=missing_fields
+                )
+            
+            invalid_fields = {err["loc"][0] for err in errors}
+            if "data" in invalid_fields:
+                raise StateCorruptionError(
+                    message="User data is corrupted (invalid format)",
+                    session_state=state
+                )
+            
             raise StateCorruptionError(
                 message="Invalid user_id in user state",
                 session_state=state
@@ -193,9 +209,17 @@ class UserStateManager:
                 session_state=old_state
             )
     
-    def export_state(self) -> str:
-        """Export user state as JSON string."""
-        return json.dumps(self.state, indent=2)
+    def export_state(self, pretty: bool = False) -> str:
+        """
+        Export user state as JSON string.
+        
+        Args:
+            pretty: Indent the output for human readers (compact by default)
+        """
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(self.state, option=option).decode()
     
     def create_checkpoint(self) -> Dict[str, Any]:
         """Create a checkpoint of current state."""
@@ -220,8 +244,8 @@ class UserStateManager:
     @staticmethod
     def _calculate_checksum(data: Dict[str, Any]) -> str:
         """Calculate checksum of state data."""
-        import hashlib
-        state_json = json.dumps(data, sort_keys=True)
+        # Compact separators keep the canonical form (and the bytes hashed) small
+        state_json = json.dumps(data, sort_keys=True, separators=(",", ":"))
         return hashlib.sha256(state_json.encode()).hexdigest()
     
     @staticmethod
@@ -243,6 +267,18 @@ class UserStateManager:
 
 
 # Backward compatibility aliases (DEPRECATED)
-SessionState = UserState
-SessionValidator = UserStateValidator
-SessionStateManager = UserStateManager
+_DEPRECATED_ALIASES = {
+    "SessionState": "UserState",
+    "SessionValidator": "UserStateValidator",
+    "SessionStateManager": "UserStateManager",
+}
+
+
+def __getattr__(name: str):
+    """Resolve deprecated Session* aliases on first access and cache them."""
+    target = _DEPRECATED_ALIASES.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[target]
+    globals()[name] = value
+    return value
@@ -1,30 +1,219 @@
 import asyncio
+import functools
 import json
+import random
+import time
 from typing import Optional, Dict, Any
+import httpx
 from langchain_ollama import ChatOllama
+from ollama import AsyncClient, Client
+from pydantic import model_validator
 from backend.app.config import settings
 from backend.app.utils.logger import logger
 
+# Seconds between refreshes of the installed-model list
+MODEL_REFRESH_INTERVAL = 60
+
+# Keep-alive connections held open to Ollama per shared client
+MAX_KEEPALIVE_CONNECTIONS = 32
+
+# Upper bound on open connections to Ollama per shared client
+MAX_CONNECTIONS = 64
+
+# Deadline errors from wait_for (asyncio.TimeoutError is not a TimeoutError
+# subclass before Python 3.11) and from the HTTP client timeout
+_TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError, httpx.TimeoutException)
+
+# Shared clients keyed by request timeout
+_shared_async_clients: Dict[int, AsyncClient] = {}
+_shared_sync_clients: Dict[int, Client] = {}
+
+
+def _connection_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        max_connections=MAX_CONNECTIONS,
+    )
+
+
+def get_shared_async_client(timeout: int) -> AsyncClient:
+    """Get the pooled Ollama async client for a timeout.
+    
+    All ChatOllama instances with the same timeout reuse one httpx
+    connection pool instead of opening new connections per request.
+    """
+    client = _shared_async_clients.get(timeout)
+    if client is None:
+        client = AsyncClient(
+            host=settings.OLLAMA_BASE_URL,
+            timeout=timeout,
+            limits=_connection_limits(),
+        )
+        _shared_async_clients[timeout] = client
+    return client
+
+
+def get_shared_sync_client(timeout: int) -> Client:
+    """Get the pooled Ollama sync client for a timeout.
+    
+    Used by blocking invoke() calls (e.g. conversation summaries) so they
+    also reuse keep-alive connections.
+    """
+    client = _shared_sync_clients.get(timeout)
+    if client is None:
+        client = Client(
+            host=settings.OLLAMA_BASE_URL,
+            timeout=timeout,
+            limits=_connection_limits(),
+        )
+        _shared_sync_clients[timeout] = client
+    return client
+
+
+class PooledChatOllama(ChatOllama):
+    """ChatOllama that sends requests through the shared per-timeout Ollama clients."""
+    
+    # Request timeout in seconds; selects the shared client pair
+    pool_timeout: int = settings.OLLAMA_TIMEOUT
+    
+    @model_validator(mode="after")
+    def _set_clients(self) -> "PooledChatOllama":
+        """Replace ChatOllama's client setup, which opens a new connection pool per instance."""
+        self._client = get_shared_sync_client(self.pool_timeout)
+        self._async_client = get_shared_async_client(self.pool_timeout)
+        return self
+
+
+@functools.lru_cache(maxsize=64)
+def _build_chat_client(
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    timeout: int,
+    format: Optional[str]
+) -> ChatOllama:
+    """Build a ChatOllama on the shared connection pools; one instance per configuration."""
+    return PooledChatOllama(
+        model=model,
+        base_url=settings.OLLAMA_BASE_URL,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        pool_timeout=timeout,
+        keep_alive=settings.OLLAMA_KEEP_ALIVE,
+        format=format
+    )
+
+
+async def close_shared_clients() -> None:
+    """Close all pooled Ollama connections (call on application shutdown)."""
+    # Cached ChatOllama instances hold the pooled clients being closed
+    _build_chat_client.cache_clear()
+    clients = list(_shared_async_clients.values())
+    _shared_async_clients.clear()
+    for client in clients:
+        await client.close()
+    sync_clients = list(_shared_sync_clients.values())
+    _shared_sync_clients.clear()
+    for client in sync_clients:
+        client.close()
+
+
+async def _load_models() -> Optional[Dict[str, bool]]:
+    """Fetch installed models from Ollama's /api/tags endpoint.
+    
+    Returns:
+        Dict of model name -> True, or None if Ollama could not be reached
+    """
+    try:
+        async with httpx.AsyncClient(timeout=2.0) as http:
+            response = await http.get(f"{settings.OLLAMA_BASE_URL}/api/tags")
+        response.raise_for_status()
+        models = {}
+        for entry in response.json().get("models", []):
+            name = entry.get("name") or entry.get("model")
+            if not name:
+                continue
+            models[name] = True
+            # Also register the untagged name ("llama3:latest" -> "llama3")
+            models[name.split(":", 1)[0]] = True
+        return models
+    except Exception as e:
+        logger.warning(f"Could not load available OLLAMA models: {e}")
+        return None
+
+
 class OllamaClientManager:
     """Manages OLLAMA client instances with model selection and error handling."""
     
-    # Model availability cache
+    # Model availability cache, filled by refresh_available_models
     _available_models: Optional[Dict[str, bool]] = None
     
+    # Per-model limits on in-flight requests
+    _semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    @classmethod
+    def get_semaphore(cls, model: str) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent requests to a model.
+        
+        Ollama batches requests per loaded model, so requests are bounded per
+        model to settings.OLLAMA_MAX_CONCURRENT instead of piling up on the server.
+        """
+        semaphore = cls._semaphores.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.OLLAMA_MAX_CONCURRENT)
+            cls._semaphores[model] = semaphore
+        return semaphore
+    
+    @classmethod
+    async def refresh_available_models(cls) -> None:
+        """Reload the installed-model list; the last known list is kept if Ollama is unreachable."""
+        models = await _load_models()
+        if models is not None:
+            cls._available_models = models
+    
+    @classmethod
+    async def run_model_refresh(cls) -> None:
+        """Refresh the installed-model list every MODEL_REFRESH_INTERVAL seconds (run as a background task)."""
+        while True:
+            await asyncio.sleep(MODEL_REFRESH_INTERVAL)
+            await cls.refresh_available_models()
+    
+    @classmethod
+    def get_available_models(cls) -> Optional[Dict[str, bool]]:
+        """Get the cached installed models; never blocks on Ollama.
+        
+        Returns:
+            Dict of available model names, or None if availability is unknown
+        """
+        return cls._available_models
+    
+    @classmethod
+    def is_model_available(cls, model: str) -> bool:
+        """Check if a model is installed. Unknown availability counts as available."""
+        models = cls.get_available_models()
+        if models is None:
+            return True
+        return model in models
+    
     @staticmethod
     def get_client(
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        format: Optional[str] = None
     ) -> ChatOllama:
-        """Create an OLLAMA client with the specified model.
+        """Get the OLLAMA client for the specified model and settings.
+        
+        Clients are stateless, so callers asking for the same configuration
+        share one instance.
         
         Args:
             model: Model name. Defaults to settings.LLM_MODEL
             temperature: Temperature for generation
             max_tokens: Maximum tokens in response
             timeout: Request timeout in seconds
+            format: Output format; "json" constrains the model to valid JSON
         """
         if model is None:
             model = settings.LLM_MODEL
@@ -32,13 +221,7 @@ class OllamaClientManager:
         if timeout is None:
             timeout = settings.OLLAMA_TIMEOUT
         
-        return ChatOllama(
-            model=model,
-            base_url=settings.OLLAMA_BASE_URL,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            timeout=timeout
-        )
+        return _build_chat_client(model, temperature, max_tokens, timeout, format)
     
     @staticmethod
     def get_model_for_task(task_type: str) -> str:
@@ -59,7 +242,13 @@ class OllamaClientManager:
             "brainstorm": settings.MODEL_BRAINSTORM,
             "planning": settings.MODEL_BRAINSTORM,
         }
-        return task_models.get(task_type, settings.LLM_MODEL)
+        model = task_models.get(task_type, settings.LLM_MODEL)
+        
+        # Fall back to the default model instead of making a doomed LLM call
+        if model != settings.LLM_MODEL and not OllamaClientManager.is_model_available(model):
+            logger.warning(f"Model {model} not available for {task_type}, using {settings.LLM_MODEL}")
+            return settings.LLM_MODEL
+        return model
     
     @staticmethod
     def get_timeout_for_task(task_type: str) -> int:
@@ -71,7 +260,9 @@ class OllamaClientManager:
         Returns:
             Timeout in seconds
         """
-        if "eval" in task_type:
+        if task_type == "qna_eval":
+            return settings.QNA_EVAL_TIMEOUT
+        elif "eval" in task_type:
             return settings.MCQ_EVAL_TIMEOUT
         elif "generation" in task_type:
             return settings.GENERATION_TIMEOUT
@@ -81,7 +272,8 @@ class OllamaClientManager:
 def get_ollama_client(
     temperature: float = 0.7,
     max_tokens: Optional[int] = None,
-    task_type: Optional[str] = None
+    task_type: Optional[str] = None,
+    format: Optional[str] = None
 ) -> ChatOllama:
     """Convenience function to get an OLLAMA client.
     
@@ -89,6 +281,7 @@ def get_ollama_client(
         temperature: Temperature for generation
         max_tokens: Maximum tokens
         task_type: Task type for automatic model/timeout selection
+        format: Output format; "json" constrains the model to valid JSON
     
     Returns:
         ChatOllama instance
@@ -99,14 +292,61 @@ def get_ollama_client(
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
-        timeout=timeout
+        timeout=timeout,
+        format=format
     )
 
+class CircuitBreaker:
+    """Fails LLM calls fast after repeated failures instead of queueing more work on a sick server.
+    
+    After fail_max consecutive failed calls the breaker opens and calls are
+    rejected for reset_timeout seconds. The first call after that is let
+    through as a probe: success closes the breaker, failure re-opens it.
+    """
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+    
+    def allow(self) -> bool:
+        """Whether a call may be attempted now."""
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            # Half-open: let this call probe the server, hold the rest
+            self._opened_at = time.monotonic()
+            return True
+        return False
+    
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+    
+    def record_failure(self):
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            if self._opened_at is None:
+                logger.warning(f"OLLAMA circuit opened after {self._failures} consecutive failures")
+            self._opened_at = time.monotonic()
+
+
+# Shared by every LLM call in the process
+_circuit_breaker = CircuitBreaker(settings.CIRCUIT_BREAKER_FAIL_MAX, settings.CIRCUIT_BREAKER_RESET_TIMEOUT)
+
+
+def _backoff_delay(retry_delay: float, attempt: int) -> float:
+    """Exponential backoff from retry_delay, capped at RETRY_MAX_DELAY, with full jitter."""
+    return random.uniform(0, min(settings.RETRY_MAX_DELAY, retry_delay * (2 ** attempt)))
+
+
 async def invoke_with_retry(
     client: ChatOllama,
     prompt,
     max_retries: int = settings.RETRY_ATTEMPTS,
-    retry_delay: float = settings.RETRY_DELAY
+    retry_delay: float = settings.RETRY_DELAY,
+    timeout: Optional[float] = None
 ) -> str:
     """Invoke OLLAMA client with automatic retry logic.
     
@@ -114,40 +354,51 @@ async def invoke_with_retry(
         client: ChatOllama instance
         prompt: Prompt text (str) or list of messages from ChatPromptTemplate
         max_retries: Maximum retry attempts
-        retry_delay: Delay between retries in seconds
+        retry_delay: Base delay between retries in seconds, doubled per attempt and jittered
+        timeout: Wall-clock deadline per attempt in seconds; a stuck attempt
+            is cancelled and retried. None waits on the HTTP timeout alone
     
     Returns:
         Response content string
     
     Raises:
-        ConnectionError: If connection fails after retries
+        ConnectionError: If connection fails after retries, or the circuit breaker is open
         TimeoutError: If request times out
     """
+    if not _circuit_breaker.allow():
+        raise ConnectionError(
+            f"OLLAMA circuit breaker open after repeated failures; "
+            f"not retrying for {settings.CIRCUIT_BREAKER_RESET_TIMEOUT}s"
+        )
+    
     last_error = None
     
     for attempt in range(max_retries):
         try:
             # Handle list of messages (from ChatPromptTemplate.format_messages())
             # ChatOllama.ainvoke can accept both strings and list of BaseMessage
-            response = await client.ainvoke(prompt)
+            async with OllamaClientManager.get_semaphore(client.model):
+                response = await asyncio.wait_for(client.ainvoke(prompt), timeout=timeout)
+            _circuit_breaker.record_success()
             return response.content
-        except TimeoutError as e:
+        except _TIMEOUT_ERRORS as e:
             last_error = e
             logger.warning(f"OLLAMA timeout (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(_backoff_delay(retry_delay, attempt))
         except ConnectionError as e:
             last_error = e
             logger.warning(f"OLLAMA connection error (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(_backoff_delay(retry_delay, attempt))
         except Exception as e:
             last_error = e
             logger.error(f"OLLAMA error (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(_backoff_delay(retry_delay, attempt))
     
-    if isinstance(last_error, TimeoutError):
+    _circuit_breaker.record_failure()
+    if isinstance(last_error, _TIMEOUT_ERRORS):
         raise TimeoutError(
             f"OLLAMA request timed out after {max_retries} attempts. "
             f"Ensure Ollama is running and not overloaded."
@@ -1,9 +1,10 @@
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate, MessagesPlaceholder
 
 # JSON OUTPUT GUIDELINES
+# Appended to PromptTemplate strings, so literal braces are doubled
 JSON_OUTPUT_INSTRUCTION = """
 IMPORTANT: Output ONLY valid JSON. No markdown, no code blocks, no explanation.
-If you cannot produce valid JSON, output {"error": "reason"}.
+If you cannot produce valid JSON, output {{"error": "reason"}}.
 """
 
 SYSTEM_PROMPT = """You are a highly capable AI Study Buddy. Your goal is to help the user learn effectively.
@@ -207,7 +208,7 @@ Use this WORD-BASED RUBRIC:
    - 1-2: Some correct but significant errors
    - 0: Wrong or no relevant content
 
-2. Completeness (0-3 marks): Are key points covered for {length} mode?
+2. Completeness (0-3 marks): Are key points covered for the Expected Mode given below?
    - 3: All key aspects covered
    - 2: Most key aspects covered
    - 1: Minimal coverage
@@ -246,13 +247,6 @@ FORBIDDEN to skip explanation. EVERY answer MUST receive:
 
 === FAILURE RULE ===
 If you cannot evaluate: return result="error", feedback="Assessment evaluation failed. Please retry."
-
-Topic: {topic}
-Question: {question}
-Expected Mode: {length}
-Expected Answer Context: {context}
-User Answer: {user_answer}
-
 """ + JSON_OUTPUT_INSTRUCTION + """
 Return ONLY a JSON object with these MANDATORY keys:
 "is_valid_answer": boolean (false if gibberish/empty/random),
@@ -264,6 +258,13 @@ Return ONLY a JSON object with these MANDATORY keys:
 "feedback": "MANDATORY: CORRECT (score>=4): 1-2 sentences. INCORRECT (score<4): 3-5 sentences DETAILED.",
 "rubric_evaluation": "brief breakdown of scores for each category",
 "correct_explanation": "The COMPLETE correct answer with full explanation - ALWAYS provide"
+
+=== ANSWER TO EVALUATE ===
+Topic: {topic}
+Question: {question}
+Expected Mode: {length}
+Expected Answer Context: {context}
+User Answer: {user_answer}
 """
 
 QNA_GENERATION_PROMPT = """Generate a question-answer (Q&A) challenge for the topic: {topic}.
@@ -285,12 +286,15 @@ Return ONLY a JSON object with keys: "question", "expected_points", "length".
 Do not include any preamble or explanation.
 """
 
-GAP_DETECTION_PROMPT = """Analyze the interaction to identify knowledge gaps and mastered concepts.
-User message: {input}
-AI response: {output}
+GAP_DETECTION_PROMPT = """Analyze the interaction below to identify knowledge gaps and mastered concepts.
 
 Identify:
 1. detected_gaps: concepts the user seems to struggle with.
 2. mastered_concepts: concepts the user seems to understand well.
 3. suggested_level: beginner, intermediate, or advanced based on the depth of the conversation.
+
+Return the analysis as a JSON object with keys: 'detected_gaps' (list), 'mastered_concepts' (list), 'suggested_level' (beginner/intermediate/advanced).
+
+User message: {input}
+AI response: {output}
 """
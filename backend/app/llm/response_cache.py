@@ -0,0 +1,96 @@
+"""
+In-process cache of LLM responses for deterministic prompts.
+
+At temperature 0 a model's output is a pure function of (model, prompt), so
+repeated prompts (the same gap-detection exchange, the same QnA answer being
+re-graded) can be answered from memory instead of another LLM round-trip.
+"""
+
+import hashlib
+import time
+from typing import Optional, Dict, Tuple
+
+import orjson
+from langchain_ollama import ChatOllama
+
+from backend.app.llm.ollama_client import invoke_with_retry
+
+
+# Responses kept before the least recently used entry is evicted
+RESPONSE_CACHE_SIZE = 2000
+
+# Seconds a cached response stays valid
+RESPONSE_CACHE_TTL = 3600
+
+
+def cache_key(model: str, prompt: str, temperature: Optional[float]) -> Optional[str]:
+    """
+    Hash identifying a prompt sent to a model.
+
+    Returns:
+        Hex digest, or None when the temperature makes the output non-deterministic
+    """
+    if temperature != 0:
+        return None
+    payload = orjson.dumps({"model": model, "prompt": prompt}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of response strings with a per-entry TTL."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: int = RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, str]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None if missing or expired."""
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        # Re-insert to mark as most recently used
+        self._entries[key] = entry
+        return entry[1]
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        """Store a response, evicting the least recently used entry when full."""
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        while len(self._entries) > self.maxsize:
+            del self._entries[next(iter(self._entries))]
+
+
+# Global instance
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global LLM response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+async def invoke_with_cache(client: ChatOllama, prompt: str, **kwargs) -> str:
+    """
+    invoke_with_retry, served from the response cache when the client is deterministic.
+
+    Args:
+        client: ChatOllama instance
+        prompt: Prompt text
+        **kwargs: Passed through to invoke_with_retry
+
+    Returns:
+        Response content string
+    """
+    key = cache_key(client.model, prompt, client.temperature)
+    if key is not None:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            return cached
+    response = await invoke_with_retry(client, prompt, **kwargs)
+    if key is not None and response:
+        get_response_cache().set(key, response)
+    return response
@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from backend.app.api import chat, user
 from backend.app.errors import setup_logging, register_error_handlers
+from backend.app.llm.ollama_client import OllamaClientManager, close_shared_clients
+from backend.app.services.lazy_loading import flush_all as flush_user_metadata
+from backend.app.services.performance_monitor import flush_metrics
+from backend.app.services.question_generation import flush_question_pools
+import asyncio
 import os
 from pathlib import Path
 
@@ -25,26 +30,60 @@ app.add_middleware(
 # Register error handlers
 register_error_handlers(app)
 
+_model_refresh_task = None
+
+@app.on_event("startup")
+async def load_available_models():
+    # Populate the model availability cache before serving requests, then keep
+    # it fresh off the request path
+    global _model_refresh_task
+    await OllamaClientManager.refresh_available_models()
+    _model_refresh_task = asyncio.create_task(OllamaClientManager.run_model_refresh())
+
+@app.on_event("shutdown")
+async def close_ollama_clients():
+    if _model_refresh_task is not None:
+        _model_refresh_task.cancel()
+    await close_shared_clients()
+
+@app.on_event("shutdown")
+async def flush_pending_metadata():
+    flush_user_metadata()
+    flush_metrics()
+    flush_question_pools()
+
 # Register routes
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(user.router, prefix="/api", tags=["user"])
 
+# Pre-encoded health body - skips response model encoding on every probe
+_HEALTH_BODY = b'{"status":"healthy"}'
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 # Serve frontend static files
 frontend_dist = Path(__file__).parent.parent.parent / "frontend" / "dist"
+index_file = frontend_dist / "index.html"
 
+# Index the built frontend once at startup so requests need no stat() calls
+KNOWN_FILES = set()
 if frontend_dist.exists():
+    KNOWN_FILES = {
+        path.relative_to(frontend_dist).as_posix()
+        for path in frontend_dist.rglob("*")
+        if path.is_file()
+    }
     assets_dir = frontend_dist / "assets"
     if assets_dir.exists():
         app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
 
+INDEX_AVAILABLE = "index.html" in KNOWN_FILES
+
 @app.get("/")
 async def serve_root():
-    index_file = frontend_dist / "index.html"
-    if index_file.exists():
+    if INDEX_AVAILABLE:
         return FileResponse(str(index_file))
     return {"message": "Frontend not built"}
 
@@ -52,11 +91,9 @@ async def serve_root():
 async def serve_frontend(full_path: str):
     if full_path.startswith("api/") or full_path == "health":
         return None
-    file_path = frontend_dist / full_path
-    if file_path.exists() and file_path.is_file():
-        return FileResponse(str(file_path))
-    index_file = frontend_dist / "index.html"
-    if index_file.exists():
+    if full_path in KNOWN_FILES:
+        return FileResponse(str(frontend_dist / full_path))
+    if INDEX_AVAILABLE:
         return FileResponse(str(index_file))
     return {"message": "Frontend not built"}
 
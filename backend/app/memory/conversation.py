@@ -1,7 +1,159 @@
-from langchain_community.chat_message_histories import FileChatMessageHistory
-from langchain_core.messages import HumanMessage, AIMessage
+from typing import Dict, List, Optional, Sequence
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    AIMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+import orjson
 import os
+import threading
 from backend.app.config import settings
+from backend.app.utils.helpers import iter_jsonl_records, jsonl_append_prefix
+
+# Messages returned by load_memory_variables unless the caller asks otherwise
+DEFAULT_MAX_MESSAGES = 40
+
+# Bytes read per step when scanning the log backward
+TAIL_CHUNK_SIZE = 64 * 1024
+
+# Conversation memories kept open across requests, most recently used last
+MEMORY_CACHE_SIZE = 256
+
+
+class JSONLChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history stored as an append-only JSONL log, one message per line.
+    Adding a message appends a single line instead of rewriting the whole file.
+    """
+    def __init__(self, file_path: str, legacy_path: Optional[str] = None):
+        self.file_path = file_path
+        self._messages: Optional[List[BaseMessage]] = None
+        # Recent-message windows already read from the log, keyed by size;
+        # kept current by add_messages so every write path is visible
+        self._windows: Dict[int, List[BaseMessage]] = {}
+        # Append descriptor, opened on first write and kept for the life of the history
+        self._fd: Optional[int] = None
+        if legacy_path and not os.path.exists(file_path) and os.path.exists(legacy_path):
+            self._migrate_legacy(legacy_path)
+        self._file_id = self._current_file_id()
+
+    def _migrate_legacy(self, legacy_path: str) -> None:
+        """Convert a legacy JSON-array history file to the JSONL log."""
+        with open(legacy_path, "rb") as f:
+            content = f.read()
+        records = orjson.loads(content) if content.strip() else []
+        with open(self.file_path, "wb") as f:
+            f.writelines(orjson.dumps(record) + b"\n" for record in records)
+        os.remove(legacy_path)
+
+    def _current_file_id(self):
+        """(device, inode) of the log on disk, or None when it does not exist."""
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino)
+
+    def is_current(self) -> bool:
+        """Whether the log on disk is still the file this history has been reading and appending."""
+        return self._current_file_id() == self._file_id
+
+    def _read_messages(self) -> List[BaseMessage]:
+        if not os.path.exists(self.file_path):
+            return []
+        return messages_from_dict(list(iter_jsonl_records(self.file_path)))
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Messages in the log, read from disk on first access."""
+        if self._messages is None:
+            self._messages = self._read_messages()
+        return self._messages
+
+    def tail(self, k: int) -> List[BaseMessage]:
+        """Last k messages, read backward from the end of the log without parsing the rest."""
+        if k <= 0:
+            return []
+        if self._messages is not None:
+            return self._messages[-k:]
+        window = self._windows.get(k)
+        if window is None:
+            window = self._windows[k] = self._read_tail(k)
+        return list(window)
+
+    def _read_tail(self, k: int) -> List[BaseMessage]:
+        """Read the last k messages backward from the end of the log."""
+        if not os.path.exists(self.file_path):
+            return []
+        records = []
+        with open(self.file_path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            partial = b""
+            while pos > 0 and len(records) < k:
+                read_size = min(TAIL_CHUNK_SIZE, pos)
+                pos -= read_size
+                f.seek(pos)
+                lines = (f.read(read_size) + partial).split(b"\n")
+                # The first piece may continue in the previous chunk
+                partial = lines.pop(0) if pos > 0 else b""
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    try:
+                        records.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        # Torn write from an interrupted append
+                        continue
+                    if len(records) == k:
+                        break
+        records.reverse()
+        return messages_from_dict(records)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to the log in a single write."""
+        if not messages:
+            return
+        payload = b"".join(orjson.dumps(message_to_dict(m)) + b"\n" for m in messages)
+        if self._fd is None:
+            self._fd = os.open(self.file_path, os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+            st = os.fstat(self._fd)
+            self._file_id = (st.st_dev, st.st_ino)
+            # Later appends come from this process and are whole; only a tail
+            # torn before the descriptor was opened needs separating
+            payload = jsonl_append_prefix(self._fd) + payload
+        os.write(self._fd, payload)
+        if self._messages is not None:
+            self._messages.extend(messages)
+        for k, window in self._windows.items():
+            window.extend(messages)
+            del window[:max(0, len(window) - k)]
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append a single message to the log."""
+        self.add_messages([message])
+
+    def clear(self) -> None:
+        """Truncate the log."""
+        if self._fd is not None:
+            os.ftruncate(self._fd, 0)
+        else:
+            with open(self.file_path, "wb"):
+                pass
+            self._file_id = self._current_file_id()
+        self._messages = []
+        self._windows = {}
+
+    def close(self) -> None:
+        """Release the append descriptor."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self):
+        self.close()
 
 
 class ConversationMemoryWrapper:
@@ -9,39 +161,74 @@ class ConversationMemoryWrapper:
     A simple wrapper that provides a memory interface similar to the deprecated
     ConversationBufferMemory but works with newer LangChain versions.
     """
-    def __init__(self, chat_history: FileChatMessageHistory, memory_key: str = "chat_history"):
+    def __init__(self, chat_history: BaseChatMessageHistory, memory_key: str = "chat_history"):
         self.chat_memory = chat_history
         self.memory_key = memory_key
     
     def load_memory_variables(self, inputs: dict = None) -> dict:
-        """Load memory variables - returns messages as a list."""
-        return {self.memory_key: self.chat_memory.messages}
+        """
+        Load memory variables - returns the most recent messages as a list.
+        inputs["max_messages"] sets the window size (default DEFAULT_MAX_MESSAGES);
+        None returns the full history.
+        """
+        max_messages = (inputs or {}).get("max_messages", DEFAULT_MAX_MESSAGES)
+        if max_messages is None:
+            return {self.memory_key: self.chat_memory.messages}
+        if isinstance(self.chat_memory, JSONLChatMessageHistory):
+            # The history memoizes its windows and updates them on every append
+            window = self.chat_memory.tail(max_messages)
+        else:
+            window = self.chat_memory.messages[-max_messages:]
+        return {self.memory_key: window}
     
     def save_context(self, inputs: dict, outputs: dict) -> None:
         """Save context from this conversation to buffer."""
         input_str = inputs.get("input", inputs.get("human", ""))
         output_str = outputs.get("output", outputs.get("ai", ""))
         
+        messages = []
         if input_str:
-            self.chat_memory.add_message(HumanMessage(content=input_str))
+            messages.append(HumanMessage(content=input_str))
         if output_str:
-            self.chat_memory.add_message(AIMessage(content=output_str))
+            messages.append(AIMessage(content=output_str))
+        # Both sides of the exchange go out in a single append
+        self.chat_memory.add_messages(messages)
     
     def clear(self) -> None:
         """Clear memory contents."""
         self.chat_memory.clear()
 
 
+_memories: Dict[str, ConversationMemoryWrapper] = {}
+_memories_lock = threading.Lock()
+
+
 def get_conversation_memory(user_id: str, session_id: str = None):
     """
     Get conversation memory for a user - topic-centric model, no sessions.
     session_id parameter is DEPRECATED and ignored.
-    """
-    history_path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_history.json")
-    os.makedirs(settings.USER_DATA_DIRECTORY, exist_ok=True)
     
-    chat_history = FileChatMessageHistory(history_path)
-    return ConversationMemoryWrapper(
-        chat_history=chat_history,
-        memory_key="chat_history"
-    )
+    The memory is reused across calls (bounded LRU) so its loaded message
+    windows and append descriptor survive between requests. It is rebuilt
+    when the log on disk was replaced or removed, e.g. by a memory reset.
+    """
+    with _memories_lock:
+        memory = _memories.pop(user_id, None)
+        if memory is not None and not memory.chat_memory.is_current():
+            memory.chat_memory.close()
+            memory = None
+        if memory is None:
+            history_path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_history.jsonl")
+            legacy_path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_history.json")
+            os.makedirs(settings.USER_DATA_DIRECTORY, exist_ok=True)
+            
+            chat_history = JSONLChatMessageHistory(history_path, legacy_path=legacy_path)
+            memory = ConversationMemoryWrapper(
+                chat_history=chat_history,
+                memory_key="chat_history"
+            )
+        # Re-insert to mark as most recently used
+        _memories[user_id] = memory
+        while len(_memories) > MEMORY_CACHE_SIZE:
+            _memories.pop(next(iter(_memories))).chat_memory.close()
+    return memory
@@ -1,7 +1,13 @@
 from backend.app.llm.ollama_client import get_ollama_client
 from backend.app.config import settings
+import hashlib
+import json
 import os
 
+# In-process prompt hash -> response memo in front of the on-disk summary cache
+SUMMARY_MEMO_SIZE = 256
+_SUMMARY_MEMO = {}
+
 def get_summary_memory(user_id: str):
     """
     Get summary memory for a user.
@@ -9,7 +15,8 @@ def get_summary_memory(user_id: str):
     Args:
         user_id: User identifier (session_id is DEPRECATED and removed)
     """
-    llm = get_ollama_client()
+    # Deterministic generation so identical prompts can be served from the summary cache
+    llm = get_ollama_client(temperature=0.0)
     summary_path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_summary.txt")
     os.makedirs(settings.USER_DATA_DIRECTORY, exist_ok=True)
     
@@ -22,18 +29,63 @@ class SummaryManager:
     def __init__(self, path, llm):
         self.path = path
         self.llm = llm
+        # Prompt -> response cache, only used when generation is deterministic
+        self.cache_dir = os.path.join(settings.USER_DATA_DIRECTORY, "summary_cache")
+        # Last summary read from or written to disk, with the file mtime it matches
+        self._summary_text = None
+        self._summary_mtime = None
 
     def get_summary(self):
-        if os.path.exists(self.path):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return "New user. No summary available."
+        if self._summary_text is None or mtime != self._summary_mtime:
             with open(self.path, "r") as f:
-                return f.read()
-        return "New user. No summary available."
+                self._summary_text = f.read()
+            self._summary_mtime = mtime
+        return self._summary_text
+
+    def _cache_key(self, prompt: str):
+        """Hash identifying a prompt, or None when the LLM output is not deterministic."""
+        if getattr(self.llm, "temperature", None) != 0:
+            return None
+        payload = json.dumps({"model": getattr(self.llm, "model", None), "prompt": prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _generate(self, prompt: str):
+        cache_key = self._cache_key(prompt)
+        if cache_key is None:
+            return self.llm.invoke(prompt).content
+        if cache_key in _SUMMARY_MEMO:
+            return _SUMMARY_MEMO[cache_key]
+        
+        cache_path = os.path.join(self.cache_dir, f"{cache_key}.txt")
+        if os.path.exists(cache_path):
+            with open(cache_path, "r") as f:
+                summary = f.read()
+        else:
+            summary = self.llm.invoke(prompt).content
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path, "w") as f:
+                f.write(summary)
+        
+        if len(_SUMMARY_MEMO) >= SUMMARY_MEMO_SIZE:
+            # Drop the oldest entry (dicts keep insertion order)
+            del _SUMMARY_MEMO[next(iter(_SUMMARY_MEMO))]
+        _SUMMARY_MEMO[cache_key] = summary
+        return summary
 
     def update_summary(self, new_messages_str: str):
         current_summary = self.get_summary()
         prompt = f"Current Summary: {current_summary}\n\nNew Interactions: {new_messages_str}\n\nUpdate the summary to include key learning points and progress."
-        response = self.llm.invoke(prompt)
-        new_summary = response.content
-        with open(self.path, "w") as f:
+        new_summary = self._generate(prompt)
+        
+        # Write to a temp file and swap it in so readers never see a partial summary
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
             f.write(new_summary)
+        os.replace(tmp_path, self.path)
+        self._summary_text = new_summary
+        self._summary_mtime = os.stat(self.path).st_mtime_ns
         return new_summary
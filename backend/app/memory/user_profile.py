@@ -1,13 +1,64 @@
-import json
+import functools
+import heapq
 import os
+import re
+import sys
+import threading
+import time
 import uuid
+from datetime import date
+import orjson
+import zstandard as zstd
 from backend.app.config import settings
+from backend.app.utils.helpers import iter_jsonl_records, jsonl_append_prefix, load_json_file
+
+# Delta records appended before the base profile file is rewritten
+COMPACTION_THRESHOLD = 50
+
+# Snapshots larger than this are written zstd-compressed to <profile>.json.zst
+COMPRESS_THRESHOLD = 512 * 1024
+
+# Held as sets in memory, stored as sorted lists on disk
+AREA_KEYS = ("weak_areas", "strong_areas")
+
+# Classification threshold and the status labels derived from it
+_MASTERY_THRESHOLD = 0.40
+_MASTERY_THRESHOLD_PCT = 40
+_STATUS_UNASSESSED, _STATUS_WEAK, _STATUS_STRONG = "Unassessed", "Weak", "Strong"
+
+_TOPIC_NAME_RE = re.compile(r"^[a-zA-Z0-9 \-&]+$")
+
+# Seconds a cached profile is reused before it is re-read from disk
+PROFILE_CACHE_TTL = 30
+
+# user_id -> (cached_at, disk signature, profile)
+_PROFILE_CACHE = {}
+_PROFILE_CACHE_LOCK = threading.Lock()
+
+
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_day(day: date) -> str:
+    """Display form of a calendar day; many topics share one, so formatting is memoized."""
+    return day.strftime("%b %d, %Y")
 
 class UserProfile:
     """
     Topic-based memory model - NO SESSIONS.
     All topics are stored per user, not per session.
     Topics are only created when explanations are given.
+    
+    Use as a context manager to group several mutations into one write:
+        with UserProfile(user_id) as profile:
+            profile.add_topic(...)
+            profile.update_topic(...)
     """
     def __init__(self, user_id: str, session_id: str = None):
         """
@@ -17,21 +68,52 @@ class UserProfile:
         self.user_id = user_id
         # Session concept removed - single profile per user
         self.path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_profile.json")
+        # Compressed form of the base file, used once the profile grows large
+        self.zst_path = self.path + ".zst"
+        # Append-only log of mutations since the base file was last written
+        self.delta_path = os.path.join(settings.USER_DATA_DIRECTORY, f"{user_id}_profile.jsonl")
+        self._delta_count = 0
+        # Writes deferred while inside a `with profile:` batch
+        self._batch_depth = 0
+        self._pending_deltas = []
+        self._needs_snapshot = False
+        # One shared str per topic ID, so parent references don't hold copies
+        self._intern_table = {}
         self.data = self._load()
+        self.invalidate_caches()
+        self._replay_deltas()
+
+    def _base_file(self):
+        """The current base profile file (plain or compressed), or None if neither exists."""
+        candidates = [p for p in (self.path, self.zst_path) if os.path.exists(p)]
+        if not candidates:
+            return None
+        # Both exist only if a crash interrupted a switch between forms - take the newer
+        return max(candidates, key=os.path.getmtime)
 
     def _load(self):
-        if os.path.exists(self.path):
-            with open(self.path, "r") as f:
-                data = json.load(f)
-                # Migrate old session-based data if needed
-                if "session_id" in data:
-                    del data["session_id"]
-                return data
+        base_file = self._base_file()
+        if base_file is not None:
+            if base_file == self.zst_path:
+                with open(base_file, "rb") as f:
+                    data = orjson.loads(zstd.ZstdDecompressor().decompress(f.read()))
+            else:
+                data = load_json_file(base_file)
+            # Migrate old session-based data if needed
+            if "session_id" in data:
+                del data["session_id"]
+            for key in AREA_KEYS:
+                data[key] = set(self._intern_id(tid) for tid in data.get(key) or ())
+            for topic in data.get("topics", {}).values():
+                self._intern_topic_strings(topic)
+                # mastery_score is not persisted - derive it from the counters
+                topic["mastery_score"] = self._mastery(topic)
+            return data
         return {
             "mastery": 0.0,
             "topics": {},  # Only topics that have been EXPLAINED
-            "weak_areas": [],  # Topics with mastery < 40%
-            "strong_areas": [],  # Topics with mastery >= 40%
+            "weak_areas": set(),  # Topics with mastery < 40%
+            "strong_areas": set(),  # Topics with mastery >= 40%
             "conversation_history": [],
             "mode": "idle",
             "active_challenges": {},
@@ -39,6 +121,140 @@ class UserProfile:
             "created_at": None
         }
 
+    def _intern_id(self, value: str):
+        return self._intern_table.setdefault(value, value)
+
+    def _intern_topic_strings(self, topic: dict):
+        """Share repeated strings in a loaded topic; user-written text is left alone."""
+        for key in ("classification", "status"):
+            value = topic.get(key)
+            if isinstance(value, str):
+                topic[key] = sys.intern(value)
+        for key in ("topic_id", "parent_topic_id"):
+            value = topic.get(key)
+            if isinstance(value, str):
+                topic[key] = self._intern_id(value)
+
+    def _replay_deltas(self):
+        """Apply delta records appended since the base profile was last written."""
+        if not os.path.exists(self.delta_path):
+            return
+        for record in iter_jsonl_records(self.delta_path):
+            self._apply_delta(record)
+            self._delta_count += 1
+        self.data["mastery"] = self.get_overall_mastery()
+
+    def invalidate_caches(self):
+        """
+        Rebuild derived totals from self.data.
+        Call after mutating self.data directly instead of through the profile methods.
+        """
+        # Mastery contribution of each assessed topic, keyed by topic name
+        self._mastery_contrib = {
+            name: t.get("mastery_score", 0.0)
+            for name, t in self.data.get("topics", {}).items()
+            if t.get("questions_attempted", 0) > 0
+        }
+        self._mastery_sum = sum(self._mastery_contrib.values())
+        self._assessed_count = len(self._mastery_contrib)
+        # Reverse index topic_id -> topic key, in topic insertion order
+        # Handle legacy topics without topic_id by using topic key as fallback
+        self._id_to_topic_key = {
+            t.get("topic_id", topic_key): topic_key
+            for topic_key, t in self.data.get("topics", {}).items()
+        }
+        # Case-insensitive topic name -> topic key, for the add_topic duplicate check
+        self._lower_name_index = {
+            t["name"].lower(): topic_key
+            for topic_key, t in self.data.get("topics", {}).items()
+        }
+
+    def __enter__(self):
+        self._batch_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush()
+        return False
+
+    def _apply_delta(self, record: dict):
+        """Apply a single delta record. Records are idempotent so replay is safe."""
+        op = record.get("op")
+        name = record.get("name")
+        topics = self.data["topics"]
+        if op == "add_topic":
+            if name not in topics:
+                topics[name] = record["topic"]
+                self._intern_topic_strings(topics[name])
+                self._lower_name_index[topics[name]["name"].lower()] = name
+                self._update_derived_state(name)
+        elif op == "update_topic":
+            if name in topics:
+                topics[name].update(record["updates"])
+                self._update_derived_state(name)
+        elif op == "set_explanation_cache":
+            topic = topics.get(name)
+            if topic is not None:
+                if topic.get("explanation_cache") is None:
+                    topic["explanation_cache"] = {}
+                topic["explanation_cache"][record["depth"]] = record["explanation"]
+        elif op == "update":
+            self.data[record["key"]] = record["value"]
+
+    def _append_delta(self, record: dict):
+        """Persist a mutation as one appended line instead of rewriting the profile."""
+        line = orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+        self.data["mastery"] = self.get_overall_mastery()
+        if self._batch_depth:
+            self._pending_deltas.append(line)
+            return
+        self._write_deltas([line])
+
+    def _disk_signature(self):
+        return (
+            _file_signature(self.path),
+            _file_signature(self.zst_path),
+            _file_signature(self.delta_path),
+        )
+
+    def _sync_cache_entry(self):
+        """After writing, keep this instance cached or evict the now-stale cached one."""
+        with _PROFILE_CACHE_LOCK:
+            entry = _PROFILE_CACHE.get(self.user_id)
+            if entry is None:
+                return
+            if entry[2] is self:
+                _PROFILE_CACHE[self.user_id] = (time.time(), self._disk_signature(), self)
+            else:
+                del _PROFILE_CACHE[self.user_id]
+
+    def _write_deltas(self, lines: list):
+        if self._base_file() is None:
+            # No base file yet - write a full snapshot first
+            self._write_snapshot()
+            return
+        # One write and one fsync per call; a batch reaches here once on exit
+        with open(self.delta_path, "a+b") as f:
+            f.write(jsonl_append_prefix(f.fileno()) + b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        self._delta_count += len(lines)
+        if self._delta_count >= COMPACTION_THRESHOLD:
+            self._write_snapshot()
+        else:
+            self._sync_cache_entry()
+
+    def flush(self):
+        """Write any mutations deferred by a batch."""
+        if self._needs_snapshot:
+            self._write_snapshot()
+        elif self._pending_deltas:
+            lines = self._pending_deltas
+            self._pending_deltas = []
+            self._write_deltas(lines)
+
     def add_topic(self, topic_name: str, parent_topic_id: str = None, explanation_summary: str = None):
         """
         Add a topic ONLY after it has been explained.
@@ -48,14 +264,14 @@ class UserProfile:
         if not (3 <= len(topic_name) <= 50):
             raise ValueError("Topic name must be between 3 and 50 characters.")
         
-        import re
-        if not re.match(r"^[a-zA-Z0-9 \-&]+$", topic_name):
+        if not _TOPIC_NAME_RE.match(topic_name):
             raise ValueError("Topic name contains invalid characters.")
 
         # Case-insensitive duplicate check
-        existing_names = {t["name"].lower(): name for name, t in self.data["topics"].items()}
-        if topic_name.lower() in existing_names:
-            return self.data["topics"][existing_names[topic_name.lower()]]
+        lower_name = topic_name.lower()
+        existing = self._lower_name_index.get(lower_name)
+        if existing is not None:
+            return self.data["topics"][existing]
 
         topic_id = str(uuid.uuid4())
         self.data["topics"][topic_name] = {
@@ -70,8 +286,13 @@ class UserProfile:
             "explanation_cache": None,
             "classification": "unassessed"  # unassessed | weak | strong
         }
+        self._lower_name_index[lower_name] = topic_name
         self._update_derived_state(topic_name)
-        self.save()
+        self._append_delta({
+            "op": "add_topic",
+            "name": topic_name,
+            "topic": self._persisted_topic(self.data["topics"][topic_name])
+        })
         return self.data["topics"][topic_name]
 
     def get_topic(self, topic_name: str):
@@ -90,13 +311,32 @@ class UserProfile:
             if topic.get("explanation_cache") is None:
                 topic["explanation_cache"] = {}
             topic["explanation_cache"][depth] = explanation
-            self.save()
+            self._append_delta({
+                "op": "set_explanation_cache",
+                "name": topic_name,
+                "depth": depth,
+                "explanation": explanation
+            })
+
+    def set_active_challenge(self, challenge_id: str, challenge: dict):
+        """Store a pending challenge, persisted as a delta instead of a full rewrite."""
+        challenges = self.data.get("active_challenges")
+        if challenges is None:
+            challenges = {}
+        challenges[challenge_id] = challenge
+        self.update("active_challenges", challenges)
+
+    def clear_active_challenge(self, challenge_id: str):
+        """Remove a pending challenge if present."""
+        challenges = self.data.get("active_challenges")
+        if challenges and challenges.pop(challenge_id, None) is not None:
+            self.update("active_challenges", challenges)
 
     def update_topic(self, topic_name: str, updates: dict):
         if topic_name in self.data["topics"]:
             self.data["topics"][topic_name].update(updates)
             self._update_derived_state(topic_name)
-            self.save()
+            self._append_delta({"op": "update_topic", "name": topic_name, "updates": updates})
 
     def _update_derived_state(self, topic_name: str):
         """Update derived state for a topic after mastery changes.
@@ -113,43 +353,60 @@ class UserProfile:
         
         # Mastery Calculation: mastery = correct / attempted
         questions_attempted = topic.get("questions_attempted", 0)
-        if questions_attempted > 0:
-            topic["mastery_score"] = round(topic["correct_answers"] / questions_attempted, 4)
-        else:
-            topic["mastery_score"] = 0.0
+        topic["mastery_score"] = self._mastery(topic)
             
         # Classification based on mastery
         # Unassessed: questions_attempted == 0
         # Weak: mastery < 0.40
         # Strong: mastery >= 0.40
+        # Status is derived in the same branch (for backward compatibility)
+        # Compared on the integer counters, so rounding can't move a topic across the threshold
         if questions_attempted == 0:
             topic["classification"] = "unassessed"
-        elif topic["mastery_score"] < 0.40:
+            topic["status"] = _STATUS_UNASSESSED
+        elif topic.get("correct_answers", 0) * 100 < _MASTERY_THRESHOLD_PCT * questions_attempted:
             topic["classification"] = "weak"
+            topic["status"] = _STATUS_WEAK
         else:
             topic["classification"] = "strong"
-            
-        # Status Derivation (for backward compatibility)
-        topic["status"] = self.get_status_label(topic["mastery_score"], questions_attempted)
+            topic["status"] = _STATUS_STRONG
+
+        # Swap this topic's old contribution to overall mastery for the new one
+        old = self._mastery_contrib.pop(topic_name, None)
+        if old is not None:
+            self._mastery_sum -= old
+            self._assessed_count -= 1
+        if questions_attempted > 0:
+            self._mastery_contrib[topic_name] = topic["mastery_score"]
+            self._mastery_sum += topic["mastery_score"]
+            self._assessed_count += 1
 
         # Update weak/strong areas with IDs based on classification
         topic_id = topic["topic_id"]
+        self._id_to_topic_key[topic_id] = topic_name
         if topic["classification"] == "strong":
-            if topic_id not in self.data["strong_areas"]:
-                self.data["strong_areas"].append(topic_id)
-            if topic_id in self.data["weak_areas"]:
-                self.data["weak_areas"].remove(topic_id)
+            self.data["strong_areas"].add(topic_id)
+            self.data["weak_areas"].discard(topic_id)
         elif topic["classification"] == "weak":
-            if topic_id not in self.data["weak_areas"]:
-                self.data["weak_areas"].append(topic_id)
-            if topic_id in self.data["strong_areas"]:
-                self.data["strong_areas"].remove(topic_id)
+            self.data["weak_areas"].add(topic_id)
+            self.data["strong_areas"].discard(topic_id)
         else:
             # Unassessed - remove from both weak and strong areas
-            if topic_id in self.data["strong_areas"]:
-                self.data["strong_areas"].remove(topic_id)
-            if topic_id in self.data["weak_areas"]:
-                self.data["weak_areas"].remove(topic_id)
+            self.data["strong_areas"].discard(topic_id)
+            self.data["weak_areas"].discard(topic_id)
+
+    @staticmethod
+    def _mastery(topic: dict):
+        """Topic mastery derived from its counters: correct / attempted, 0.0 when unassessed."""
+        attempted = topic.get("questions_attempted", 0)
+        if attempted:
+            return round(topic.get("correct_answers", 0) / attempted, 4)
+        return 0.0
+
+    @staticmethod
+    def _persisted_topic(topic: dict):
+        """Topic as written to disk, without the derived mastery_score."""
+        return {key: value for key, value in topic.items() if key != "mastery_score"}
 
     @staticmethod
     def get_status_label(mastery_score: float, attempted: int):
@@ -161,10 +418,8 @@ class UserProfile:
         - Strong: mastery_score >= 0.40
         """
         if attempted == 0:
-            return "Unassessed"
-        if mastery_score < 0.40:
-            return "Weak"
-        return "Strong"
+            return _STATUS_UNASSESSED
+        return _STATUS_WEAK if mastery_score < _MASTERY_THRESHOLD else _STATUS_STRONG
 
     def get_overall_mastery(self):
         """Calculate overall mastery dynamically.
@@ -175,120 +430,111 @@ class UserProfile:
         - Unassessed topics (questions_attempted == 0) are EXCLUDED
         - If no topics are assessed: overall_mastery = 0.0
         """
-        if not self.data["topics"]:
-            return 0.0
-        
-        # Only include assessed topics (questions_attempted > 0)
-        assessed_topics = [
-            t for t in self.data["topics"].values() 
-            if t.get("questions_attempted", 0) > 0
-        ]
-        
+        # Only assessed topics (questions_attempted > 0) are tracked in the totals
         # If no topics are assessed, return 0
-        if not assessed_topics:
+        if not self._assessed_count:
             return 0.0
         
-        total_mastery = sum(t["mastery_score"] for t in assessed_topics)
-        return round(total_mastery / len(assessed_topics), 4)
+        return round(self._mastery_sum / self._assessed_count, 4)
 
-    def save(self):
+    def save(self, force: bool = False):
+        """
+        Write the full profile and fold the delta log into it.
+        Inside a batch the write is deferred to the end of the batch unless force is set.
+        """
+        if self._batch_depth and not force:
+            self._needs_snapshot = True
+            return
+        self._write_snapshot()
+
+    def _write_snapshot(self):
         # Update session level mastery before saving
         self.data["mastery"] = self.get_overall_mastery()
         if self.data.get("created_at") is None:
-            import time
             self.data["created_at"] = time.time()
         os.makedirs(settings.USER_DATA_DIRECTORY, exist_ok=True)
-        with open(self.path, "w") as f:
-            json.dump(self.data, f, indent=4)
+        state = self.to_dict()
+        state["topics"] = {name: self._persisted_topic(t) for name, t in self.data["topics"].items()}
+        payload = orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        if len(payload) > COMPRESS_THRESHOLD:
+            payload = zstd.ZstdCompressor(level=3).compress(payload)
+            target, stale = self.zst_path, self.path
+        else:
+            target, stale = self.path, self.zst_path
+        # Write to a temp file and swap it in so a crash never leaves a torn profile
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+        if os.path.exists(stale):
+            os.remove(stale)
+        if os.path.exists(self.delta_path):
+            os.remove(self.delta_path)
+        self._delta_count = 0
+        self._pending_deltas = []
+        self._needs_snapshot = False
+        self._sync_cache_entry()
+
+    def to_dict(self):
+        """Profile data in its serializable form (area sets as sorted lists)."""
+        payload = dict(self.data)
+        for key in AREA_KEYS:
+            payload[key] = sorted(self.data.get(key) or ())
+        return payload
 
     def update(self, key, value):
         self.data[key] = value
-        self.save()
+        self._append_delta({"op": "update", "key": key, "value": value})
 
     def get(self, key):
         return self.data.get(key)
 
-    def get_weak_areas_with_metadata(self, max_display: int = 10):
-        """
-        Returns weak areas sorted by lowest mastery first, with metadata.
-        """
-        import time
-        
-        weak_areas_data = []
-        # Handle legacy topics without topic_id by using topic key as fallback
-        id_to_topic = {}
-        for topic_key, t in self.data["topics"].items():
-            topic_id = t.get("topic_id", topic_key)
-            id_to_topic[topic_id] = t
-        
-        for topic_id in self.data["weak_areas"]:
-            if topic_id in id_to_topic:
-                topic, topic_key = id_to_topic[topic_id]
-                mastery_pct = round(topic.get("mastery_score", 0) * 100)
-                last_assessed = topic.get("last_assessed")
-                
-                # Convert timestamp to readable format
-                if last_assessed:
-                    from datetime import datetime
-                    assessed_date = datetime.fromtimestamp(last_assessed).strftime("%b %d, %Y")
-                else:
-                    assessed_date = "Not yet assessed"
-                
-                weak_areas_data.append({
-                    "name": topic.get("name", topic_key),
-                    "mastery_pct": mastery_pct,
-                    "last_assessed": assessed_date,
-                    "parent_topic_id": topic.get("parent_topic_id")
-                })
+    def _areas_with_metadata(self, area_ids, date_field: str, highest_first: bool, max_display: int):
+        """Build the display list for a set of area topic IDs, sorted by mastery."""
+        topics = self.data["topics"]
+        # Walk topics in insertion order so ties keep a stable order
+        candidates = [
+            (round(topics[topic_key].get("mastery_score", 0) * 100), topics[topic_key], topic_key)
+            for topic_id, topic_key in self._id_to_topic_key.items()
+            if topic_id in area_ids
+        ]
         
-        # Sort by lowest mastery first
-        weak_areas_data.sort(key=lambda x: x["mastery_pct"])
+        # Only the displayed entries are sorted and formatted
+        select = heapq.nlargest if highest_first else heapq.nsmallest
+        displayed = []
+        for mastery_pct, topic, topic_key in select(max_display, candidates, key=lambda c: c[0]):
+            last_assessed = topic.get("last_assessed")
+            
+            # Convert timestamp to readable format
+            if last_assessed:
+                assessed_date = _format_day(date.fromtimestamp(last_assessed))
+            else:
+                assessed_date = "Not yet assessed"
+            
+            displayed.append({
+                "name": topic.get("name", topic_key),
+                "mastery_pct": mastery_pct,
+                date_field: assessed_date,
+                "parent_topic_id": topic.get("parent_topic_id")
+            })
         
-        # Separate full list and "more" count
-        displayed = weak_areas_data[:max_display]
-        more_count = len(weak_areas_data) - max_display if len(weak_areas_data) > max_display else 0
+        more_count = len(candidates) - max_display if len(candidates) > max_display else 0
         
         return {"areas": displayed, "more_count": more_count}
 
+    def get_weak_areas_with_metadata(self, max_display: int = 10):
+        """
+        Returns weak areas sorted by lowest mastery first, with metadata.
+        """
+        return self._areas_with_metadata(self.data["weak_areas"], "last_assessed", False, max_display)
+
     def get_strong_areas_with_metadata(self, max_display: int = 10):
         """
         Returns strong areas sorted by highest mastery first, with metadata.
         """
-        strong_areas_data = []
-        # Handle legacy topics without topic_id by using topic key as fallback
-        id_to_topic = {}
-        for topic_key, t in self.data["topics"].items():
-            topic_id = t.get("topic_id", topic_key)
-            id_to_topic[topic_id] = (t, topic_key)  # Store tuple with topic_key for name fallback
-        
-        for topic_id in self.data["strong_areas"]:
-            if topic_id in id_to_topic:
-                topic, topic_key = id_to_topic[topic_id]
-                mastery_pct = round(topic.get("mastery_score", 0) * 100)
-                last_assessed = topic.get("last_assessed")
-                
-                # Convert timestamp to readable format
-                if last_assessed:
-                    from datetime import datetime
-                    assessed_date = datetime.fromtimestamp(last_assessed).strftime("%b %d, %Y")
-                else:
-                    assessed_date = "Not yet assessed"
-                
-                strong_areas_data.append({
-                    "name": topic.get("name", topic_key),
-                    "mastery_pct": mastery_pct,
-                    "mastery_achieved": assessed_date,
-                    "parent_topic_id": topic.get("parent_topic_id")
-                })
-        
-        # Sort by highest mastery first
-        strong_areas_data.sort(key=lambda x: x["mastery_pct"], reverse=True)
-        
-        # Separate full list and "more" count
-        displayed = strong_areas_data[:max_display]
-        more_count = len(strong_areas_data) - max_display if len(strong_areas_data) > max_display else 0
-        
-        return {"areas": displayed, "more_count": more_count}
+        return self._areas_with_metadata(self.data["strong_areas"], "mastery_achieved", True, max_display)
 
     def to_frontend_format(self):
         """Convert profile to frontend format - topic-centric, no sessions."""
@@ -298,14 +544,11 @@ class UserProfile:
         all_topics = list(self.data.get("topics", {}).keys())
         
         # Map IDs back to names for frontend
-        id_to_name = {}
-        for topic_key, t in self.data["topics"].items():
-            topic_id = t.get("topic_id", topic_key)
-            topic_name = t.get("name", topic_key)
-            id_to_name[topic_id] = topic_name
-        
-        strong = [id_to_name[tid] for tid in self.data["strong_areas"] if tid in id_to_name]
-        weak = [id_to_name[tid] for tid in self.data["weak_areas"] if tid in id_to_name]
+        topics = self.data["topics"]
+        strong_ids = self.data["strong_areas"]
+        weak_ids = self.data["weak_areas"]
+        strong = [topics[key].get("name", key) for tid, key in self._id_to_topic_key.items() if tid in strong_ids]
+        weak = [topics[key].get("name", key) for tid, key in self._id_to_topic_key.items() if tid in weak_ids]
         
         # Calculate overall knowledge level
         knowledge_level = self.get_status_label(m, len(self.data["topics"]))
@@ -323,3 +566,27 @@ class UserProfile:
             "mode": self.data.get("mode", "idle"),
             "assessment_state": self.data.get("assessment_state")
         }
+
+
+def get_user_profile(user_id: str) -> UserProfile:
+    """
+    Get the profile for a user, reusing a cached instance while its files are unchanged.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        UserProfile shared by callers within PROFILE_CACHE_TTL seconds
+    """
+    with _PROFILE_CACHE_LOCK:
+        entry = _PROFILE_CACHE.get(user_id)
+    if entry is not None:
+        cached_at, signature, profile = entry
+        if time.time() - cached_at < PROFILE_CACHE_TTL and signature == profile._disk_signature():
+            return profile
+    
+    profile = UserProfile(user_id)
+    with _PROFILE_CACHE_LOCK:
+        _PROFILE_CACHE[user_id] = (time.time(), profile._disk_signature(), profile)
+    return profile
+
@@ -1,16 +1,51 @@
-import json
+import asyncio
+import bisect
+import hashlib
+import itertools
+import random
 import re
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
+import orjson
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
 from backend.app.llm.ollama_client import get_ollama_client, invoke_with_retry, OllamaClientManager
+from backend.app.llm.response_cache import invoke_with_cache
 from backend.app.llm.prompts import (
     MCQ_GENERATION_PROMPT, MCQ_EVALUATION_PROMPT, QNA_EVALUATION_PROMPT, QNA_GENERATION_PROMPT
 )
-from backend.app.vectorstore.retriever import retrieve_context
+from backend.app.vectorstore.retriever import aretrieve_context
 from backend.app.utils.logger import logger
+from backend.app.memory.user_profile import get_user_profile
 from backend.app.services.mastery_service import MasteryService
+from backend.app.cache.question_cache import get_question_cache
 from backend.app.config import settings
 
+# MCQ evaluation runs at temperature 0, so its feedback text is a pure function of
+# (question, correct answer, user answer). Least recently used entries are evicted first.
+MCQ_EVAL_CACHE_SIZE = 4096
+_MCQ_EVAL_CACHE: Dict[str, Dict[str, Any]] = {}
+
+# Random character patterns (e.g., "asdf", "qwerty", "zxcv")
+_GIBBERISH_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'^[asdfghjklqwertyuiopzxcvbnm]{3,}$',  # keyboard mashing
+        r'^[a-z]{1,3}(\s+[a-z]{1,3}){0,5}$',  # random short letter groups
+        r'^[^a-zA-Z]*$',  # no letters at all
+        r'^(.{1,2})\1{2,}$',  # repeated short patterns like "ababab"
+    )
+]
+_WORD_RE = re.compile(r'[a-zA-Z]{3,}')
+# Deletes every non-alphabetic Latin-1 character, so len() of the result counts letters
+_NON_ALPHA_TABLE = str.maketrans('', '', ''.join(chr(i) for i in range(256) if not chr(i).isalpha()))
+_GIBBERISH_WORDS = frozenset({'asdf', 'qwerty', 'zxcv', 'aaa', 'bbb', 'ccc', 'xxx', 'yyy', 'zzz', 'test', 'testing123'})
+
+# JSON recovery patterns for LLM responses
+_CODE_BLOCK_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL)
+_TRAILING_COMMA_OBJECT_RE = re.compile(r',\s*}')
+_TRAILING_COMMA_ARRAY_RE = re.compile(r',\s*]')
+
 
 def is_gibberish_answer(answer: str) -> bool:
     """
@@ -27,55 +62,116 @@ def is_gibberish_answer(answer: str) -> bool:
         return True
     
     # Check if mostly non-alphabetic characters
-    alpha_chars = sum(1 for c in cleaned if c.isalpha())
+    if cleaned.isascii():
+        alpha_chars = len(cleaned.translate(_NON_ALPHA_TABLE))
+    else:
+        # The table only covers Latin-1; count other scripts per character
+        alpha_chars = sum(1 for c in cleaned if c.isalpha())
     if len(cleaned) > 0 and alpha_chars / len(cleaned) < 0.5:
         return True
     
     # Check for random character patterns (e.g., "asdf", "qwerty", "zxcv")
-    gibberish_patterns = [
-        r'^[asdfghjklqwertyuiopzxcvbnm]{3,}$',  # keyboard mashing
-        r'^[a-z]{1,3}(\s+[a-z]{1,3}){0,5}$',  # random short letter groups
-        r'^[^a-zA-Z]*$',  # no letters at all
-        r'^(.{1,2})\1{2,}$',  # repeated short patterns like "ababab"
-    ]
-    
     lower_cleaned = cleaned.lower()
-    for pattern in gibberish_patterns:
-        if re.match(pattern, lower_cleaned, re.IGNORECASE):
-            return True
+    if any(pattern.match(lower_cleaned) for pattern in _GIBBERISH_PATTERNS):
+        return True
     
     # Check if it contains at least one meaningful word (3+ letters)
-    words = re.findall(r'[a-zA-Z]{3,}', cleaned)
+    words = _WORD_RE.findall(cleaned)
     if len(words) == 0:
         return True
     
     # Check for common gibberish words
-    gibberish_words = {'asdf', 'qwerty', 'zxcv', 'aaa', 'bbb', 'ccc', 'xxx', 'yyy', 'zzz', 'test', 'testing123'}
-    if all(word.lower() in gibberish_words for word in words):
+    if all(word.lower() in _GIBBERISH_WORDS for word in words):
         return True
     
     return False
 
 
+# Mastery lower bounds for each question difficulty after "beginner"
+_DIFFICULTY_THRESHOLDS = (0.4, 0.7, 0.9)
+_DIFFICULTY_LABELS = ("beginner", "developing", "proficient", "mastery")
+
+
+def _difficulty(mastery: float) -> str:
+    """Map a mastery score to the question difficulty label."""
+    return _DIFFICULTY_LABELS[bisect.bisect_right(_DIFFICULTY_THRESHOLDS, mastery)]
+
+
+# Fallback MCQ templates used when generation fails; the correct option is listed first
+_FALLBACK_MCQ_TEMPLATES = [
+    ("Which of the following best describes {topic}?", (
+        "A core concept that involves processing and analysis",
+        "An unrelated field of study",
+        "A type of physical hardware",
+        "A mathematical constant",
+    )),
+    ("What is a key characteristic of {topic}?", (
+        "It requires understanding of fundamental principles",
+        "It only applies to biological systems",
+        "It was invented in the 18th century",
+        "It has no practical applications",
+    )),
+    ("Why is {topic} important?", (
+        "It helps solve real-world problems",
+        "It is only useful for entertainment",
+        "It has been proven obsolete",
+        "It only works on Tuesdays",
+    )),
+    ("In what context would you use {topic}?", (
+        "When solving problems in this domain",
+        "Only when cooking",
+        "Never - it's purely theoretical",
+        "Only during solar eclipses",
+    )),
+    ("What is NOT true about {topic}?", (
+        "It has no connection to technology",
+        "It can be applied practically",
+        "It involves systematic approaches",
+        "It requires knowledge and skills",
+    )),
+]
+_OPTION_KEYS = "ABCD"
+
+
+def _option_orders(option_texts):
+    """Every ordering of a template's options as (options dict, correct key) pairs."""
+    return [
+        (dict(zip(_OPTION_KEYS, (option_texts[i] for i in order))), _OPTION_KEYS[order.index(0)])
+        for order in itertools.permutations(range(len(option_texts)))
+    ]
+
+
+# (question template, option orders) per fallback template
+_FALLBACK_MCQ_VARIANTS = [
+    (question, _option_orders(option_texts)) for question, option_texts in _FALLBACK_MCQ_TEMPLATES
+]
+
+
 class AssessmentService:
     def __init__(self):
         self.json_parser = JsonOutputParser()
+        # Prompt templates are constants; parse them once
+        self._mcq_gen_tpl = PromptTemplate.from_template(MCQ_GENERATION_PROMPT)
+        self._mcq_eval_tpl = PromptTemplate.from_template(MCQ_EVALUATION_PROMPT)
+        self._qna_gen_tpl = PromptTemplate.from_template(QNA_GENERATION_PROMPT)
+        self._qna_eval_tpl = PromptTemplate.from_template(QNA_EVALUATION_PROMPT)
 
     async def generate_mcq(self, user_id: str, topic: str, mastery: float) -> Dict[str, Any]:
         """Generate MCQ - topic-centric model, no sessions."""
-        import random
-        import time
+        difficulty = _difficulty(mastery)
+        
+        profile = get_user_profile(user_id)
         
-        difficulty = "beginner"
-        if mastery >= 0.9: difficulty = "mastery"
-        elif mastery >= 0.7: difficulty = "proficient"
-        elif mastery >= 0.4: difficulty = "developing"
+        # Serve an unseen question from the shared pool once it is full
+        question_cache = get_question_cache()
+        cache_namespace = question_cache.namespace("mcq", topic, difficulty)
+        cached = question_cache.get(cache_namespace, user_id)
+        if cached is not None:
+            return self._store_mcq_challenge(profile, topic, cached)
         
-        context = retrieve_context(topic)
+        context = await aretrieve_context(topic)
         
         # Get question count for this topic to ensure variety
-        from backend.app.memory.user_profile import UserProfile
-        profile = UserProfile(user_id)
         topic_data = profile.data.get("topics", {}).get(topic, {})
         question_num = topic_data.get("questions_attempted", 0) + 1
         
@@ -96,172 +192,132 @@ class AssessmentService:
         seed = int(time.time() * 1000) % 10000
         
         # Try up to 3 times with increasingly simple prompts
-        for attempt in range(3):
+        attempt_args = (topic, difficulty, mastery, context, question_num, question_type, seed)
+        data = None
+        if settings.OLLAMA_PARALLEL_ATTEMPTS:
+            # Run all attempts at once and keep the first valid question
+            tasks = [asyncio.create_task(self._attempt_mcq(attempt, *attempt_args)) for attempt in range(3)]
             try:
-                from langchain_core.prompts import PromptTemplate
-                
-                # Use quality-focused model for generation
-                llm = get_ollama_client(task_type="mcq_generation")
-                
-                if attempt == 0:
-                    # First attempt: use main prompt with variety hints
-                    prompt_template = PromptTemplate.from_template(MCQ_GENERATION_PROMPT)
-                    prompt = prompt_template.format(
-                        topic=topic,
-                        difficulty=difficulty,
-                        mastery=mastery,
-                        context=context
-                    )
-                    # Add variety instruction
-                    prompt += f"\n\nIMPORTANT: This is question #{question_num} about {topic}. Focus on: {question_type}. Generate a UNIQUE question different from basic definitions. Random seed: {seed}"
-                elif attempt == 1:
-                    # Second attempt: simpler prompt with specific focus
-                    prompt = f"""Create a multiple choice question about {topic}, focusing on {question_type}.
-This is question #{question_num}, so make it DIFFERENT from previous questions.
-
-Return ONLY valid JSON (no markdown, no explanation):
-{{"question": "Your unique question about {topic}?", "options": {{"A": "first option", "B": "second option", "C": "third option", "D": "fourth option"}}, "correct_answer": "A", "explanation": "why correct"}}"""
-                else:
-                    # Third attempt: most basic prompt
-                    aspects = ["definition", "usage", "example", "benefit", "limitation"]
-                    aspect = random.choice(aspects)
-                    prompt = f'Create a {aspect} question about {topic}. Return JSON only: {{"question": "...", "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "correct_answer": "A", "explanation": "..."}}'
-                
-                # Invoke with retry logic
-                response_content = await invoke_with_retry(llm, prompt, max_retries=1)
-                logger.info(f"MCQ attempt {attempt + 1} raw response: {response_content[:200]}...")
-                
-                data = self._parse_json_response(response_content, f"MCQ generation attempt {attempt + 1}")
-                
-                # Validate required fields exist
-                required_fields = ["question", "options", "correct_answer"]
-                if not data or "error" in data or not all(field in data for field in required_fields):
-                    logger.warning(f"MCQ attempt {attempt + 1} invalid: missing fields")
-                    continue
-                
-                # Validate options structure
-                if not isinstance(data.get("options"), dict) or len(data["options"]) < 4:
-                    logger.warning(f"MCQ attempt {attempt + 1} invalid: bad options")
-                    continue
-                
-                # Success! Store correct answer in profile and remove from response
-                if "active_challenges" not in profile.data:
-                    profile.data["active_challenges"] = {}
-                
-                challenge_id = f"mcq_{topic}"
-                profile.data["active_challenges"][challenge_id] = {
-                    "question": data["question"],
-                    "correct_answer": data["correct_answer"],
-                    "explanation": data.get("explanation", "")
-                }
-                profile.save()
-                
-                # Remove sensitive data before returning to client
-                del data["correct_answer"]
-                if "explanation" in data:
-                    del data["explanation"]
-                    
-                return data
-                
-            except Exception as e:
-                logger.warning(f"MCQ Generation attempt {attempt + 1} failed: {e}")
-                continue
+                for next_done in asyncio.as_completed(tasks):
+                    data = await next_done
+                    if data:
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+        else:
+            for attempt in range(3):
+                data = await self._attempt_mcq(attempt, *attempt_args)
+                if data:
+                    break
+        
+        if data:
+            # Success! Pool the question, then store the answer in the profile
+            question_cache.add(cache_namespace, data, user_id)
+            return self._store_mcq_challenge(profile, topic, data)
         
         # All attempts failed - use fallback question
         logger.error(f"All MCQ generation attempts failed for {topic}, using fallback")
         return self._generate_fallback_mcq(user_id, topic, question_num)
     
+    async def _attempt_mcq(
+        self, attempt: int, topic: str, difficulty: str, mastery: float, context: str,
+        question_num: int, question_type: str, seed: int
+    ) -> Optional[Dict[str, Any]]:
+        """Run one MCQ generation attempt; returns the validated question or None."""
+        try:
+            # Use quality-focused model for generation
+            llm = get_ollama_client(task_type="mcq_generation")
+            
+            if attempt == 0:
+                # First attempt: use main prompt with variety hints
+                prompt = self._mcq_gen_tpl.format(
+                    topic=topic,
+                    difficulty=difficulty,
+                    mastery=mastery,
+                    context=context
+                )
+                # Add variety instruction
+                prompt += f"\n\nIMPORTANT: This is question #{question_num} about {topic}. Focus on: {question_type}. Generate a UNIQUE question different from basic definitions. Random seed: {seed}"
+            elif attempt == 1:
+                # Second attempt: simpler prompt with specific focus
+                prompt = f"""Create a multiple choice question about {topic}, focusing on {question_type}.
+This is question #{question_num}, so make it DIFFERENT from previous questions.
+
+Return ONLY valid JSON (no markdown, no explanation):
+{{"question": "Your unique question about {topic}?", "options": {{"A": "first option", "B": "second option", "C": "third option", "D": "fourth option"}}, "correct_answer": "A", "explanation": "why correct"}}"""
+            else:
+                # Third attempt: most basic prompt
+                aspects = ["definition", "usage", "example", "benefit", "limitation"]
+                aspect = random.choice(aspects)
+                prompt = f'Create a {aspect} question about {topic}. Return JSON only: {{"question": "...", "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "correct_answer": "A", "explanation": "..."}}'
+            
+            # Invoke with retry logic
+            response_content = await invoke_with_retry(llm, prompt, max_retries=1, timeout=OllamaClientManager.get_timeout_for_task("mcq_generation"))
+            logger.info(f"MCQ attempt {attempt + 1} raw response: {response_content[:200]}...")
+            
+            data = self._parse_json_response(response_content, f"MCQ generation attempt {attempt + 1}")
+            
+            # Validate required fields exist
+            required_fields = ["question", "options", "correct_answer"]
+            if not data or "error" in data or not all(field in data for field in required_fields):
+                logger.warning(f"MCQ attempt {attempt + 1} invalid: missing fields")
+                return None
+            
+            # Validate options structure
+            if not isinstance(data.get("options"), dict) or len(data["options"]) < 4:
+                logger.warning(f"MCQ attempt {attempt + 1} invalid: bad options")
+                return None
+            
+            return data
+            
+        except Exception as e:
+            logger.warning(f"MCQ Generation attempt {attempt + 1} failed: {e}")
+            return None
+    
+    def _store_mcq_challenge(self, profile, topic: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Store an MCQ's answer as the topic's active challenge and return the client copy."""
+        challenge_id = f"mcq_{topic}"
+        challenge = {
+            "question": data["question"],
+            "correct_answer": data["correct_answer"],
+            "explanation": data.get("explanation", "")
+        }
+        # Correctness is an exact match, so feedback for both outcomes can be
+        # written now and submission needs no evaluation LLM call
+        explanation = challenge["explanation"].strip()
+        if explanation:
+            challenge["feedback_correct"] = f"Correct! {explanation}"
+            challenge["feedback_incorrect"] = f"The correct answer is '{data['correct_answer']}'. {explanation}"
+        profile.set_active_challenge(challenge_id, challenge)
+        
+        # Remove sensitive data before returning to client
+        data = dict(data)
+        del data["correct_answer"]
+        if "explanation" in data:
+            del data["explanation"]
+            
+        return data
+    
     def _generate_fallback_mcq(self, user_id: str, topic: str, question_num: int = 1) -> Dict[str, Any]:
         """Generate a fallback MCQ when LLM fails."""
-        import random
-        from backend.app.memory.user_profile import UserProfile
-        
-        # Different fallback question templates for variety
-        templates = [
-            {
-                "question": f"Which of the following best describes {topic}?",
-                "options": {
-                    "A": f"A core concept that involves processing and analysis",
-                    "B": f"An unrelated field of study",
-                    "C": f"A type of physical hardware",
-                    "D": f"A mathematical constant"
-                },
-                "correct": "A"
-            },
-            {
-                "question": f"What is a key characteristic of {topic}?",
-                "options": {
-                    "A": f"It requires understanding of fundamental principles",
-                    "B": f"It only applies to biological systems",
-                    "C": f"It was invented in the 18th century",
-                    "D": f"It has no practical applications"
-                },
-                "correct": "A"
-            },
-            {
-                "question": f"Why is {topic} important?",
-                "options": {
-                    "A": f"It helps solve real-world problems",
-                    "B": f"It is only useful for entertainment",
-                    "C": f"It has been proven obsolete",
-                    "D": f"It only works on Tuesdays"
-                },
-                "correct": "A"
-            },
-            {
-                "question": f"In what context would you use {topic}?",
-                "options": {
-                    "A": f"When solving problems in this domain",
-                    "B": f"Only when cooking",
-                    "C": f"Never - it's purely theoretical",
-                    "D": f"Only during solar eclipses"
-                },
-                "correct": "A"
-            },
-            {
-                "question": f"What is NOT true about {topic}?",
-                "options": {
-                    "A": f"It has no connection to technology",
-                    "B": f"It can be applied practically",
-                    "C": f"It involves systematic approaches",
-                    "D": f"It requires knowledge and skills"
-                },
-                "correct": "A"
-            }
-        ]
-        
-        # Select based on question number to ensure variety
-        template = templates[(question_num - 1) % len(templates)]
-        
-        # Shuffle options for additional variety
-        options_list = list(template["options"].items())
-        correct_text = template["options"][template["correct"]]
-        random.shuffle(options_list)
         
-        # Rebuild options and find new correct answer key
-        new_options = {}
-        new_correct = "A"
-        for i, (_, text) in enumerate(options_list):
-            key = chr(65 + i)  # A, B, C, D
-            new_options[key] = text
-            if text == correct_text:
-                new_correct = key
+        # Select based on question number to ensure variety, and pick one of the
+        # precomputed option orders for additional variety
+        question_template, variants = _FALLBACK_MCQ_VARIANTS[(question_num - 1) % len(_FALLBACK_MCQ_VARIANTS)]
+        options, new_correct = random.choice(variants)
+        new_options = dict(options)
         
-        question = template["question"]
+        question = question_template.format(topic=topic)
         explanation = f"This is a fundamental aspect of {topic} that you should understand."
         
         # Store in profile
-        profile = UserProfile(user_id)
-        if "active_challenges" not in profile.data:
-            profile.data["active_challenges"] = {}
-        
-        challenge_id = f"mcq_{topic}"
-        profile.data["active_challenges"][challenge_id] = {
+        profile = get_user_profile(user_id)
+        profile.set_active_challenge(f"mcq_{topic}", {
             "question": question,
             "correct_answer": new_correct,
             "explanation": explanation
-        }
-        profile.save()
+        })
         
         return {
             "question": question,
@@ -284,8 +340,7 @@ Return ONLY valid JSON (no markdown, no explanation):
         
         FAILURE RULE: If evaluation fails, return error - no silent behavior allowed.
         """
-        from backend.app.memory.user_profile import UserProfile
-        profile = UserProfile(user_id)
+        profile = get_user_profile(user_id)
         challenge_id = f"mcq_{topic}"
         challenge = profile.data.get("active_challenges", {}).get(challenge_id)
         
@@ -300,7 +355,9 @@ Return ONLY valid JSON (no markdown, no explanation):
             }
         
         try:
-            evaluation = await self.evaluate_mcq(challenge["question"], challenge["correct_answer"], user_answer)
+            evaluation = self._evaluate_mcq_precomputed(challenge, user_answer)
+            if evaluation is None:
+                evaluation = await self.evaluate_mcq(challenge["question"], challenge["correct_answer"], user_answer)
         except Exception as e:
             logger.error(f"MCQ evaluation failed: {e}")
             return {
@@ -329,11 +386,11 @@ Return ONLY valid JSON (no markdown, no explanation):
             evaluation["correct_explanation"] = f"The correct answer is {challenge['correct_answer']}. {challenge.get('explanation', 'Review the concept to understand why.')}"
             
         # MANDATORY: Update mastery (this increments questions_attempted and correct_answers)
-        MasteryService.update_after_mcq(user_id, topic, is_correct)
-        
-        # MANDATORY: Get updated mastery and classification for frontend
-        updated_profile = UserProfile(user_id)
-        topic_data = updated_profile.get_topic(topic)
+        # The updated topic carries the new mastery and classification for the frontend.
+        # The mastery update and challenge cleanup reach disk in one write.
+        with profile:
+            topic_data = MasteryService.update_after_mcq(user_id, topic, is_correct, profile=profile)
+            profile.clear_active_challenge(challenge_id)
         
         # MANDATORY: Include all required fields for frontend update
         evaluation["mastery_score"] = topic_data["mastery_score"]
@@ -343,12 +400,33 @@ Return ONLY valid JSON (no markdown, no explanation):
         evaluation["correct_answers"] = topic_data["correct_answers"]
         evaluation["explanation_provided"] = True  # Flag to confirm explanation was given
         
-        # Cleanup challenge
-        del profile.data["active_challenges"][challenge_id]
-        profile.save()
-        
         return evaluation
 
+    def _evaluate_mcq_precomputed(self, challenge: Dict[str, Any], user_answer: str) -> Optional[Dict[str, Any]]:
+        """Evaluate an MCQ answer with the feedback stored at generation time.
+        
+        Returns:
+            Evaluation dict, or None if the challenge has no stored feedback
+            (legacy challenges) or the answer is empty
+        """
+        if "feedback_correct" not in challenge or not user_answer or not user_answer.strip():
+            return None
+        
+        selected = user_answer.strip().upper()
+        correct_answer = challenge["correct_answer"]
+        is_correct = selected == correct_answer.strip().upper()
+        if is_correct:
+            feedback = challenge["feedback_correct"]
+        else:
+            feedback = f"Incorrect. You answered '{selected}'. {challenge['feedback_incorrect']}"
+        return {
+            "is_correct": is_correct,
+            "result": "correct" if is_correct else "incorrect",
+            "marks": 1 if is_correct else 0,
+            "feedback": feedback,
+            "correct_explanation": f"The correct answer is {correct_answer}. {challenge['explanation']}"
+        }
+
     async def evaluate_mcq(self, question: str, correct_answer: str, user_answer: str) -> Dict[str, Any]:
         """Evaluate MCQ answer with MANDATORY explanation guarantee.
         
@@ -373,23 +451,40 @@ Return ONLY valid JSON (no markdown, no explanation):
         # Rule: Exact string match for answer key
         is_correct_match = user_answer.strip().upper() == correct_answer.strip().upper()
         
+        cache_key = hashlib.blake2b(
+            f"{question}|{correct_answer}|{user_answer.strip().upper()}".encode("utf-8")
+        ).hexdigest()
+        cached = _MCQ_EVAL_CACHE.pop(cache_key, None)
+        if cached is not None:
+            # Re-insert to mark as most recently used
+            _MCQ_EVAL_CACHE[cache_key] = cached
+            evaluation = dict(cached)
+            evaluation["is_correct"] = is_correct_match
+            evaluation["marks"] = 1 if is_correct_match else 0
+            evaluation["result"] = "correct" if is_correct_match else "incorrect"
+            return evaluation
+        
         try:
-            from langchain_core.prompts import PromptTemplate
-            
             # Use fast model for MCQ evaluation
             llm = get_ollama_client(task_type="mcq_eval", temperature=0.0)
             
-            prompt_template = PromptTemplate.from_template(MCQ_EVALUATION_PROMPT)
-            prompt = prompt_template.format(
+            prompt = self._mcq_eval_tpl.format(
                 question=question,
                 correct_answer=correct_answer,
                 user_answer=user_answer
             )
             
             # Invoke with retry logic
-            response_content = await invoke_with_retry(llm, prompt, max_retries=2)
+            response_content = await invoke_with_retry(llm, prompt, max_retries=2, timeout=OllamaClientManager.get_timeout_for_task("mcq_eval"))
             evaluation = self._parse_json_response(response_content, "MCQ evaluation")
             
+            # Only the explanation text is cached - correctness is always decided by exact match
+            cacheable = {k: evaluation[k] for k in ("feedback", "correct_explanation") if evaluation.get(k)}
+            if cacheable:
+                if len(_MCQ_EVAL_CACHE) >= MCQ_EVAL_CACHE_SIZE:
+                    del _MCQ_EVAL_CACHE[next(iter(_MCQ_EVAL_CACHE))]
+                _MCQ_EVAL_CACHE[cache_key] = cacheable
+            
             # Enforce exact match rule over LLM opinion if they differ
             if is_correct_match:
                 evaluation["is_correct"] = True
@@ -441,21 +536,22 @@ Return ONLY valid JSON (no markdown, no explanation):
 
     async def generate_qna(self, user_id: str, topic: str, mastery: float, length: str = "medium") -> Dict[str, Any]:
         """Generate QnA - topic-centric model, no sessions."""
-        difficulty = "beginner"
-        if mastery >= 0.9: difficulty = "mastery"
-        elif mastery >= 0.7: difficulty = "proficient"
-        elif mastery >= 0.4: difficulty = "developing"
+        difficulty = _difficulty(mastery)
         
-        context = retrieve_context(topic)
+        # Serve an unseen question from the shared pool once it is full
+        question_cache = get_question_cache()
+        cache_namespace = question_cache.namespace("qna", topic, difficulty, length)
+        cached = question_cache.get(cache_namespace, user_id)
+        if cached is not None:
+            return self._store_qna_challenge(user_id, topic, cached, length)
+        
+        context = await aretrieve_context(topic)
         
         try:
-            from langchain_core.prompts import PromptTemplate
-            
             # Use quality-focused model for generation
             llm = get_ollama_client(task_type="qna_generation")
             
-            prompt_template = PromptTemplate.from_template(QNA_GENERATION_PROMPT)
-            prompt = prompt_template.format(
+            prompt = self._qna_gen_tpl.format(
                 topic=topic,
                 difficulty=difficulty,
                 mastery=mastery,
@@ -464,30 +560,15 @@ Return ONLY valid JSON (no markdown, no explanation):
             )
             
             # Invoke with retry logic
-            response_content = await invoke_with_retry(llm, prompt)
+            response_content = await invoke_with_retry(llm, prompt, timeout=OllamaClientManager.get_timeout_for_task("qna_generation"))
             data = self._parse_json_response(response_content, "QnA generation")
             
             if not data:
                 raise ValueError("Invalid QnA response structure")
 
-            # Store challenge for evaluation
-            from backend.app.memory.user_profile import UserProfile
-            profile = UserProfile(user_id)
-            if "active_challenges" not in profile.data:
-                profile.data["active_challenges"] = {}
-                
-            challenge_id = f"qna_{topic}"
-            profile.data["active_challenges"][challenge_id] = {
-                "question": data["question"],
-                "length": data.get("length", length)
-            }
-            profile.save()
-
-            # Remove expected points if they exist to avoid revealing too much
-            if "expected_points" in data:
-                del data["expected_points"]
-                
-            return data
+            result = self._store_qna_challenge(user_id, topic, data, length)
+            question_cache.add(cache_namespace, data, user_id)
+            return result
         except TimeoutError:
             logger.error(f"QnA Generation timeout for {topic}")
             return {
@@ -507,6 +588,21 @@ Return ONLY valid JSON (no markdown, no explanation):
                 "error": str(e)
             }
 
+    def _store_qna_challenge(self, user_id: str, topic: str, data: Dict[str, Any], length: str) -> Dict[str, Any]:
+        """Store a QnA question as the topic's active challenge and return the client copy."""
+        profile = get_user_profile(user_id)
+        profile.set_active_challenge(f"qna_{topic}", {
+            "question": data["question"],
+            "length": data.get("length", length)
+        })
+
+        # Remove expected points if they exist to avoid revealing too much
+        data = dict(data)
+        if "expected_points" in data:
+            del data["expected_points"]
+            
+        return data
+
     async def submit_qna_answer(self, user_id: str, topic: str, user_answer: str) -> Dict[str, Any]:
         """Submit QnA answer - topic-centric model, no sessions.
         
@@ -524,8 +620,7 @@ Return ONLY valid JSON (no markdown, no explanation):
         
         FAILURE RULE: If evaluation fails, return error - no silent behavior.
         """
-        from backend.app.memory.user_profile import UserProfile
-        profile = UserProfile(user_id)
+        profile = get_user_profile(user_id)
         challenge_id = f"qna_{topic}"
         challenge = profile.data.get("active_challenges", {}).get(challenge_id)
 
@@ -538,9 +633,6 @@ Return ONLY valid JSON (no markdown, no explanation):
                 "evaluation_error": True
             }
 
-        # Get context for correct answer explanation
-        context = retrieve_context(topic)
-        
         # RULE 1: Empty answer = INCORRECT (0 points)
         if not user_answer or user_answer.strip() == "":
             evaluation = {
@@ -570,15 +662,18 @@ Return ONLY valid JSON (no markdown, no explanation):
         else:
             # RULE 3: Evaluate meaningful answers using rubric
             evaluation = await self.evaluate_qna(topic, challenge["question"], user_answer, challenge.get("length", "medium"))
+            if evaluation.get("evaluation_error"):
+                # FAILURE RULE: no grade, no mastery change; the challenge stays active for a retry
+                return evaluation
         
         total_marks = evaluation.get("total_marks", 0)
         
         # MANDATORY: Update mastery (increments questions_attempted, conditionally correct_answers)
-        MasteryService.update_after_qna(user_id, topic, total_marks)
-        
-        # MANDATORY: Get updated mastery and classification for immediate frontend update
-        updated_profile = UserProfile(user_id)
-        topic_data = updated_profile.get_topic(topic)
+        # The updated topic carries the new mastery and classification for immediate frontend update.
+        # The mastery update and challenge cleanup reach disk in one write.
+        with profile:
+            topic_data = MasteryService.update_after_qna(user_id, topic, total_marks, profile=profile)
+            profile.clear_active_challenge(challenge_id)
         
         # MANDATORY: Include all required fields for frontend
         evaluation["mastery_score"] = topic_data["mastery_score"]
@@ -587,33 +682,17 @@ Return ONLY valid JSON (no markdown, no explanation):
         evaluation["questions_attempted"] = topic_data["questions_attempted"]
         evaluation["correct_answers"] = topic_data["correct_answers"]
         evaluation["explanation_provided"] = True  # Flag to confirm explanation was given
-        
-        # GUARANTEE: Ensure explanation is always present
-        if not evaluation.get("feedback"):
-            if total_marks >= 4:
-                evaluation["feedback"] = "Your answer demonstrates understanding of the core concepts."
-            else:
-                evaluation["feedback"] = f"Your answer needs improvement. Review the topic '{topic}' to better understand the key concepts."
-        
-        if not evaluation.get("correct_explanation"):
-            evaluation["correct_explanation"] = f"A complete answer should address the question: {challenge['question']}. Include the core concept, relevant explanation, and examples where appropriate."
-
-        # Cleanup challenge
-        del profile.data["active_challenges"][challenge_id]
-        profile.save()
 
         return evaluation
 
     async def evaluate_qna(self, topic: str, question: str, user_answer: str, length: str = "medium") -> Dict[str, Any]:
-        context = retrieve_context(topic)
+        context = await aretrieve_context(topic)
         try:
-            from langchain_core.prompts import PromptTemplate
+            # Use balanced model for QnA evaluation; deterministic so the same answer
+            # always gets the same grade and repeats come from the response cache
+            llm = get_ollama_client(task_type="qna_eval", temperature=0.0)
             
-            # Use balanced model for QnA evaluation
-            llm = get_ollama_client(task_type="qna_eval", temperature=0.3)
-            
-            prompt_template = PromptTemplate.from_template(QNA_EVALUATION_PROMPT)
-            prompt = prompt_template.format(
+            prompt = self._qna_eval_tpl.format(
                 topic=topic,
                 question=question,
                 context=context,
@@ -622,7 +701,7 @@ Return ONLY valid JSON (no markdown, no explanation):
             )
             
             # Invoke with retry logic
-            response_content = await invoke_with_retry(llm, prompt)
+            response_content = await invoke_with_cache(llm, prompt, timeout=OllamaClientManager.get_timeout_for_task("qna_eval"))
             evaluation = self._parse_json_response(response_content, "QnA evaluation")
             
             # MANDATORY: Enforce result classification based on score
@@ -633,19 +712,28 @@ Return ONLY valid JSON (no markdown, no explanation):
             else:
                 evaluation["result"] = "incorrect"
             
+            # GUARANTEE: The single evaluation call carries the explanation; fill
+            # in the fields only if the model left them out
+            if not evaluation.get("feedback"):
+                if total_marks >= 4:
+                    evaluation["feedback"] = "Your answer demonstrates understanding of the core concepts."
+                else:
+                    evaluation["feedback"] = f"Your answer needs improvement. Review the topic '{topic}' to better understand the key concepts."
+            
+            if not evaluation.get("correct_explanation"):
+                evaluation["correct_explanation"] = f"A complete answer should address the question: {question}. Include the core concept, relevant explanation, and examples where appropriate."
+            
             return evaluation
         except (TimeoutError, ConnectionError):
             logger.warning(f"QnA Evaluation service error")
-            # Default to score 4 (borderline correct) when service fails but answer was attempted
+            # An ungraded answer is neither credited nor penalized; the caller keeps
+            # the challenge open so the same answer can be submitted again
             return {
-                "concept_score": 2,
-                "clarity_score": 1,
-                "completeness_score": 1,
-                "total_marks": 4,
-                "result": "correct",
-                "feedback": "Your answer shows understanding of the concept. We couldn't fully evaluate it due to a service issue, but the attempt demonstrates basic knowledge. Review the topic to ensure complete understanding of all key points.",
-                "rubric_evaluation": "Provisional scoring due to service unavailability",
-                "correct_explanation": "A complete answer should include the key concepts, relevant examples, and clear explanations. Review the topic material for comprehensive understanding."
+                "total_marks": 0,
+                "result": "error",
+                "feedback": "Assessment evaluation failed because the AI service did not respond in time. Your answer was not graded. Please submit it again.",
+                "correct_explanation": "",
+                "evaluation_error": True
             }
         except Exception as e:
             logger.error(f"Q&A Evaluation failed: {e}")
@@ -660,6 +748,23 @@ Return ONLY valid JSON (no markdown, no explanation):
                 "correct_explanation": "A good answer should demonstrate understanding of the core concept, include relevant examples where appropriate, and be clearly structured."
             }
 
+    async def evaluate_qna_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Evaluate several QnA answers concurrently.
+        
+        Args:
+            items: Dicts with the evaluate_qna arguments (topic, question, user_answer, optional length)
+            
+        Returns:
+            Evaluations in the same order as items. In-flight LLM calls stay bounded by
+            the per-model semaphore in invoke_with_retry.
+        """
+        return list(await asyncio.gather(*(
+            self.evaluate_qna(
+                item["topic"], item["question"], item["user_answer"], item.get("length", "medium")
+            )
+            for item in items
+        )))
+
     def _parse_json_response(self, response_content: str, context: str = "") -> Dict[str, Any]:
         """Parse JSON response with retry logic and fallback.
         
@@ -679,35 +784,43 @@ Return ONLY valid JSON (no markdown, no explanation):
         
         try:
             # Try direct parsing first
-            return json.loads(response_content)
-        except json.JSONDecodeError:
+            return orjson.loads(response_content)
+        except orjson.JSONDecodeError:
             pass
         
+        # Try the span from the first '{' to the last '}' (preamble or trailing text)
+        json_start = response_content.find('{')
+        json_end = response_content.rfind('}') + 1
+        if json_start != -1 and json_end > json_start:
+            try:
+                return orjson.loads(response_content[json_start:json_end])
+            except orjson.JSONDecodeError:
+                pass
+        
         # Try to extract JSON from markdown code blocks
-        import re
-        json_match = re.search(r'```(?:json)?\s*(.*?)\s*```', response_content, re.DOTALL)
+        json_match = _CODE_BLOCK_RE.search(response_content)
         if json_match:
             try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
+                return orjson.loads(json_match.group(1))
+            except orjson.JSONDecodeError:
                 pass
         
         # Try to find JSON object in the response
-        json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response_content, re.DOTALL)
+        json_match = _JSON_OBJECT_RE.search(response_content)
         if json_match:
             try:
-                return json.loads(json_match.group(0))
-            except json.JSONDecodeError:
+                return orjson.loads(json_match.group(0))
+            except orjson.JSONDecodeError:
                 pass
         
         # Try fixing common JSON issues
         cleaned = response_content.strip()
         # Remove trailing commas before closing braces
-        cleaned = re.sub(r',\s*}', '}', cleaned)
-        cleaned = re.sub(r',\s*]', ']', cleaned)
+        cleaned = _TRAILING_COMMA_OBJECT_RE.sub('}', cleaned)
+        cleaned = _TRAILING_COMMA_ARRAY_RE.sub(']', cleaned)
         try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
             pass
         
         # Log the invalid response
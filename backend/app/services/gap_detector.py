@@ -1,11 +1,22 @@
+from backend.app.config import settings
 from backend.app.llm.ollama_client import get_ollama_client
+from backend.app.llm.response_cache import invoke_with_cache
 from backend.app.llm.prompts import GAP_DETECTION_PROMPT
-from backend.app.memory.user_profile import UserProfile
-import json
+from backend.app.memory.user_profile import get_user_profile
+from langchain_core.prompts import PromptTemplate
+import functools
+import orjson
 
 class GapDetector:
     def __init__(self):
-        self.llm = get_ollama_client(temperature=0)
+        # Parsed once; the JSON key instructions are part of GAP_DETECTION_PROMPT
+        self._template = PromptTemplate.from_template(GAP_DETECTION_PROMPT)
+
+    @functools.cached_property
+    def llm(self):
+        """LLM client, created on first use so a disabled detector never builds one."""
+        # JSON mode: Ollama constrains the output to a single valid JSON object
+        return get_ollama_client(temperature=0, format="json")
 
     async def detect_and_update(self, user_id: str, user_input: str, ai_output: str):
         """
@@ -16,35 +27,30 @@ class GapDetector:
             user_input: User's input message
             ai_output: AI's response
         """
+        if not settings.ENABLE_GAP_DETECTION:
+            return
+        
         try:
-            profile = UserProfile(user_id)
+            profile = get_user_profile(user_id)
+            
+            prompt = self._template.format(input=user_input, output=ai_output)
             
-            from langchain_core.prompts import PromptTemplate
-            prompt_template = PromptTemplate.from_template(GAP_DETECTION_PROMPT)
-            prompt = prompt_template.format(input=user_input, output=ai_output)
+            analysis = await invoke_with_cache(self.llm, prompt, max_retries=1)
             
-            response = await self.llm.ainvoke(prompt + "\n\nReturn the analysis as a JSON object with keys: 'detected_gaps' (list), 'mastered_concepts' (list), 'suggested_level' (beginner/intermediate/advanced).")
-            analysis = response.content
+            data = orjson.loads(analysis)
             
-            # Simple cleanup in case LLM adds markdown or preamble
-            json_start = analysis.find('{')
-            json_end = analysis.rfind('}') + 1
-            if json_start != -1 and json_end != -1:
-                data = json.loads(analysis[json_start:json_end])
-                
-                # Update profile (DISABLED to comply with prohibitions: NEVER infer topics or estimate mastery)
-                # for gap in data.get("detected_gaps", []):
-                #     profile.data["weak"][gap] = True
-                #     if gap in profile.data["strong"]:
-                #         del profile.data["strong"][gap]
-                # 
-                # for concept in data.get("mastered_concepts", []):
-                #     profile.data["strong"][concept] = True
-                #     if concept in profile.data["weak"]:
-                #         del profile.data["weak"][concept]
-                # 
-                # profile.save()
-                pass
+            # Update profile (DISABLED to comply with prohibitions: NEVER infer topics or estimate mastery)
+            # for gap in data.get("detected_gaps", []):
+            #     profile.data["weak"][gap] = True
+            #     if gap in profile.data["strong"]:
+            #         del profile.data["strong"][gap]
+            # 
+            # for concept in data.get("mastered_concepts", []):
+            #     profile.data["strong"][concept] = True
+            #     if concept in profile.data["weak"]:
+            #         del profile.data["weak"][concept]
+            # 
+            # profile.save()
             
         except Exception as e:
             # Log error but don't break the flow
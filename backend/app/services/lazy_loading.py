@@ -7,12 +7,39 @@ Implements pagination for long conversation histories.
 NOTE: session_id has been REMOVED. All state is now per-user, topic-centric.
 """
 
-import json
+import array
+import asyncio
+import functools
 import os
-from typing import Dict, Any, List, Optional, Tuple
+import time
+import types
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 from datetime import datetime
+import orjson
 from backend.app.config import settings
 from backend.app.utils.logger import logger
+from backend.app.utils.helpers import atomic_write, jsonl_append_prefix, load_json_file
+
+# Loaders kept in memory; the least recently used user is dropped beyond this
+LOADER_POOL_SIZE = 256
+
+# Seconds between refreshes of the metadata last_accessed stamp
+LAST_ACCESSED_RESOLUTION = 1.0
+
+# Seconds metadata updates are held so a burst of them costs one write
+METADATA_FLUSH_DELAY = 0.5
+
+
+def _iso_timestamp(value):
+    """Format an epoch-seconds timestamp as ISO 8601; strings (legacy records) pass through."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value).isoformat()
+    return value
+
+
+def _with_iso_timestamps(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copies of history messages with their timestamps formatted for callers."""
+    return [dict(message, timestamp=_iso_timestamp(message.get("timestamp"))) for message in messages]
 
 
 class UserMetadata:
@@ -29,14 +56,17 @@ class UserMetadata:
         self.metadata_dir = os.path.join(settings.USER_DATA_DIRECTORY, "user_metadata")
         os.makedirs(self.metadata_dir, exist_ok=True)
         self.metadata_file = os.path.join(self.metadata_dir, f"{user_id}_metadata.json")
+        self._last_accessed_at = 0.0
+        # Pending write state for debounced updates
+        self._dirty = False
+        self._flush_handle = None
         self._load()
 
     def _load(self):
         """Load metadata from disk."""
         if os.path.exists(self.metadata_file):
             try:
-                with open(self.metadata_file, "r") as f:
-                    self.data = json.load(f)
+                self.data = load_json_file(self.metadata_file)
             except Exception as e:
                 logger.error(f"Error loading user metadata: {e}")
                 self._initialize_default()
@@ -45,10 +75,11 @@ class UserMetadata:
 
     def _initialize_default(self):
         """Initialize default metadata structure."""
+        now = datetime.now().isoformat()
         self.data = {
             "user_id": self.user_id,
-            "created_at": datetime.now().isoformat(),
-            "last_accessed": datetime.now().isoformat(),
+            "created_at": now,
+            "last_accessed": now,
             "topic_count": 0,
             "message_count": 0,
             "total_assessment_count": 0,
@@ -60,10 +91,12 @@ class UserMetadata:
 
     def _save(self):
         """Save metadata to disk."""
-        self.data["last_accessed"] = datetime.now().isoformat()
+        now = time.time()
+        if now - self._last_accessed_at >= LAST_ACCESSED_RESOLUTION:
+            self.data["last_accessed"] = datetime.fromtimestamp(now).isoformat()
+            self._last_accessed_at = now
         try:
-            with open(self.metadata_file, "w") as f:
-                json.dump(self.data, f)
+            atomic_write(self.metadata_file, orjson.dumps(self.data, option=orjson.OPT_NON_STR_KEYS))
         except Exception as e:
             logger.error(f"Error saving session metadata: {e}")
 
@@ -72,13 +105,31 @@ class UserMetadata:
         return self.data.get(key, default)
 
     def update(self, updates: Dict[str, Any]):
-        """Update metadata."""
+        """Update metadata. The write is deferred by METADATA_FLUSH_DELAY when an event loop is running."""
         self.data.update(updates)
-        self._save()
-
-    def get_all(self) -> Dict[str, Any]:
-        """Get all metadata."""
-        return self.data.copy()
+        self._dirty = True
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write through
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(METADATA_FLUSH_DELAY, self.flush)
+
+    def flush(self):
+        """Write pending metadata updates now."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._dirty:
+            self._dirty = False
+            self._save()
+
+    def get_all(self) -> Mapping[str, Any]:
+        """Get all metadata as a read-only view; write through update()."""
+        return types.MappingProxyType(self.data)
 
 
 class PaginatedConversationHistory:
@@ -96,39 +147,116 @@ class PaginatedConversationHistory:
         self.page_size = page_size
         self.history_dir = os.path.join(settings.USER_DATA_DIRECTORY, "conversation_pages")
         os.makedirs(self.history_dir, exist_ok=True)
-        self.history_file = os.path.join(self.history_dir, f"{user_id}_history.json")
+        # Append-only log, one message per line
+        self.history_file = os.path.join(self.history_dir, f"{user_id}_history.jsonl")
+        # Byte offset of each message line in the log, as native uint64s
+        self.index_file = os.path.join(self.history_dir, f"{user_id}_history.idx")
+        legacy_file = os.path.join(self.history_dir, f"{user_id}_history.json")
+        if not os.path.exists(self.history_file) and os.path.exists(legacy_file):
+            self._migrate_legacy(legacy_file)
         self._load()
 
-    def _load(self):
-        """Load conversation history."""
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, "r") as f:
-                    self.history = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading conversation history: {e}")
-                self.history = []
-        else:
-            self.history = []
+    def _migrate_legacy(self, legacy_file: str):
+        """Convert a legacy JSON-array history file to the JSONL log."""
+        try:
+            records = load_json_file(legacy_file)
+            with open(self.history_file, "wb") as f:
+                f.writelines(orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b"\n" for record in records)
+            os.remove(legacy_file)
+        except Exception as e:
+            logger.error(f"Error migrating conversation history: {e}")
 
-    def _save(self):
-        """Save conversation history."""
+    def _load(self):
+        """Load the message offset index, rebuilding it from the log if missing or stale."""
+        self._offsets = array.array("Q")
+        if not os.path.exists(self.history_file):
+            return
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, "rb") as f:
+                    data = f.read()
+                # Drop a torn trailing entry; the staleness check below rebuilds if needed
+                self._offsets.frombytes(data[:len(data) - len(data) % self._offsets.itemsize])
+            if not self._index_matches_log():
+                self._rebuild_index()
+        except Exception as e:
+            logger.error(f"Error loading conversation history index: {e}")
+            self._offsets = array.array("Q")
+
+    def _index_matches_log(self) -> bool:
+        """Whether the last indexed line ends exactly at the end of the log."""
+        with open(self.history_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not self._offsets:
+                return size == 0
+            if self._offsets[-1] >= size:
+                return False
+            f.seek(self._offsets[-1])
+            return f.readline().endswith(b"\n") and f.tell() == size
+
+    def _rebuild_index(self):
+        """Scan the log for line offsets and rewrite the index file."""
+        offsets = array.array("Q")
+        with open(self.history_file, "rb") as f:
+            pos = 0
+            for line in f:
+                # Skip blank lines and a torn trailing write
+                if line.strip() and line.endswith(b"\n"):
+                    offsets.append(pos)
+                pos += len(line)
+        self._offsets = offsets
+        atomic_write(self.index_file, offsets.tobytes())
+
+    def _append(self, message: Dict[str, Any]):
+        """Append one message to the history log and its offset to the index."""
         try:
-            with open(self.history_file, "w") as f:
-                json.dump(self.history, f)
+            with open(self.history_file, "a+b") as f:
+                # Start on a fresh line if the log ends in a torn write
+                prefix = jsonl_append_prefix(f.fileno())
+                offset = f.seek(0, os.SEEK_END) + len(prefix)
+                f.write(prefix + orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS) + b"\n")
+            self._offsets.append(offset)
+            with open(self.index_file, "ab") as f:
+                f.write(self._offsets[-1:].tobytes())
         except Exception as e:
             logger.error(f"Error saving conversation history: {e}")
 
+    def _read_range(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Read messages start..end (index positions) from the log with a single seek."""
+        start = max(0, start)
+        end = min(end, len(self._offsets))
+        if start >= end:
+            return []
+        try:
+            with open(self.history_file, "rb") as f:
+                f.seek(self._offsets[start])
+                if end < len(self._offsets):
+                    chunk = f.read(self._offsets[end] - self._offsets[start])
+                else:
+                    chunk = f.read()
+        except OSError as e:
+            logger.error(f"Error reading conversation history: {e}")
+            return []
+        messages = []
+        for line in chunk.split(b"\n"):
+            if not line.strip():
+                continue
+            try:
+                messages.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue
+        return messages
+
     def add_message(self, role: str, content: str, metadata: Dict[str, Any] = None):
         """Add a message to history."""
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat(),
+            # Epoch seconds; formatted as ISO only when messages are read back
+            "timestamp": time.time(),
             "metadata": metadata or {}
         }
-        self.history.append(message)
-        self._save()
+        self._append(message)
 
     def get_page(self, page: int = 0) -> Tuple[List[Dict[str, Any]], int]:
         """
@@ -140,30 +268,35 @@ class PaginatedConversationHistory:
         Returns:
             Tuple of (messages, total_pages)
         """
-        total_messages = len(self.history)
+        total_messages = len(self._offsets)
         total_pages = (total_messages + self.page_size - 1) // self.page_size
         
         start_idx = page * self.page_size
         end_idx = start_idx + self.page_size
         
-        messages = self.history[start_idx:end_idx]
+        messages = _with_iso_timestamps(self._read_range(start_idx, end_idx))
         
         logger.info(f"Retrieved page {page} ({len(messages)} messages, {total_pages} total pages)")
         return messages, total_pages
 
     def get_recent(self, count: int = 10) -> List[Dict[str, Any]]:
         """Get most recent N messages."""
-        return self.history[-count:]
+        if count <= 0:
+            return []
+        total = len(self._offsets)
+        return _with_iso_timestamps(self._read_range(total - count, total))
 
     def get_total_count(self) -> int:
         """Get total message count."""
-        return len(self.history)
+        return len(self._offsets)
 
     def clear(self):
         """Clear conversation history."""
-        self.history = []
-        if os.path.exists(self.history_file):
-            os.remove(self.history_file)
+        self._offsets = array.array("Q")
+        for path in (self.history_file, self.index_file):
+            if os.path.exists(path):
+                with open(path, "wb"):
+                    pass
 
 
 class LazyUserLoader:
@@ -177,12 +310,20 @@ class LazyUserLoader:
             user_id: User identifier (session_id is DEPRECATED and removed)
         """
         self.user_id = user_id
-        self.metadata = UserMetadata(user_id)
-        self.history = PaginatedConversationHistory(user_id)
         self._profile_cache = None
         self._topics_cache = None
 
-    def get_user_metadata(self) -> Dict[str, Any]:
+    @functools.cached_property
+    def metadata(self) -> UserMetadata:
+        """User metadata, read from disk on first access."""
+        return UserMetadata(self.user_id)
+
+    @functools.cached_property
+    def history(self) -> PaginatedConversationHistory:
+        """Conversation history, read from disk on first access."""
+        return PaginatedConversationHistory(self.user_id)
+
+    def get_user_metadata(self) -> Mapping[str, Any]:
         """
         Get lightweight user metadata (fast, no I/O intensive operations).
         
@@ -219,34 +360,35 @@ class LazyUserLoader:
                 "paginated": True
             }
 
-    def get_profile_lazy(self) -> Dict[str, Any]:
+    def get_profile_lazy(self) -> Mapping[str, Any]:
         """
         Get user profile with lazy loading of full data.
         
         Returns only cached profile if already loaded, otherwise loads from disk.
+        The result is a read-only view of the cache.
         """
         if self._profile_cache is None:
             try:
-                from backend.app.memory.user_profile import UserProfile
-                profile = UserProfile(self.user_id)
-                self._profile_cache = profile.data
+                from backend.app.memory.user_profile import get_user_profile
+                profile = get_user_profile(self.user_id)
+                self._profile_cache = types.MappingProxyType(profile.to_dict())
             except Exception as e:
                 logger.error(f"Error loading profile: {e}")
-                self._profile_cache = {}
+                self._profile_cache = types.MappingProxyType({})
         
-        return self._profile_cache.copy()
+        return self._profile_cache
 
-    def get_topics_lazy(self) -> Dict[str, Any]:
+    def get_topics_lazy(self) -> Mapping[str, Any]:
         """
         Get topics with lazy loading.
         
-        Returns only cached topics if already loaded.
+        Returns only cached topics if already loaded, as a read-only view.
         """
         if self._topics_cache is None:
             profile = self.get_profile_lazy()
-            self._topics_cache = profile.get("topics", {})
+            self._topics_cache = types.MappingProxyType(profile.get("topics", {}))
         
-        return self._topics_cache.copy()
+        return self._topics_cache
 
     def update_metadata(self, key: str, value: Any):
         """Update a metadata field."""
@@ -256,28 +398,51 @@ class LazyUserLoader:
         """Invalidate all internal caches (when data changes)."""
         self._profile_cache = None
         self._topics_cache = None
+        self.flush()
+        self.__dict__.pop("metadata", None)
+        self.__dict__.pop("history", None)
         logger.info(f"Invalidated caches for {self.user_id}")
 
+    def flush(self):
+        """Write pending metadata updates, if metadata was loaded."""
+        metadata = self.__dict__.get("metadata")
+        if metadata is not None:
+            metadata.flush()
+
 
 class UserLoaderPool:
     """Pool of lazy user loaders for multiple concurrent users."""
     
-    def __init__(self):
+    def __init__(self, max_size: int = LOADER_POOL_SIZE):
+        # Ordered least to most recently used
         self.loaders: Dict[str, LazyUserLoader] = {}
+        self.max_size = max_size
 
     def get_loader(self, user_id: str) -> LazyUserLoader:
-        """Get or create a user loader."""
-        if user_id not in self.loaders:
-            self.loaders[user_id] = LazyUserLoader(user_id)
+        """Get or create a user loader, evicting the least recently used one when full."""
+        loader = self.loaders.pop(user_id, None)
+        if loader is None:
+            loader = LazyUserLoader(user_id)
+        self.loaders[user_id] = loader
+        
+        while len(self.loaders) > self.max_size:
+            evicted = next(iter(self.loaders))
+            self.loaders.pop(evicted).flush()
+            logger.debug(f"Evicted user loader: {evicted}")
         
-        return self.loaders[user_id]
+        return loader
 
     def release_user(self, user_id: str):
         """Release a user loader (e.g., on logout)."""
         if user_id in self.loaders:
-            del self.loaders[user_id]
+            self.loaders.pop(user_id).flush()
             logger.info(f"Released user loader: {user_id}")
 
+    def flush_all(self):
+        """Write pending metadata updates for every pooled user."""
+        for loader in list(self.loaders.values()):
+            loader.flush()
+
 
 # Global pool instance
 _user_loader_pool = UserLoaderPool()
@@ -291,3 +456,8 @@ def get_user_loader(user_id: str) -> LazyUserLoader:
 def release_user(user_id: str):
     """Release a user from the pool."""
     _user_loader_pool.release_user(user_id)
+
+
+def flush_all():
+    """Write pending metadata updates for all pooled users (call on application shutdown)."""
+    _user_loader_pool.flush_all()
@@ -1,5 +1,7 @@
-from backend.app.memory.user_profile import UserProfile
+from backend.app.memory.user_profile import UserProfile, get_user_profile
 from backend.app.utils.logger import logger
+from typing import Optional
+import logging
 import time
 
 class MasteryService:
@@ -15,7 +17,7 @@ class MasteryService:
     STRONG_THRESHOLD = 0.40  # mastery >= 0.40 → STRONG
     
     @staticmethod
-    def record_assessment_result(user_id: str, topic_name: str, score_type: str, score: float):
+    def record_assessment_result(user_id: str, topic_name: str, score_type: str, score: float, profile: Optional[UserProfile] = None):
         """
         Record assessment result - topic-centric model, no sessions.
         
@@ -33,61 +35,71 @@ class MasteryService:
         6. Persist changes to profile
         
         FAILURE RULE: If any step fails, log error and raise exception.
+        
+        Args:
+            profile: Profile already open for this user; loaded when omitted
+        
+        Returns:
+            The updated topic dict
         """
-        try:
-            profile = UserProfile(user_id)
+        if profile is None:
+            try:
+                profile = get_user_profile(user_id)
+            except Exception as e:
+                logger.error(f"MasteryService: Failed to load profile for {user_id}: {e}")
+                raise
+        
+        # Group the writes for this result so they reach disk in one append
+        with profile:
             topic = profile.add_topic(topic_name)  # Ensure topic exists
-        except Exception as e:
-            logger.error(f"MasteryService: Failed to load profile for {user_id}: {e}")
-            raise
-        
-        updates = {
-            "questions_attempted": topic["questions_attempted"] + 1,
-            "last_assessed": time.time()
-        }
-        
-        # MANDATORY: Binary scoring - correct (1.0) or incorrect (0.0)
-        # NO PARTIAL CREDIT - this is enforced strictly
-        if score >= 1.0:
-            updates["correct_answers"] = topic["correct_answers"] + 1
-            result_type = "correct"
-        else:
-            updates["correct_answers"] = topic["correct_answers"]
-            result_type = "incorrect"
-        
-        # Initialize result history if not present
-        if "result_history" not in topic:
-            topic["result_history"] = []
-        
-        # Store the result for tracking (last 10 only)
-        topic["result_history"].append({
-            "result": result_type,
-            "timestamp": time.time(),
-            "score_type": score_type
-        })
-        
-        # Keep only last 10 results for performance
-        if len(topic["result_history"]) > 10:
-            topic["result_history"] = topic["result_history"][-10:]
-        
-        # MANDATORY: Update topic with new values
-        # This triggers _update_derived_state which recalculates mastery and classification
-        profile.update_topic(topic_name, updates)
-        
-        # Log the update for verification
-        updated_topic = profile.get_topic(topic_name)
-        logger.info(
-            f"MasteryService: {user_id}/{topic_name} - "
-            f"Result: {result_type}, "
-            f"Attempted: {updated_topic['questions_attempted']}, "
-            f"Correct: {updated_topic['correct_answers']}, "
-            f"Mastery: {updated_topic['mastery_score']:.2%}, "
-            f"Classification: {updated_topic['classification']}"
-        )
-        
-        # Apply tagging logic AFTER updating mastery
-        MasteryService._apply_tagging_logic(profile, topic_name, result_type)
-        profile.save()
+            
+            updates = {
+                "questions_attempted": topic["questions_attempted"] + 1,
+                "last_assessed": time.time()
+            }
+            
+            # MANDATORY: Binary scoring - correct (1.0) or incorrect (0.0)
+            # NO PARTIAL CREDIT - this is enforced strictly
+            if score >= 1.0:
+                updates["correct_answers"] = topic["correct_answers"] + 1
+                result_type = "correct"
+            else:
+                updates["correct_answers"] = topic["correct_answers"]
+                result_type = "incorrect"
+            
+            # Store the result for tracking (last 10 only)
+            result_history = topic.setdefault("result_history", [])
+            result_history.append({
+                "result": result_type,
+                "timestamp": time.time(),
+                "score_type": score_type
+            })
+            
+            # Keep only last 10 results for performance (trimmed in place)
+            del result_history[:-10]
+            updates["result_history"] = result_history
+            
+            # MANDATORY: Update topic with new values
+            # This triggers _update_derived_state which recalculates mastery and classification
+            profile.update_topic(topic_name, updates)
+            
+            # Log the update for verification
+            updated_topic = profile.get_topic(topic_name)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"MasteryService: {user_id}/{topic_name} - "
+                    f"Result: {result_type}, "
+                    f"Attempted: {updated_topic['questions_attempted']}, "
+                    f"Correct: {updated_topic['correct_answers']}, "
+                    f"Mastery: {updated_topic['mastery_score']:.2%}, "
+                    f"Classification: {updated_topic['classification']}"
+                )
+            
+            # Apply tagging logic AFTER updating mastery (it only logs)
+            if logger.isEnabledFor(logging.DEBUG):
+                MasteryService._apply_tagging_logic(profile, topic_name, result_type)
+        
+        return updated_topic
 
     @staticmethod
     def _apply_tagging_logic(profile: UserProfile, topic_name: str, result_type: str):
@@ -123,7 +135,7 @@ class MasteryService:
         )
 
     @staticmethod
-    def update_after_mcq(user_id: str, topic: str, is_correct: bool):
+    def update_after_mcq(user_id: str, topic: str, is_correct: bool, profile: Optional[UserProfile] = None):
         """Update mastery after MCQ - topic-centric model, no sessions.
         
         MCQ MODE (MANDATORY):
@@ -133,11 +145,10 @@ class MasteryService:
         4. Recalculate mastery: mastery = correct_answers / questions_attempted
         5. Update classification: mastery < 0.40 → WEAK, mastery >= 0.40 → STRONG
         """
-        score = 1.0 if is_correct else 0.0
-        MasteryService.record_assessment_result(user_id, topic, "mcq", score)
+        return MasteryService.record_assessment_result(user_id, topic, "mcq", float(is_correct), profile=profile)
 
     @staticmethod
-    def update_after_qna(user_id: str, topic: str, qna_score: int):
+    def update_after_qna(user_id: str, topic: str, qna_score: int, profile: Optional[UserProfile] = None):
         """
         Update mastery after QnA - topic-centric model, no sessions.
         
@@ -163,9 +174,5 @@ class MasteryService:
         
         Note: Empty answers, gibberish, or random characters always get score = 0 (INCORRECT)
         """
-        # MANDATORY RULE: QnA score >= 4 counts as CORRECT for mastery
-        if qna_score >= 4:
-            score = 1.0  # CORRECT - full credit (correct_answers += 1)
-        else:
-            score = 0.0  # INCORRECT - no credit
-        MasteryService.record_assessment_result(user_id, topic, "qna", score)
+        # MANDATORY RULE: QnA score >= 4 counts as CORRECT (full credit), otherwise no credit
+        return MasteryService.record_assessment_result(user_id, topic, "qna", float(qna_score >= 4), profile=profile)
@@ -8,21 +8,44 @@ Monitors:
 - Queue depths for background tasks
 """
 
+import asyncio
+import threading
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from collections import defaultdict
-import json
+from dataclasses import dataclass
+from collections import defaultdict, deque
+import math
 import os
+import random
+import orjson
 from backend.app.config import settings
 from backend.app.utils.logger import logger
+from backend.app.utils.helpers import iter_jsonl_records, jsonl_append_prefix
+
+# Most recent metrics kept overall; older ones drop off the ring
+METRIC_RING_SIZE = 10_000
+
+# Fraction of on-target responses logged at INFO; slow responses are always logged
+RECORD_LOG_SAMPLE_RATE = 0.01
+
+# Write buffer for CSV exports
+EXPORT_BUFFER_SIZE = 256 * 1024
+
+# Relative width of latency histogram buckets; percentiles are accurate to about this fraction
+HISTOGRAM_PRECISION = 0.01
+
+# Seconds new metrics are buffered so a burst of requests costs one write
+METRICS_FLUSH_DELAY = 1.0
+
+# Buffered bytes that trigger an immediate write
+METRICS_FLUSH_BYTES = 1024 * 1024
 
 
 @dataclass
 class ResponseMetric:
     """Single response time metric."""
-    timestamp: str
+    timestamp: int  # Epoch nanoseconds; formatted as ISO only on export
     endpoint: str
     method: str
     status_code: int
@@ -33,6 +56,51 @@ class ResponseMetric:
     error: str = None
 
 
+def _iso_from_ns(timestamp_ns: int) -> str:
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
+class LatencyAggregate:
+    """Running totals and a log-bucketed histogram of response times.
+    
+    Updated once per recorded metric, so statistics are read in time
+    proportional to the number of buckets, not the number of requests.
+    """
+    
+    _LOG_GROWTH = math.log1p(HISTOGRAM_PRECISION)
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+        self.cache_hits = 0
+        self.errors = 0
+        # Bucket index -> count; bucket i covers [(1+p)^i, (1+p)^(i+1)) ms
+        self._buckets: Dict[int, int] = defaultdict(int)
+    
+    def add(self, metric: ResponseMetric):
+        value = metric.response_time_ms
+        self.count += 1
+        self.total_ms += value
+        self.min_ms = min(self.min_ms, value)
+        self.max_ms = max(self.max_ms, value)
+        self.cache_hits += metric.cache_hit
+        self.errors += bool(metric.error)
+        self._buckets[math.floor(math.log(max(value, 1e-3)) / self._LOG_GROWTH)] += 1
+    
+    def percentile(self, fraction: float) -> float:
+        """Approximate response time at a fraction of the sorted times (same rank as times[int(n * fraction)])."""
+        rank = int(self.count * fraction)
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                midpoint = math.exp((index + 0.5) * self._LOG_GROWTH)
+                return round(min(max(midpoint, self.min_ms), self.max_ms), 2)
+        return self.max_ms
+
+
 class PerformanceMonitor:
     """Monitors response times and performance metrics."""
     
@@ -47,35 +115,94 @@ class PerformanceMonitor:
     }
 
     def __init__(self):
-        self.metrics: List[ResponseMetric] = []
+        self.metrics: deque = deque(maxlen=METRIC_RING_SIZE)
         self.metrics_dir = os.path.join(settings.USER_DATA_DIRECTORY, "performance_metrics")
         os.makedirs(self.metrics_dir, exist_ok=True)
         self.metrics_file = os.path.join(self.metrics_dir, "metrics.jsonl")
         self.cache_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
-        self.endpoint_stats = defaultdict(list)
+        self.endpoint_stats: Dict[str, LatencyAggregate] = defaultdict(LatencyAggregate)
+        self.overall_stats = LatencyAggregate()
+        # Endpoint -> resolved target; endpoints are a small fixed set
+        self._target_cache: Dict[str, int] = {}
+        # JSONL lines recorded but not yet written
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._flush_handle = None
+        # Append descriptor, opened on first write and kept for the life of the monitor
+        self._fd: Optional[int] = None
+        # Guards metrics, aggregates, cache stats and the write buffer; sync
+        # endpoints record from threadpool threads
+        self._lock = threading.Lock()
+        # Serializes drains and the descriptor
+        self._write_lock = threading.Lock()
         self._load_metrics()
 
     def _load_metrics(self):
         """Load metrics from disk."""
         if os.path.exists(self.metrics_file):
             try:
-                with open(self.metrics_file, "r") as f:
-                    for line in f:
-                        if line.strip():
-                            data = json.loads(line)
-                            self.metrics.append(ResponseMetric(**data))
+                for data in iter_jsonl_records(self.metrics_file):
+                    if isinstance(data["timestamp"], str):
+                        # Rows written before timestamps were stored as integers
+                        data["timestamp"] = int(datetime.fromisoformat(data["timestamp"]).timestamp() * 1e9)
+                    metric = ResponseMetric(**data)
+                    self.metrics.append(metric)
+                    self.overall_stats.add(metric)
                 logger.info(f"Loaded {len(self.metrics)} performance metrics")
             except Exception as e:
                 logger.error(f"Error loading metrics: {e}")
 
+    def _queue_metric(self, metric: ResponseMetric):
+        """Buffer a metric for writing; the write is deferred by METRICS_FLUSH_DELAY when an event loop is running."""
+        # orjson encodes dataclasses natively, without a dataclasses.asdict() copy
+        line = orjson.dumps(metric) + b"\n"
+        with self._lock:
+            self._pending.append(line)
+            self._pending_bytes += len(line)
+            write_now = self._pending_bytes >= METRICS_FLUSH_BYTES
+            if not write_now and self._flush_handle is None:
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    # No event loop (scripts, threadpool handlers): write through
+                    write_now = True
+                else:
+                    self._flush_handle = loop.call_later(METRICS_FLUSH_DELAY, self._save_metrics)
+        if write_now:
+            self._save_metrics()
+
     def _save_metrics(self):
-        """Save metrics to disk (append mode)."""
-        try:
-            with open(self.metrics_file, "a") as f:
-                for metric in self.metrics[-10:]:  # Save last 10 metrics
-                    f.write(json.dumps(asdict(metric)) + "\n")
-        except Exception as e:
-            logger.error(f"Error saving metrics: {e}")
+        """Append buffered metrics to disk in one write; each metric is written exactly once."""
+        # Held across take-and-write so concurrent drains reach the file in order
+        with self._write_lock:
+            with self._lock:
+                if self._flush_handle is not None:
+                    self._flush_handle.cancel()
+                    self._flush_handle = None
+                if not self._pending:
+                    return
+                payload = b"".join(self._pending)
+                self._pending = []
+                self._pending_bytes = 0
+            try:
+                if self._fd is None:
+                    self._fd = os.open(self.metrics_file, os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+                    # Start on a fresh line if a previous run left a torn tail
+                    payload = jsonl_append_prefix(self._fd) + payload
+                # One write() per drain; loop only on a short write
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(self._fd, view):]
+            except Exception as e:
+                logger.error(f"Error saving metrics: {e}")
+
+    def close(self):
+        """Write buffered metrics and release the append descriptor."""
+        self._save_metrics()
+        with self._write_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
 
     def record_response(
         self,
@@ -86,11 +213,12 @@ class PerformanceMonitor:
         task_type: str = None,
         cache_hit: bool = False,
         streaming: bool = False,
-        error: str = None
+        error: str = None,
+        timestamp_ns: Optional[int] = None
     ):
-        """Record a response metric."""
+        """Record a response metric. timestamp_ns defaults to now."""
         metric = ResponseMetric(
-            timestamp=datetime.now().isoformat(),
+            timestamp=time.time_ns() if timestamp_ns is None else timestamp_ns,
             endpoint=endpoint,
             method=method,
             status_code=status_code,
@@ -101,36 +229,43 @@ class PerformanceMonitor:
             error=error
         )
         
-        self.metrics.append(metric)
-        self.endpoint_stats[endpoint].append(metric)
+        with self._lock:
+            self.metrics.append(metric)
+            self.endpoint_stats[endpoint].add(metric)
+            self.overall_stats.add(metric)
         
         # Check if exceeded target
         target = self._get_target_for_endpoint(endpoint)
+        # %-style args: messages are only formatted if a handler emits them
         if target and response_time_ms > target:
             logger.warning(
-                f"Slow response: {endpoint} took {response_time_ms}ms "
-                f"(target: {target}ms)"
+                "Slow response: %s took %sms (target: %sms)",
+                endpoint, response_time_ms, target
             )
-        else:
+        elif random.random() < RECORD_LOG_SAMPLE_RATE:
             logger.info(
-                f"Response recorded: {endpoint} {response_time_ms}ms "
-                f"(cache_hit={cache_hit}, streaming={streaming})"
+                "Response recorded: %s %sms (cache_hit=%s, streaming=%s)",
+                endpoint, response_time_ms, cache_hit, streaming
             )
         
-        self._save_metrics()
+        self._queue_metric(metric)
 
     def record_cache_hit(self, cache_type: str):
         """Record a cache hit."""
-        self.cache_stats[cache_type]["hits"] += 1
+        with self._lock:
+            self.cache_stats[cache_type]["hits"] += 1
 
     def record_cache_miss(self, cache_type: str):
         """Record a cache miss."""
-        self.cache_stats[cache_type]["misses"] += 1
+        with self._lock:
+            self.cache_stats[cache_type]["misses"] += 1
 
     def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
         """Get cache hit/miss statistics."""
+        with self._lock:
+            snapshot = {cache_type: dict(counts) for cache_type, counts in self.cache_stats.items()}
         stats = {}
-        for cache_type, counts in self.cache_stats.items():
+        for cache_type, counts in snapshot.items():
             total = counts["hits"] + counts["misses"]
             hit_rate = (counts["hits"] / total * 100) if total > 0 else 0
             stats[cache_type] = {
@@ -150,40 +285,37 @@ class PerformanceMonitor:
         Returns:
             Dict with statistics
         """
-        if endpoint:
-            metrics = self.endpoint_stats.get(endpoint, [])
-            return self._calculate_stats(metrics, endpoint)
-        else:
-            all_stats = {}
-            for ep, metrics in self.endpoint_stats.items():
-                all_stats[ep] = self._calculate_stats(metrics, ep)
-            return all_stats
-
-    def _calculate_stats(self, metrics: List[ResponseMetric], endpoint: str) -> Dict[str, Any]:
-        """Calculate statistics for a list of metrics."""
-        if not metrics:
+        with self._lock:
+            if endpoint:
+                aggregate = self.endpoint_stats.get(endpoint)
+                return self._calculate_stats(aggregate, endpoint)
+            else:
+                all_stats = {}
+                for ep, aggregate in self.endpoint_stats.items():
+                    all_stats[ep] = self._calculate_stats(aggregate, ep)
+                return all_stats
+
+    def _calculate_stats(self, aggregate: LatencyAggregate, endpoint: str) -> Dict[str, Any]:
+        """Calculate statistics from an endpoint's running aggregate."""
+        if aggregate is None or not aggregate.count:
             return {"endpoint": endpoint, "metrics_count": 0}
         
-        times = [m.response_time_ms for m in metrics]
-        cache_hits = sum(1 for m in metrics if m.cache_hit)
-        errors = sum(1 for m in metrics if m.error)
-        
-        times.sort()
+        p95 = aggregate.percentile(0.95)
         
         return {
             "endpoint": endpoint,
-            "metrics_count": len(metrics),
-            "avg_response_time_ms": round(sum(times) / len(times), 2),
-            "min_response_time_ms": times[0],
-            "max_response_time_ms": times[-1],
-            "p50_ms": times[len(times) // 2],
-            "p95_ms": times[int(len(times) * 0.95)],
-            "p99_ms": times[int(len(times) * 0.99)] if len(times) > 100 else None,
-            "cache_hits": cache_hits,
-            "cache_hit_rate_percent": round(cache_hits / len(metrics) * 100, 2),
-            "errors": errors,
+            "metrics_count": aggregate.count,
+            "avg_response_time_ms": round(aggregate.total_ms / aggregate.count, 2),
+            "min_response_time_ms": aggregate.min_ms,
+            "max_response_time_ms": aggregate.max_ms,
+            "p50_ms": aggregate.percentile(0.5),
+            "p95_ms": p95,
+            "p99_ms": aggregate.percentile(0.99) if aggregate.count > 100 else None,
+            "cache_hits": aggregate.cache_hits,
+            "cache_hit_rate_percent": round(aggregate.cache_hits / aggregate.count * 100, 2),
+            "errors": aggregate.errors,
             "target_ms": self._get_target_for_endpoint(endpoint),
-            "meets_target": self._check_meets_target(times, endpoint),
+            "meets_target": self._check_meets_target(p95, endpoint),
         }
 
     def get_performance_summary(self) -> Dict[str, Any]:
@@ -191,11 +323,13 @@ class PerformanceMonitor:
         endpoint_stats = self.get_endpoint_stats()
         cache_stats = self.get_cache_stats()
         
-        # Calculate overall metrics
-        all_times = [m.response_time_ms for m in self.metrics]
-        
-        if not all_times:
-            return {"summary": "No metrics collected yet"}
+        with self._lock:
+            overall = self.overall_stats
+            if not overall.count:
+                return {"summary": "No metrics collected yet"}
+            total_requests = overall.count
+            overall_avg = round(overall.total_ms / overall.count, 2)
+            overall_p95 = overall.percentile(0.95)
         
         meeting_targets = sum(
             1 for endpoint, stats in endpoint_stats.items()
@@ -203,17 +337,25 @@ class PerformanceMonitor:
         )
         
         return {
-            "total_requests": len(self.metrics),
+            "total_requests": total_requests,
             "endpoints_tracked": len(endpoint_stats),
             "endpoints_meeting_targets": meeting_targets,
-            "overall_avg_response_time_ms": round(sum(all_times) / len(all_times), 2),
-            "overall_p95_ms": sorted(all_times)[int(len(all_times) * 0.95)],
+            "overall_avg_response_time_ms": overall_avg,
+            "overall_p95_ms": overall_p95,
             "cache_stats": cache_stats,
             "endpoint_stats": endpoint_stats,
         }
 
     def _get_target_for_endpoint(self, endpoint: str) -> int:
-        """Get performance target for an endpoint."""
+        """Get performance target for an endpoint (classified once, then cached)."""
+        target = self._target_cache.get(endpoint)
+        if target is None:
+            target = self._classify_target(endpoint)
+            self._target_cache[endpoint] = target
+        return target
+
+    def _classify_target(self, endpoint: str) -> int:
+        """Match an endpoint to its performance target by name."""
         endpoint_lower = endpoint.lower()
         
         if "chat" in endpoint_lower or "message" in endpoint_lower:
@@ -235,14 +377,9 @@ class PerformanceMonitor:
         
         return 2000  # Default 2s
 
-    def _check_meets_target(self, times: List[float], endpoint: str) -> bool:
-        """Check if response times meet target."""
-        if not times:
-            return True
-        
+    def _check_meets_target(self, p95: float, endpoint: str) -> bool:
+        """Check if the p95 response time meets the endpoint's target."""
         target = self._get_target_for_endpoint(endpoint)
-        p95 = times[int(len(times) * 0.95)]
-        
         return p95 <= target
 
     def export_metrics_csv(self, filepath: str = None) -> str:
@@ -250,18 +387,25 @@ class PerformanceMonitor:
         if filepath is None:
             filepath = os.path.join(self.metrics_dir, "metrics_export.csv")
         
+        with self._lock:
+            metrics = list(self.metrics)
+        
         try:
             import csv
-            with open(filepath, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=[
+            with open(filepath, "w", newline="", buffering=EXPORT_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow([
                     "timestamp", "endpoint", "method", "status_code",
-                    "response_time_ms", "task_type", "cache_hit", "error"
+                    "response_time_ms", "task_type", "cache_hit", "streaming", "error"
                 ])
-                writer.writeheader()
-                for metric in self.metrics:
-                    writer.writerow(asdict(metric))
+                # Rows are generated one at a time as tuples; no per-metric dict
+                writer.writerows(
+                    (_iso_from_ns(m.timestamp), m.endpoint, m.method, m.status_code,
+                     m.response_time_ms, m.task_type, m.cache_hit, m.streaming, m.error)
+                    for m in metrics
+                )
             
-            logger.info(f"Exported {len(self.metrics)} metrics to {filepath}")
+            logger.info(f"Exported {len(metrics)} metrics to {filepath}")
             return filepath
         
         except Exception as e:
@@ -281,6 +425,12 @@ def get_performance_monitor() -> PerformanceMonitor:
     return _performance_monitor
 
 
+def flush_metrics():
+    """Write buffered metrics of the global monitor, if one was created (call on shutdown)."""
+    if _performance_monitor is not None:
+        _performance_monitor.close()
+
+
 # Context manager for timing responses
 class TimedResponse:
     """Context manager for timing responses."""
@@ -288,14 +438,15 @@ class TimedResponse:
     def __init__(self, endpoint: str, method: str = "POST"):
         self.endpoint = endpoint
         self.method = method
-        self.start_time = None
+        self.start_ns = None
 
     def __enter__(self):
-        self.start_time = time.time()
+        self.start_ns = time.time_ns()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        response_time_ms = (time.time() - self.start_time) * 1000
+        end_ns = time.time_ns()
+        response_time_ms = (end_ns - self.start_ns) / 1e6
         status_code = 500 if exc_type else 200
         error = str(exc_type.__name__) if exc_type else None
         
@@ -305,5 +456,6 @@ class TimedResponse:
             method=self.method,
             response_time_ms=response_time_ms,
             status_code=status_code,
-            error=error
+            error=error,
+            timestamp_ns=end_ns
         )
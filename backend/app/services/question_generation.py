@@ -6,16 +6,35 @@ during assessment. Results in near-zero assessment start latency.
 """
 
 import asyncio
-import json
+import functools
 import os
+import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import orjson
 from backend.app.config import settings
 from backend.app.utils.logger import logger
+from backend.app.utils.helpers import atomic_write, load_json_file
 from backend.app.llm.ollama_client import get_ollama_client, invoke_with_retry
 from backend.app.llm.prompts import MCQ_GENERATION_PROMPT, QNA_GENERATION_PROMPT
 
 
+# Seconds pool changes are held so a burst of them costs one write
+POOL_SAVE_DELAY = 0.5
+
+# Question pools kept in memory; the least recently used user's pool is dropped beyond this
+POOL_CACHE_SIZE = 256
+
+# A JSON object inside a ``` or ~~~ fence (any-case "json" tag), else the widest {...} span
+_QUESTION_JSON_RE = re.compile(
+    r"(?:```|~~~)(?:json)?\s*(\{.*?\})\s*(?:```|~~~)|(\{.*\})",
+    re.DOTALL | re.IGNORECASE
+)
+
+# Generation tasks tracked for status queries; the oldest finished ones are dropped beyond this
+GENERATION_TASKS_SIZE = 256
+
+
 class QuestionPool:
     """Manages a pool of pre-generated questions for assessments."""
     
@@ -30,28 +49,62 @@ class QuestionPool:
         self.pool_dir = os.path.join(settings.USER_DATA_DIRECTORY, "question_pools")
         os.makedirs(self.pool_dir, exist_ok=True)
         self.pool_file = os.path.join(self.pool_dir, f"{user_id}_questions.json")
+        # Pending write state for debounced saves
+        self._dirty = False
+        self._save_handle = None
         self._load_pool()
 
     def _load_pool(self):
         """Load question pool from disk."""
         if os.path.exists(self.pool_file):
             try:
-                with open(self.pool_file, "r") as f:
-                    self.pool = json.load(f)
+                self.pool = load_json_file(self.pool_file)
+                for entry in self.pool.values():
+                    for question_type in ("mcq", "qna"):
+                        # Files written before buckets stored a plain list of questions
+                        if isinstance(entry.get(question_type), list):
+                            entry[question_type] = {"items": entry[question_type], "head": 0}
             except Exception as e:
                 logger.error(f"Error loading question pool: {e}")
                 self.pool = {}
         else:
             self.pool = {}
 
-    def _save_pool(self):
-        """Save question pool to disk."""
+    def _save_pool(self, sync: bool = False):
+        """Save question pool to disk atomically; sync also forces it (and the rename) to stable storage."""
         try:
-            with open(self.pool_file, "w") as f:
-                json.dump(self.pool, f)
+            atomic_write(self.pool_file, orjson.dumps(self.pool), sync=sync)
+            if sync:
+                dir_fd = os.open(self.pool_dir, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
         except Exception as e:
             logger.error(f"Error saving question pool: {e}")
 
+    def _mark_dirty(self):
+        """Schedule a save. The write is deferred by POOL_SAVE_DELAY when an event loop is running."""
+        self._dirty = True
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write through
+            self.flush()
+            return
+        self._save_handle = loop.call_later(POOL_SAVE_DELAY, self.flush)
+
+    def flush(self, sync: bool = False):
+        """Write pending pool changes now; sync makes the write durable."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty:
+            self._dirty = False
+            self._save_pool(sync=sync)
+
     def add_topic_questions(self, topic: str, questions: List[Dict[str, Any]], question_type: str = "mcq"):
         """
         Add pre-generated questions for a topic.
@@ -62,10 +115,15 @@ class QuestionPool:
             question_type: Type of questions (mcq, qna)
         """
         if topic not in self.pool:
-            self.pool[topic] = {"mcq": [], "qna": [], "generated_at": datetime.now().isoformat()}
+            self.pool[topic] = {
+                "mcq": {"items": [], "head": 0},
+                "qna": {"items": [], "head": 0},
+                "generated_at": datetime.now().isoformat()
+            }
         
-        self.pool[topic][question_type] = questions
-        self._save_pool()
+        # Served questions are skipped by advancing head instead of shifting the list
+        self.pool[topic][question_type] = {"items": questions, "head": 0}
+        self._mark_dirty()
         logger.info(f"Added {len(questions)} {question_type} questions for {topic}")
 
     def get_next_question(self, topic: str, question_type: str = "mcq") -> Optional[Dict[str, Any]]:
@@ -79,51 +137,106 @@ class QuestionPool:
         Returns:
             Next question dict or None if pool is empty
         """
-        if topic not in self.pool or not self.pool[topic].get(question_type):
+        bucket = self.pool.get(topic, {}).get(question_type)
+        if not bucket or bucket["head"] >= len(bucket["items"]):
             return None
         
-        questions = self.pool[topic][question_type]
-        if not questions:
-            return None
-        
-        # Get first question and remove it from pool
-        question = questions.pop(0)
-        self._save_pool()
+        # Take the question at head; drop served questions once they are the majority
+        items = bucket["items"]
+        question = items[bucket["head"]]
+        bucket["head"] += 1
+        if bucket["head"] > len(items) // 2:
+            del items[:bucket["head"]]
+            bucket["head"] = 0
+        self._mark_dirty()
         
-        logger.info(f"Retrieved question for {topic} ({question_type}), {len(questions)} remaining")
+        logger.info(f"Retrieved question for {topic} ({question_type}), {len(items) - bucket['head']} remaining")
         return question
 
     def get_pool_status(self, topic: str) -> Dict[str, int]:
         """Get count of available questions in pool for a topic."""
-        if topic not in self.pool:
-            return {"mcq": 0, "qna": 0}
-        
-        return {
-            "mcq": len(self.pool[topic].get("mcq", [])),
-            "qna": len(self.pool[topic].get("qna", []))
-        }
+        entry = self.pool.get(topic, {})
+        status = {}
+        for question_type in ("mcq", "qna"):
+            bucket = entry.get(question_type)
+            status[question_type] = len(bucket["items"]) - bucket["head"] if bucket else 0
+        return status
 
     def clear_topic_pool(self, topic: str):
         """Clear all questions for a topic."""
         if topic in self.pool:
             del self.pool[topic]
-            self._save_pool()
+            self._mark_dirty()
             logger.info(f"Cleared question pool for {topic}")
 
     def clear_all(self):
         """Clear entire question pool."""
         self.pool = {}
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self._dirty = False
         if os.path.exists(self.pool_file):
             os.remove(self.pool_file)
         logger.info(f"Cleared entire question pool for {self.user_id}")
 
 
+_question_pools: Dict[str, QuestionPool] = {}
+
+
+def get_question_pool(user_id: str) -> QuestionPool:
+    """
+    Get the question pool for a user, shared so unsaved changes are never read stale from disk.
+    
+    Args:
+        user_id: User identifier
+    """
+    pool = _question_pools.pop(user_id, None)
+    if pool is None:
+        pool = QuestionPool(user_id)
+    # Re-insert to mark as most recently used
+    _question_pools[user_id] = pool
+    while len(_question_pools) > POOL_CACHE_SIZE:
+        _question_pools.pop(next(iter(_question_pools))).flush()
+    return pool
+
+
+def flush_question_pools():
+    """Durably write pending changes of all cached question pools (call on shutdown)."""
+    for pool in _question_pools.values():
+        pool.flush(sync=True)
+
+
 class BackgroundQuestionGenerator:
     """Generates questions in background for topics."""
     
     def __init__(self):
         self.generation_tasks: Dict[str, asyncio.Task] = {}
 
+    @functools.cached_property
+    def llm(self):
+        """Question generation client, shared by every pool fill."""
+        # Use fast model for question generation
+        return get_ollama_client(task_type="question_generation")
+
+    @staticmethod
+    def _log_failure(task_id: str, task):
+        """Done callback surfacing errors that would otherwise vanish with the task."""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(f"Question generation task {task_id} failed: {error}", exc_info=error)
+
+    def _track(self, task_id: str, task):
+        """Remember a task for status queries, dropping the oldest finished tasks beyond GENERATION_TASKS_SIZE."""
+        self.generation_tasks.pop(task_id, None)
+        self.generation_tasks[task_id] = task
+        if len(self.generation_tasks) > GENERATION_TASKS_SIZE:
+            finished = [tid for tid, t in self.generation_tasks.items() if t.done()]
+            for tid in finished[:len(self.generation_tasks) - GENERATION_TASKS_SIZE]:
+                del self.generation_tasks[tid]
+
     async def generate_questions_for_topic(
         self,
         user_id: str,
@@ -148,7 +261,7 @@ class BackgroundQuestionGenerator:
         logger.info(f"Starting background generation of {count} {question_type} questions for {topic}")
         
         try:
-            from backend.app.vectorstore.retriever import retrieve_context
+            from backend.app.vectorstore.retriever import aretrieve_context
             
             # Determine difficulty based on mastery
             if mastery >= 0.9:
@@ -160,37 +273,36 @@ class BackgroundQuestionGenerator:
             else:
                 difficulty = "beginner"
             
-            context = retrieve_context(topic)
+            context = await aretrieve_context(topic)
+            
+            llm = self.llm
+            
+            # Every generation uses the same prompt; variety comes from sampling, so format it once
+            prompt = self._format_prompt(question_type, topic, difficulty, mastery, context)
+            
+            # Generate concurrently, bounded so a pool fill doesn't take every model slot
+            semaphore = asyncio.Semaphore(settings.QUESTION_GENERATION_CONCURRENCY)
             
-            # Use fast model for question generation
-            llm = get_ollama_client(task_type="question_generation")
+            async def generate_one(prompt: str) -> str:
+                async with semaphore:
+                    return await invoke_with_retry(llm, prompt)
+            
+            responses = await asyncio.gather(*(generate_one(prompt) for _ in range(count)), return_exceptions=True)
             
             questions = []
-            for i in range(count):
-                try:
-                    if question_type == "mcq":
-                        prompt = self._format_mcq_prompt(topic, difficulty, mastery, context, i + 1, count)
-                    else:
-                        prompt = self._format_qna_prompt(topic, difficulty, mastery, context, i + 1, count)
-                    
-                    response = await invoke_with_retry(llm, prompt)
-                    question = self._parse_question_response(response, question_type)
-                    
-                    if question:
-                        questions.append(question)
-                        logger.debug(f"Generated question {i + 1}/{count} for {topic}")
-                    
-                    # Small delay to avoid overwhelming the model
-                    await asyncio.sleep(0.1)
-                
-                except Exception as e:
-                    logger.warning(f"Failed to generate question {i + 1}/{count} for {topic}: {e}")
+            for i, response in enumerate(responses):
+                if isinstance(response, Exception):
+                    logger.warning(f"Failed to generate question {i + 1}/{count} for {topic}: {response}")
                     continue
+                question = self._parse_question_response(response, question_type)
+                if question:
+                    questions.append(question)
+                    logger.debug(f"Generated question {i + 1}/{count} for {topic}")
             
             logger.info(f"Successfully generated {len(questions)}/{count} questions for {topic}")
             
             # Save to pool
-            pool = QuestionPool(user_id)
+            pool = get_question_pool(user_id)
             pool.add_topic_questions(topic, questions, question_type)
             
             return questions
@@ -199,7 +311,7 @@ class BackgroundQuestionGenerator:
             logger.error(f"Error in background question generation: {e}")
             return []
 
-    def start_background_generation(
+    async def start_background_generation(
         self,
         user_id: str,
         topic: str,
@@ -208,6 +320,10 @@ class BackgroundQuestionGenerator:
         """
         Start background question generation as a non-blocking task.
         
+        Async so FastAPI's BackgroundTasks runs it on the application loop
+        instead of a threadpool: the generation task must share that loop with
+        the pooled Ollama client and per-model semaphores it uses.
+        
         Args:
             user_id: User ID
             topic: Topic name
@@ -223,12 +339,11 @@ class BackgroundQuestionGenerator:
             logger.info(f"Question generation already in progress for {task_id}")
             return task_id
         
-        # Start background task
-        loop = asyncio.get_event_loop()
-        task = loop.create_task(
+        task = asyncio.get_running_loop().create_task(
             self.generate_questions_for_topic(user_id, topic, mastery, count=20, question_type="mcq")
         )
-        self.generation_tasks[task_id] = task
+        task.add_done_callback(lambda t: self._log_failure(task_id, t))
+        self._track(task_id, task)
         
         logger.info(f"Started background question generation task: {task_id}")
         return task_id
@@ -244,55 +359,38 @@ class BackgroundQuestionGenerator:
             "done": task.done()
         }
 
-    def _format_mcq_prompt(
+    def _format_prompt(
         self,
+        question_type: str,
         topic: str,
         difficulty: str,
         mastery: float,
-        context: str,
-        question_num: int,
-        total: int
+        context: str
     ) -> str:
-        """Format MCQ generation prompt."""
-        return MCQ_GENERATION_PROMPT.format(
-            topic=topic,
-            difficulty=difficulty,
-            mastery=mastery,
-            context=context,
-            instruction=f"Generate question {question_num}/{total} with unique content different from any previous questions for this topic."
-        )
-
-    def _format_qna_prompt(
-        self,
-        topic: str,
-        difficulty: str,
-        mastery: float,
-        context: str,
-        question_num: int,
-        total: int
-    ) -> str:
-        """Format QnA generation prompt."""
+        """Format the MCQ or QnA generation prompt."""
+        if question_type == "mcq":
+            return MCQ_GENERATION_PROMPT.format(
+                topic=topic,
+                difficulty=difficulty,
+                mastery=mastery,
+                context=context
+            )
         return QNA_GENERATION_PROMPT.format(
             topic=topic,
             difficulty=difficulty,
             mastery=mastery,
             context=context,
-            instruction=f"Generate question {question_num}/{total} with unique content different from any previous questions for this topic."
+            length="medium"
         )
 
     def _parse_question_response(self, response: str, question_type: str) -> Optional[Dict[str, Any]]:
         """Parse LLM response into question object."""
         try:
-            import json
-            # Try to extract JSON from response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = response
-            
-            data = json.loads(json_str)
+            # Extract the JSON object from fenced or bare output in one regex pass
+            match = _QUESTION_JSON_RE.search(response)
+            if match is None:
+                raise ValueError("no JSON object in response")
+            data = orjson.loads(match.group(1) or match.group(2))
             
             # Validate required fields based on question type
             if question_type == "mcq":
@@ -5,9 +5,12 @@ Provides consistent, template-based responses for specific scenarios in Study Bu
 Uses exact wording and structure to ensure consistency across the application.
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Mapping, Optional, List, Tuple
+from dataclasses import dataclass, asdict
 from enum import Enum
-import uuid
+from functools import lru_cache
+from types import MappingProxyType
+import os
 
 
 class TemplateType(Enum):
@@ -23,6 +26,104 @@ class TemplateType(Enum):
     ASSESSMENT_COMPLETE = 10
 
 
+# Template type names, resolved once instead of per render
+_TT_ASSESSMENT_VIA_CHAT = TemplateType.ASSESSMENT_VIA_CHAT.name
+_TT_UNASSESSED_TOPIC = TemplateType.UNASSESSED_TOPIC.name
+_TT_CORRUPTED_SESSION = TemplateType.CORRUPTED_SESSION.name
+_TT_USER_FRUSTRATION = TemplateType.USER_FRUSTRATION.name
+_TT_SUCCESS_MILESTONE = TemplateType.SUCCESS_MILESTONE.name
+_TT_CLARIFICATION_NEEDED = TemplateType.CLARIFICATION_NEEDED.name
+_TT_ASSESSMENT_COMPLETE = TemplateType.ASSESSMENT_COMPLETE.name
+
+# Distinct (topic, mastery) renders kept for topic-parameterized templates
+TEMPLATE_CACHE_SIZE = 256
+
+# Choice keys ("1", "2", ...) indexed by option count, shared read-only
+_CHOICES_BY_LEN = tuple(tuple(str(i) for i in range(1, n + 1)) for n in range(6))
+
+# Status badges by minimum new mastery, highest first
+_BADGES = ((0.9, "Expert 🌟"), (0.7, "Proficient ✅"), (0.5, "Intermediate 🟡"))
+_BADGE_DEFAULT = "Beginner 🔵"
+
+
+def _pct(fraction: float) -> int:
+    """Fraction in [0, 1] as a whole percentage, rounded half up."""
+    return int(fraction * 100 + 0.5)
+
+
+def _assessment_scores(
+    total_questions: int,
+    correct_answers: int,
+    old_mastery: float,
+    new_mastery: float
+) -> Tuple[int, int, int, str]:
+    """
+    Numeric part of an assessment-complete template.
+    
+    Returns:
+        (score percentage, old mastery %, new mastery %, status badge)
+    """
+    # Half-up rounding in integers, no float division
+    percentage = (correct_answers * 200 + total_questions) // (2 * total_questions) if total_questions > 0 else 0
+    status_badge = next((badge for threshold, badge in _BADGES if new_mastery >= threshold), _BADGE_DEFAULT)
+    return percentage, _pct(old_mastery), _pct(new_mastery), status_badge
+
+
+@dataclass(slots=True)
+class AssessmentMetrics:
+    """Scores reported alongside an assessment-complete template."""
+    topic_name: str
+    total_questions: int
+    correct_answers: int
+    percentage: int
+    old_mastery: float
+    new_mastery: float
+    old_mastery_pct: int
+    new_mastery_pct: int
+    status: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# Fully static templates are built once and shared read-only
+_MISSING_CONTEXT_RESPONSE = MappingProxyType({
+    "content": """I don't have enough context to answer that accurately.
+
+Could you:
+- Specify which topic you're referring to?
+- Rephrase with more detail?
+- Or, let me know if you'd like to start a new topic.""",
+    "template_type": TemplateType.MISSING_CONTEXT.name,
+    "requires_choice": False
+})
+
+_OFF_TOPIC_RESPONSE = MappingProxyType({
+    "content": """I'm Study Buddy, focused on helping you learn effectively.
+
+I can:
+- Explain topics you want to learn
+- Assess your understanding
+- Track your progress
+- Identify weak areas
+
+Would you like to add a topic to your session, or is there something else I can help you learn?""",
+    "template_type": TemplateType.OFF_TOPIC.name,
+    "requires_choice": False
+})
+
+# Static text around the topic name in the assessment-via-chat template
+_ASSESSMENT_VIA_CHAT_PREFIX = """To start an assessment, please:
+1. Click "Assessments" in the sidebar
+2. Choose "MCQ" or "QnA"
+3. Select the topic: """
+_ASSESSMENT_VIA_CHAT_SUFFIX = """
+4. Enter number of questions (1-50)
+5. Click "Start Assessment"
+
+I cannot start assessments through chat messages to ensure proper setup."""
+
+
 class ResponseTemplates:
     """Service for managing and rendering response templates."""
 
@@ -37,45 +138,34 @@ class ResponseTemplates:
         return None
 
     @staticmethod
-    def assessment_via_chat(topic_name: str) -> Dict[str, Any]:
+    @lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+    def assessment_via_chat(topic_name: str) -> Mapping[str, Any]:
         """
         Trigger: User tries starting assessment through chat
+        Returns a shared read-only template per topic.
         """
-        return {
-            "content": f"""To start an assessment, please:
-1. Click "Assessments" in the sidebar
-2. Choose "MCQ" or "QnA"
-3. Select the topic: {topic_name}
-4. Enter number of questions (1-50)
-5. Click "Start Assessment"
-
-I cannot start assessments through chat messages to ensure proper setup.""",
-            "template_type": TemplateType.ASSESSMENT_VIA_CHAT.name,
+        return MappingProxyType({
+            "content": _ASSESSMENT_VIA_CHAT_PREFIX + topic_name + _ASSESSMENT_VIA_CHAT_SUFFIX,
+            "template_type": _TT_ASSESSMENT_VIA_CHAT,
             "requires_choice": False
-        }
+        })
 
     @staticmethod
-    def missing_context() -> Dict[str, Any]:
+    def missing_context() -> Mapping[str, Any]:
         """
         Trigger: User's message is ambiguous without context
+        Returns a shared read-only template.
         """
-        return {
-            "content": """I don't have enough context to answer that accurately.
-
-Could you:
-- Specify which topic you're referring to?
-- Rephrase with more detail?
-- Or, let me know if you'd like to start a new topic.""",
-            "template_type": TemplateType.MISSING_CONTEXT.name,
-            "requires_choice": False
-        }
+        return _MISSING_CONTEXT_RESPONSE
 
     @staticmethod
-    def unassessed_topic(topic_name: str, mastery: float = 0.0) -> Dict[str, Any]:
+    @lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+    def unassessed_topic(topic_name: str, mastery: float = 0.0) -> Mapping[str, Any]:
         """
         Trigger: User asks about mastery with 0 questions attempted
+        Returns a shared read-only template per (topic, mastery).
         """
-        return {
+        return MappingProxyType({
             "content": f"""{topic_name} - {int(mastery * 100)}% mastery
 Status: Unassessed 🔵
 
@@ -86,12 +176,12 @@ Would you like to:
 2. Test your current knowledge (Start assessment)
 
 Choose 1 or 2.""",
-            "template_type": TemplateType.UNASSESSED_TOPIC.name,
+            "template_type": _TT_UNASSESSED_TOPIC,
             "requires_choice": True,
-            "choices": ["1", "2"],
+            "choices": _CHOICES_BY_LEN[2],
             "topic_name": topic_name,
             "mastery": mastery
-        }
+        })
 
     @staticmethod
     def corrupted_session(error_id: Optional[str] = None) -> Dict[str, Any]:
@@ -99,7 +189,8 @@ Choose 1 or 2.""",
         Trigger: State validation fails
         """
         if error_id is None:
-            error_id = str(uuid.uuid4())[:8]
+            # 8 hex chars, same shape as a truncated UUID without building one
+            error_id = os.urandom(4).hex()
         
         return {
             "content": f"""⚠️ Session Data Issue Detected
@@ -114,30 +205,19 @@ Options:
 Which would you like to do?
 
 Error ID: {error_id} - Logged for investigation.""",
-            "template_type": TemplateType.CORRUPTED_SESSION.name,
+            "template_type": _TT_CORRUPTED_SESSION,
             "requires_choice": True,
-            "choices": ["1", "2", "3"],
+            "choices": _CHOICES_BY_LEN[3],
             "error_id": error_id
         }
 
     @staticmethod
-    def off_topic() -> Dict[str, Any]:
+    def off_topic() -> Mapping[str, Any]:
         """
         Trigger: User engages in non-educational chat
+        Returns a shared read-only template.
         """
-        return {
-            "content": """I'm Study Buddy, focused on helping you learn effectively.
-
-I can:
-- Explain topics you want to learn
-- Assess your understanding
-- Track your progress
-- Identify weak areas
-
-Would you like to add a topic to your session, or is there something else I can help you learn?""",
-            "template_type": TemplateType.OFF_TOPIC.name,
-            "requires_choice": False
-        }
+        return _OFF_TOPIC_RESPONSE
 
     @staticmethod
     def user_frustration(state_facts: str, highlight_progress: str, offer_options: str) -> Dict[str, Any]:
@@ -155,9 +235,9 @@ You're making progress. Would you like to:
 1. Review weaker areas with focused explanations
 2. Take a break and come back later
 3. Try a different topic to build confidence""",
-            "template_type": TemplateType.USER_FRUSTRATION.name,
+            "template_type": _TT_USER_FRUSTRATION,
             "requires_choice": True,
-            "choices": ["1", "2", "3"]
+            "choices": _CHOICES_BY_LEN[3]
         }
 
     @staticmethod
@@ -173,7 +253,7 @@ You've achieved {milestone}: {specific_accomplishment}
 This means: {significance}
 
 Keep up the excellent work!""",
-            "template_type": TemplateType.SUCCESS_MILESTONE.name,
+            "template_type": _TT_SUCCESS_MILESTONE,
             "requires_choice": False
         }
 
@@ -186,7 +266,11 @@ Keep up the excellent work!""",
         if len(options) < 2:
             raise ValueError("At least 2 options required")
         
-        options_text = "\n".join([f"{i+1}. {opt}" for i, opt in enumerate(options)])
+        options_text = "\n".join([f"{i}. {opt}" for i, opt in enumerate(options, 1)])
+        if len(options) < len(_CHOICES_BY_LEN):
+            choices = _CHOICES_BY_LEN[len(options)]
+        else:
+            choices = tuple(str(i) for i in range(1, len(options) + 1))
         
         return {
             "content": f"""I want to help, but I need clarification.
@@ -195,9 +279,9 @@ Did you want to:
 {options_text}
 
 Please choose a number.""",
-            "template_type": TemplateType.CLARIFICATION_NEEDED.name,
+            "template_type": _TT_CLARIFICATION_NEEDED,
             "requires_choice": True,
-            "choices": [str(i+1) for i in range(len(options))]
+            "choices": choices
         }
 
     @staticmethod
@@ -212,20 +296,9 @@ Please choose a number.""",
         """
         Trigger: User finishes full assessment
         """
-        percentage = round((correct_answers / total_questions * 100)) if total_questions > 0 else 0
-        
-        # Determine status badge
-        if new_mastery >= 0.9:
-            status_badge = "Expert 🌟"
-        elif new_mastery >= 0.7:
-            status_badge = "Proficient ✅"
-        elif new_mastery >= 0.5:
-            status_badge = "Intermediate 🟡"
-        else:
-            status_badge = "Beginner 🔵"
-        
-        old_mastery_pct = round(old_mastery * 100)
-        new_mastery_pct = round(new_mastery * 100)
+        percentage, old_mastery_pct, new_mastery_pct, status_badge = _assessment_scores(
+            total_questions, correct_answers, old_mastery, new_mastery
+        )
         
         return {
             "content": f"""Assessment Complete ✓
@@ -242,27 +315,98 @@ Next steps:
 - Review incorrect questions
 - Start new assessment
 - Study weak areas""",
-            "template_type": TemplateType.ASSESSMENT_COMPLETE.name,
+            "template_type": _TT_ASSESSMENT_COMPLETE,
             "requires_choice": False,
-            "metrics": {
-                "topic_name": topic_name,
-                "total_questions": total_questions,
-                "correct_answers": correct_answers,
-                "percentage": percentage,
-                "old_mastery": old_mastery,
-                "new_mastery": new_mastery,
-                "old_mastery_pct": old_mastery_pct,
-                "new_mastery_pct": new_mastery_pct,
-                "status": status_badge
-            }
+            "metrics": AssessmentMetrics(
+                topic_name, total_questions, correct_answers, percentage,
+                old_mastery, new_mastery, old_mastery_pct, new_mastery_pct, status_badge
+            )
         }
 
 
+# Template builders bound once, so trigger dispatch calls them without a class lookup
+_tpl_topic_not_in_session = ResponseTemplates.topic_not_in_session
+_tpl_assessment_via_chat = ResponseTemplates.assessment_via_chat
+_tpl_unassessed_topic = ResponseTemplates.unassessed_topic
+_tpl_corrupted_session = ResponseTemplates.corrupted_session
+_tpl_user_frustration = ResponseTemplates.user_frustration
+_tpl_success_milestone = ResponseTemplates.success_milestone
+_tpl_clarification_needed = ResponseTemplates.clarification_needed
+_tpl_assessment_complete = ResponseTemplates.assessment_complete
+
+
+def _topic_not_in_session(context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return _tpl_topic_not_in_session(context.get("topic_name", "that topic"))
+
+
+def _assessment_via_chat(context: Dict[str, Any]) -> Mapping[str, Any]:
+    return _tpl_assessment_via_chat(context.get("topic_name", "your selected topic"))
+
+
+def _missing_context(context: Dict[str, Any]) -> Mapping[str, Any]:
+    return _MISSING_CONTEXT_RESPONSE
+
+
+def _unassessed_topic(context: Dict[str, Any]) -> Mapping[str, Any]:
+    topic_name = context.get("topic_name", "This topic")
+    mastery = context.get("mastery", 0.0)
+    return _tpl_unassessed_topic(topic_name, mastery)
+
+
+def _off_topic(context: Dict[str, Any]) -> Mapping[str, Any]:
+    return _OFF_TOPIC_RESPONSE
+
+
+def _user_frustration(context: Dict[str, Any]) -> Dict[str, Any]:
+    state_facts = context.get("state_facts", "You're encountering some challenges")
+    highlight_progress = context.get("highlight_progress", "You have shown effort")
+    offer_options = context.get("offer_options", "We can adjust our approach")
+    return _tpl_user_frustration(state_facts, highlight_progress, offer_options)
+
+
+def _success_milestone(context: Dict[str, Any]) -> Dict[str, Any]:
+    milestone = context.get("milestone", "a milestone")
+    accomplishment = context.get("specific_accomplishment", "good progress")
+    significance = context.get("significance", "You're advancing in your learning")
+    return _tpl_success_milestone(milestone, accomplishment, significance)
+
+
+def _clarification_needed(context: Dict[str, Any]) -> Dict[str, Any]:
+    options = context.get("options", ["Continue with current topic", "Switch to a new topic"])
+    return _tpl_clarification_needed(options)
+
+
+def _assessment_complete(context: Dict[str, Any]) -> Dict[str, Any]:
+    topic_name = context.get("topic_name", "Unknown Topic")
+    total = context.get("total_questions", 0)
+    correct = context.get("correct_answers", 0)
+    old_mastery = context.get("old_mastery", 0.0)
+    new_mastery = context.get("new_mastery", 0.0)
+    insight = context.get("personalized_insight", "Keep practicing to improve!")
+    return _tpl_assessment_complete(
+        topic_name, total, correct, old_mastery, new_mastery, insight
+    )
+
+
+# template_trigger value -> builder taking the trigger context
+_TRIGGER_DISPATCH = {
+    "topic_not_in_session": _topic_not_in_session,
+    "assessment_via_chat": _assessment_via_chat,
+    "missing_context": _missing_context,
+    "unassessed_topic": _unassessed_topic,
+    "off_topic": _off_topic,
+    "user_frustration": _user_frustration,
+    "success_milestone": _success_milestone,
+    "clarification_needed": _clarification_needed,
+    "assessment_complete": _assessment_complete,
+}
+
+
 class TemplateSelector:
     """Determines which template to use based on scenario triggers."""
 
     @staticmethod
-    def select_template(observation: Dict[str, Any], context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def select_template(observation: Dict[str, Any], context: Dict[str, Any]) -> Optional[Mapping[str, Any]]:
         """
         Apply selection logic to determine if a template applies.
         
@@ -274,63 +418,14 @@ class TemplateSelector:
             Template dict if applicable, None otherwise
         """
         
-        # 1. Check for corrupted session (highest priority)
+        # Corrupted session takes priority over any trigger
         if context.get("validation_failed"):
-            return ResponseTemplates.corrupted_session(context.get("error_id"))
+            return _tpl_corrupted_session(context.get("error_id"))
         
-        # 2. Check for topic not in session
-        if context.get("template_trigger") == "topic_not_in_session":
-            topic_name = context.get("topic_name", "that topic")
-            return ResponseTemplates.topic_not_in_session(topic_name)
+        # Most turns carry no trigger
+        trigger = context.get("template_trigger")
+        if trigger is None:
+            return None
         
-        # 3. Check for assessment via chat attempt
-        if context.get("template_trigger") == "assessment_via_chat":
-            topic_name = context.get("topic_name", "your selected topic")
-            return ResponseTemplates.assessment_via_chat(topic_name)
-        
-        # 4. Check for missing context
-        if context.get("template_trigger") == "missing_context":
-            return ResponseTemplates.missing_context()
-        
-        # 5. Check for unassessed topic
-        if context.get("template_trigger") == "unassessed_topic":
-            topic_name = context.get("topic_name", "This topic")
-            mastery = context.get("mastery", 0.0)
-            return ResponseTemplates.unassessed_topic(topic_name, mastery)
-        
-        # 6. Check for off-topic chat
-        if context.get("template_trigger") == "off_topic":
-            return ResponseTemplates.off_topic()
-        
-        # 7. Check for user frustration
-        if context.get("template_trigger") == "user_frustration":
-            state_facts = context.get("state_facts", "You're encountering some challenges")
-            highlight_progress = context.get("highlight_progress", "You have shown effort")
-            offer_options = context.get("offer_options", "We can adjust our approach")
-            return ResponseTemplates.user_frustration(state_facts, highlight_progress, offer_options)
-        
-        # 8. Check for success milestone
-        if context.get("template_trigger") == "success_milestone":
-            milestone = context.get("milestone", "a milestone")
-            accomplishment = context.get("specific_accomplishment", "good progress")
-            significance = context.get("significance", "You're advancing in your learning")
-            return ResponseTemplates.success_milestone(milestone, accomplishment, significance)
-        
-        # 9. Check for clarification needed
-        if context.get("template_trigger") == "clarification_needed":
-            options = context.get("options", ["Continue with current topic", "Switch to a new topic"])
-            return ResponseTemplates.clarification_needed(options)
-        
-        # 10. Check for assessment complete
-        if context.get("template_trigger") == "assessment_complete":
-            topic_name = context.get("topic_name", "Unknown Topic")
-            total = context.get("total_questions", 0)
-            correct = context.get("correct_answers", 0)
-            old_mastery = context.get("old_mastery", 0.0)
-            new_mastery = context.get("new_mastery", 0.0)
-            insight = context.get("personalized_insight", "Keep practicing to improve!")
-            return ResponseTemplates.assessment_complete(
-                topic_name, total, correct, old_mastery, new_mastery, insight
-            )
-        
-        return None
+        handler = _TRIGGER_DISPATCH.get(trigger)
+        return handler(context) if handler else None
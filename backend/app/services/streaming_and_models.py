@@ -7,6 +7,7 @@ Handles:
 - Token counting for streaming optimization
 """
 
+import asyncio
 from typing import AsyncIterator, Dict, Any, Optional, List
 from enum import Enum
 from backend.app.utils.logger import logger
@@ -59,6 +60,27 @@ class ModelSelector:
         TaskType.SUMMARY_GENERATION: "mistral",
     }
 
+    # Merged lookup: task -> (model, is_fast); quality mappings take precedence
+    _MODEL_TABLE = {
+        **{task: (model, True) for task, model in FAST_MODELS.items()},
+        **{task: (model, False) for task, model in QUALITY_MODELS.items()},
+    }
+    
+    # Tasks always streamed (quality/long responses)
+    _ALWAYS_STREAM = frozenset({
+        TaskType.DETAILED_EXPLANATION,
+        TaskType.REMEDIAL_EXPLANATION,
+        TaskType.CONCEPT_BREAKDOWN,
+        TaskType.TUTORING_RESPONSE,
+    })
+    
+    # Tasks never streamed (evaluation/scoring needs the complete result)
+    _NEVER_STREAM = frozenset({
+        TaskType.MCQ_EVALUATION,
+        TaskType.QUESTION_EVALUATION,
+        TaskType.ASSESSMENT_SCORING,
+    })
+
     @classmethod
     def select_model(cls, task_type: TaskType) -> str:
         """
@@ -70,26 +92,21 @@ class ModelSelector:
         Returns:
             Model name
         """
-        # Try quality models first if task requires quality
-        if task_type in cls.QUALITY_MODELS:
-            model = cls.QUALITY_MODELS[task_type]
-            logger.info(f"Selected quality model {model} for {task_type.value}")
-            return model
-        
-        # Fall back to fast models
-        if task_type in cls.FAST_MODELS:
-            model = cls.FAST_MODELS[task_type]
-            logger.info(f"Selected fast model {model} for {task_type.value}")
-            return model
+        entry = cls._MODEL_TABLE.get(task_type)
+        if entry is None:
+            # Default to mistral for unknown tasks
+            logger.warning("Unknown task type %s, using default model", task_type)
+            return "mistral"
         
-        # Default to mistral for unknown tasks
-        logger.warning(f"Unknown task type {task_type}, using default model")
-        return "mistral"
+        model, is_fast = entry
+        logger.debug("Selected %s model %s for %s", "fast" if is_fast else "quality", model, task_type.value)
+        return model
 
     @classmethod
     def is_fast_task(cls, task_type: TaskType) -> bool:
         """Check if task should use fast model."""
-        return task_type in cls.FAST_MODELS and task_type not in cls.QUALITY_MODELS
+        entry = cls._MODEL_TABLE.get(task_type)
+        return entry is not None and entry[1]
 
     @classmethod
     def should_stream(cls, task_type: TaskType, expected_length: str = "medium") -> bool:
@@ -101,68 +118,49 @@ class ModelSelector:
         - Deterministic models with simple output (no streaming needed)
         - User-visible content where progressive display improves UX
         """
-        # Always stream quality/long responses
-        if task_type in [
-            TaskType.DETAILED_EXPLANATION,
-            TaskType.REMEDIAL_EXPLANATION,
-            TaskType.CONCEPT_BREAKDOWN,
-            TaskType.TUTORING_RESPONSE,
-        ]:
+        if task_type in cls._ALWAYS_STREAM:
             return True
-        
-        # Don't stream for evaluation/scoring (needs complete result)
-        if task_type in [
-            TaskType.MCQ_EVALUATION,
-            TaskType.QUESTION_EVALUATION,
-            TaskType.ASSESSMENT_SCORING,
-        ]:
+        if task_type in cls._NEVER_STREAM:
             return False
         
         # Stream if expected to be long
-        return expected_length in ["long", "detailed"]
+        return expected_length in ("long", "detailed")
 
 
 class ResponseStreamer:
-    """Streams responses from LLM in chunks for progressive display."""
+    """Streams responses from LLM token by token for progressive display."""
     
-    CHUNK_SIZE = 50  # Tokens per chunk
+    BATCH_CHUNKS = 8  # Token chunks coalesced into one explanation event
+    BATCH_WINDOW = 0.02  # Seconds a partial batch waits for more tokens
     
     @classmethod
     async def stream_response(
         cls,
         llm,
-        prompt: str,
-        chunk_size: int = CHUNK_SIZE
+        prompt: str
     ) -> AsyncIterator[str]:
         """
-        Stream LLM response in chunks.
+        Stream LLM response as Ollama generates it.
         
         Args:
             llm: LLM instance from get_ollama_client()
             prompt: Prompt to send to LLM
-            chunk_size: Approximate tokens per chunk
         
         Yields:
-            Text chunks as they are generated
+            Text chunks (roughly one token each) as they are generated
         """
         try:
-            from backend.app.llm.ollama_client import invoke_with_retry
-            
-            # For Ollama, streaming isn't directly available via standard langchain
-            # Instead, we can simulate streaming by chunking the response
-            response = await invoke_with_retry(llm, prompt)
-            
-            # Chunk response by approximate token count (words * 1.3)
-            words = response.split()
-            words_per_chunk = int(chunk_size / 1.3)
+            from backend.app.llm.ollama_client import OllamaClientManager
             
-            for i in range(0, len(words), words_per_chunk):
-                chunk = " ".join(words[i:i + words_per_chunk])
-                yield chunk
-                logger.debug(f"Streamed chunk {i // words_per_chunk + 1}")
+            # No retry here: once tokens have reached the caller a failed
+            # stream cannot be replayed from the start
+            async with OllamaClientManager.get_semaphore(llm.model):
+                async for part in llm.astream(prompt):
+                    if part.content:
+                        yield part.content
         
         except Exception as e:
-            logger.error(f"Error in response streaming: {e}")
+            logger.error("Error in response streaming: %s", e)
             yield f"Error generating response: {str(e)}"
 
     @classmethod
@@ -184,21 +182,61 @@ class ResponseStreamer:
             Dict with text chunk and metadata
         """
         token_count = 0
+        buffer: List[str] = []
+        deadline = 0.0
+        loop = asyncio.get_running_loop()
+        stream = cls.stream_response(llm, prompt)
+        next_chunk = None
         
-        async for chunk in cls.stream_response(llm, prompt):
-            # Estimate tokens (rough calculation: 1 token ≈ 0.77 words)
-            chunk_tokens = int(len(chunk.split()) * 1.3)
-            token_count += chunk_tokens
-            
-            yield {
-                "chunk": chunk,
-                "tokens": chunk_tokens,
-                "total_tokens": token_count,
-                "done": token_count >= max_streaming_tokens
-            }
+        try:
+            while token_count < max_streaming_tokens:
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(stream.__anext__())
+                # An empty buffer waits for the first token; a partial batch
+                # is flushed once its window closes
+                timeout = max(0.0, deadline - loop.time()) if buffer else None
+                done, _ = await asyncio.wait({next_chunk}, timeout=timeout)
+                if not done:
+                    yield cls._batch_event(buffer, token_count, False)
+                    buffer = []
+                    continue
+                
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    next_chunk = None
+                    break
+                next_chunk = None
+                
+                if not buffer:
+                    deadline = loop.time() + cls.BATCH_WINDOW
+                buffer.append(chunk)
+                token_count += 1
+                if len(buffer) >= cls.BATCH_CHUNKS and token_count < max_streaming_tokens:
+                    yield cls._batch_event(buffer, token_count, False)
+                    buffer = []
             
-            if token_count >= max_streaming_tokens:
-                break
+            # Always close with a done event; it is empty when the last batch
+            # was already flushed by size or by its window
+            yield cls._batch_event(buffer, token_count, True)
+        finally:
+            if next_chunk is not None:
+                next_chunk.cancel()
+                try:
+                    await next_chunk
+                except (asyncio.CancelledError, StopAsyncIteration):
+                    pass
+            await stream.aclose()
+
+    @staticmethod
+    def _batch_event(buffer: List[str], total_tokens: int, done: bool) -> Dict[str, Any]:
+        """Explanation event for a batch of streamed token chunks."""
+        return {
+            "chunk": "".join(buffer),
+            "tokens": len(buffer),
+            "total_tokens": total_tokens,
+            "done": done
+        }
 
 
 class PerformanceConfig:
@@ -251,7 +289,8 @@ def estimate_response_length(prompt: str) -> str:
     Returns:
         "short" (<100 tokens), "medium" (100-300), or "long" (>300)
     """
-    words = len(prompt.split())
+    # Separator count approximates the word count without building a word list
+    words = prompt.count(" ") + prompt.count("\n") + 1
     
     if words > 200:
         return "long"
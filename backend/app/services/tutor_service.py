@@ -10,7 +10,7 @@ class TutorService:
         Process a message - topic-centric model, no sessions.
         session_id parameter is DEPRECATED and ignored.
         """
-        logger.info(f"Processing message from {user_id}: {message}")
+        logger.info("Processing message from %s: %s", user_id, message)
         
         try:
             # Get AI response 
@@ -26,7 +26,7 @@ class TutorService:
                 "metadata": agent_data.get("metadata", {})
             }
         except Exception as e:
-            logger.error(f"Error in TutorService.process_message: {e}", exc_info=True)
+            logger.error("Error in TutorService.process_message: %s", e, exc_info=True)
             return {
                 "response": f"I encountered an internal error: {str(e)}",
                 "metadata": {}
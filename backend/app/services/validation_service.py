@@ -4,17 +4,39 @@ from backend.app.utils.logger import logger
 
 class StateValidationService:
     @staticmethod
-    def validate_profile(profile_data: Dict[str, Any], history: List[Any]) -> Tuple[bool, List[str]]:
+    def validate_profile(
+        profile_data: Dict[str, Any],
+        history: List[Any],
+        fail_fast: bool = False
+    ) -> Tuple[bool, List[str]]:
+        """
+        Check a profile and recent history against the state protocol.
+        
+        Args:
+            profile_data: Profile data dict
+            history: Recent messages (BaseMessage or dicts)
+            fail_fast: Stop after the first check that finds errors instead of
+                collecting every violation
+        
+        Returns:
+            (is_valid, errors)
+        """
         errors = []
         
         # Check 1: Reference Integrity
         topics = profile_data.get("topics", {})
         topic_ids = {t["topic_id"] for t in topics.values()}
         
-        for area in ["weak_areas", "strong_areas"]:
-            for tid in profile_data.get(area, []):
-                if tid not in topic_ids:
-                    errors.append(f"Orphaned topic ID {tid} found in {area}")
+        for area in ("weak_areas", "strong_areas"):
+            area_ids = profile_data.get(area, [])
+            # One subset test in the common case; orphans are listed in order only when present
+            if not topic_ids.issuperset(area_ids):
+                errors.extend(
+                    f"Orphaned topic ID {tid} found in {area}" for tid in area_ids if tid not in topic_ids
+                )
+
+        if fail_fast and errors:
+            return StateValidationService._failure(errors, profile_data)
 
         # Check 2: Mastery Accuracy & Check 4: Counter Logic
         for name, topic in topics.items():
@@ -36,6 +58,9 @@ class StateValidationService:
             elif stored_mastery != 0.0:
                  errors.append(f"Mastery should be 0.0 for unattempted topic {name}")
 
+        if fail_fast and errors:
+            return StateValidationService._failure(errors, profile_data)
+
         # Check 3: Assessment Consistency
         asst = profile_data.get("assessment_state")
         if asst:
@@ -51,6 +76,9 @@ class StateValidationService:
                 if str(idx) not in user_answers and idx not in user_answers:
                     errors.append(f"Answered question {idx} missing evaluation/answer data")
 
+        if fail_fast and errors:
+            return StateValidationService._failure(errors, profile_data)
+
         # Check 5: Timestamp Sequence
         # Note: History format from FileChatMessageHistory uses "data": {"content": ..., "additional_kwargs": {"timestamp": ...}} 
         # or we might need to add it ourselves.
@@ -69,8 +97,12 @@ class StateValidationService:
                 last_ts = ts
 
         if errors:
-            logger.error(f"Validation Failure: {errors}")
-            logger.debug(f"Full State: {profile_data}")
-            return False, errors
+            return StateValidationService._failure(errors, profile_data)
             
         return True, []
+
+    @staticmethod
+    def _failure(errors: List[str], profile_data: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        logger.error("Validation Failure: %s", errors)
+        logger.debug("Full State: %s", profile_data)
+        return False, errors
@@ -1,7 +1,69 @@
+import mmap
+import os
 import uuid
+import orjson
+
+# Files larger than this are memory-mapped instead of read into a bytes copy
+MMAP_THRESHOLD = 256 * 1024
 
 def generate_user_id():
     return str(uuid.uuid4())
 
 def format_timestamp(dt):
     return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+def load_json_file(path: str):
+    """Parse a JSON file, memory-mapping it when it is large."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return orjson.loads(f.read())
+
+def atomic_write(path: str, data: bytes, sync: bool = True):
+    """
+    Write data to path via a temp file and rename, so a crash never leaves a torn file.
+    With sync=False the data is not fsynced: the file is always whole, but a
+    power loss may lose the latest write.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def iter_jsonl_records(path: str):
+    """
+    Yield records from a JSONL file, memory-mapping it when it is large.
+    Blank and undecodable lines (torn writes from interrupted appends) are skipped.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from _parse_jsonl_lines(iter(mm.readline, b""))
+        else:
+            yield from _parse_jsonl_lines(f)
+
+def _parse_jsonl_lines(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # Torn write from an interrupted append; later lines are still whole
+            continue
+
+def jsonl_append_prefix(fd: int) -> bytes:
+    """
+    Separator to write before appending to a JSONL file open for reading and appending.
+    Returns b"\n" when the file ends in a torn line, so the next record starts on a
+    line of its own instead of being glued onto the torn one. Leaves fd at end of file.
+    """
+    end = os.lseek(fd, 0, os.SEEK_END)
+    if end == 0:
+        return b""
+    os.lseek(fd, end - 1, os.SEEK_SET)
+    return b"" if os.read(fd, 1) == b"\n" else b"\n"
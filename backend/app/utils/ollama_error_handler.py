@@ -1,62 +1,78 @@
 """Error handling utilities for OLLAMA integration."""
 
 import asyncio
+from dataclasses import dataclass
 from typing import Callable, Any, Dict, Optional
 from backend.app.utils.logger import logger
 from backend.app.config import settings
 
 
+@dataclass(frozen=True, slots=True)
+class ErrorSpec:
+    """Messages for one kind of OLLAMA failure."""
+    user: str
+    log: str
+    recovery: str
+
+
+# Returned for error types without an entry in ERROR_MESSAGES
+_DEFAULT_ERROR_SPEC = ErrorSpec(
+    user="An unexpected error occurred. Please try again.",
+    log="Unknown error",
+    recovery="Try again later"
+)
+
+
 class OllamaErrorHandler:
     """Unified error handling for OLLAMA operations."""
     
     ERROR_MESSAGES = {
-        "connection": {
-            "user": "AI service unavailable. Please ensure Ollama is running.",
-            "log": "Connection to OLLAMA failed",
-            "recovery": "Check if Ollama is running: ollama serve"
-        },
-        "timeout": {
-            "user": "Request timed out. Please try again or check if Ollama is responsive.",
-            "log": "OLLAMA request timed out",
-            "recovery": f"Increase timeout (current: {settings.OLLAMA_TIMEOUT}s) or check system load"
-        },
-        "model_not_found": {
-            "user": "Model not available. Please pull the required model.",
-            "log": "Requested model not found in OLLAMA",
-            "recovery": "Run: ollama pull <model_name>"
-        },
-        "invalid_json": {
-            "user": "Unable to process response. Please try again.",
-            "log": "Invalid JSON in OLLAMA response",
-            "recovery": "Check prompt formatting or model's JSON output capabilities"
-        },
-        "rate_limited": {
-            "user": "Too many requests. Please wait a moment and try again.",
-            "log": "OLLAMA rate limit exceeded",
-            "recovery": "Implement request queuing or reduce concurrent requests"
-        }
+        "connection": ErrorSpec(
+            user="AI service unavailable. Please ensure Ollama is running.",
+            log="Connection to OLLAMA failed",
+            recovery="Check if Ollama is running: ollama serve"
+        ),
+        "timeout": ErrorSpec(
+            user="Request timed out. Please try again or check if Ollama is responsive.",
+            log="OLLAMA request timed out",
+            recovery=f"Increase timeout (current: {settings.OLLAMA_TIMEOUT}s) or check system load"
+        ),
+        "model_not_found": ErrorSpec(
+            user="Model not available. Please pull the required model.",
+            log="Requested model not found in OLLAMA",
+            recovery="Run: ollama pull <model_name>"
+        ),
+        "invalid_json": ErrorSpec(
+            user="Unable to process response. Please try again.",
+            log="Invalid JSON in OLLAMA response",
+            recovery="Check prompt formatting or model's JSON output capabilities"
+        ),
+        "rate_limited": ErrorSpec(
+            user="Too many requests. Please wait a moment and try again.",
+            log="OLLAMA rate limit exceeded",
+            recovery="Implement request queuing or reduce concurrent requests"
+        )
     }
     
+    @staticmethod
+    def get_spec(error_type: str) -> ErrorSpec:
+        """Get the messages for an error type, falling back to generic ones."""
+        return OllamaErrorHandler.ERROR_MESSAGES.get(error_type, _DEFAULT_ERROR_SPEC)
+    
     @staticmethod
     def get_user_message(error_type: str) -> str:
         """Get user-friendly error message."""
-        return OllamaErrorHandler.ERROR_MESSAGES.get(
-            error_type, {}
-        ).get("user", "An unexpected error occurred. Please try again.")
+        return OllamaErrorHandler.get_spec(error_type).user
     
     @staticmethod
     def get_recovery_hint(error_type: str) -> str:
         """Get recovery instructions."""
-        return OllamaErrorHandler.ERROR_MESSAGES.get(
-            error_type, {}
-        ).get("recovery", "Try again later")
+        return OllamaErrorHandler.get_spec(error_type).recovery
     
     @staticmethod
     def log_error(error_type: str, context: str = "", details: str = ""):
         """Log error with context."""
-        message = OllamaErrorHandler.ERROR_MESSAGES.get(
-            error_type, {}
-        ).get("log", "Unknown error")
+        message = OllamaErrorHandler.get_spec(error_type).log
         
         if context:
             message = f"{context}: {message}"
@@ -66,6 +82,23 @@ class OllamaErrorHandler:
         logger.error(message)
 
 
+# Exception classes checked in order; the first match names the error type
+_ERROR_TYPES = (
+    (TimeoutError, "timeout"),
+    (ConnectionError, "connection"),
+)
+
+
+def _classify_error(error: Exception) -> str:
+    """Map an exception from an OLLAMA call to an ERROR_MESSAGES key."""
+    for exc_type, error_type in _ERROR_TYPES:
+        if isinstance(error, exc_type):
+            return error_type
+    if isinstance(error, ValueError):
+        return "model_not_found" if "model" in str(error).lower() else "invalid_json"
+    return "generic"
+
+
 async def handle_ollama_call(
     func: Callable,
     *args,
@@ -87,26 +120,8 @@ async def handle_ollama_call(
     """
     try:
         return await func(*args, **kwargs)
-    except TimeoutError as e:
-        OllamaErrorHandler.log_error("timeout", error_context, str(e))
-        if fallback is not None:
-            return fallback
-        raise
-    except ConnectionError as e:
-        OllamaErrorHandler.log_error("connection", error_context, str(e))
-        if fallback is not None:
-            return fallback
-        raise
-    except ValueError as e:
-        if "model" in str(e).lower():
-            OllamaErrorHandler.log_error("model_not_found", error_context, str(e))
-        else:
-            OllamaErrorHandler.log_error("invalid_json", error_context, str(e))
-        if fallback is not None:
-            return fallback
-        raise
     except Exception as e:
-        OllamaErrorHandler.log_error("generic", error_context, str(e))
+        OllamaErrorHandler.log_error(_classify_error(e), error_context, str(e))
         if fallback is not None:
             return fallback
         raise
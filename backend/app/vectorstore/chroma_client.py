@@ -1,14 +1,155 @@
+import asyncio
+import threading
+from typing import List
 from langchain_community.vectorstores import Chroma
-from langchain_ollama import OllamaEmbeddings
+from langchain_core.embeddings import Embeddings
+from ollama import AsyncClient
+from backend.app.cache.embedding_cache import get_embedding_cache
 from backend.app.config import settings
+from backend.app.llm.ollama_client import get_shared_async_client, get_shared_sync_client
 
-def get_chroma_client():
-    embeddings = OllamaEmbeddings(
-        model=settings.LLM_MODEL,
-        base_url=settings.OLLAMA_BASE_URL
-    )
-    return Chroma(
-        persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
-        embedding_function=embeddings,
-        collection_name="study_materials"
+# Texts sent per Ollama /api/embed request; several requests run concurrently
+EMBED_BATCH_SIZE = 16
+
+# HNSW candidate list size at query time. Chroma's default of 10 undershoots
+# recall for k=4 retrievals; construction settings (M=16, construction_ef=100)
+# are already Chroma's defaults and cannot change on an existing collection
+HNSW_SEARCH_EF = 64
+
+# Query embeddings kept across retrievals, keyed by (model, text). Least
+# recently used entries are evicted first.
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+_QUERY_EMBEDDING_CACHE = {}
+_QUERY_EMBEDDING_CACHE_LOCK = threading.Lock()
+
+
+class OllamaAsyncEmbeddings(Embeddings):
+    """Ollama embeddings that split documents into batches embedded concurrently.
+
+    OllamaEmbeddings sends all texts in one blocking request. Here each
+    EMBED_BATCH_SIZE slice is its own /api/embed call, and up to
+    OLLAMA_MAX_CONCURRENT of them are in flight at once so the server's
+    parallel slots stay busy. Queries are single texts and go through the
+    pooled sync client.
+    """
+    def __init__(self, model: str):
+        self.model = model
+
+    async def _aembed_all(self, client: AsyncClient, texts: List[str]) -> List[List[float]]:
+        semaphore = asyncio.Semaphore(settings.OLLAMA_MAX_CONCURRENT)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response = await client.embed(
+                    model=self.model, input=batch, keep_alive=settings.OLLAMA_KEEP_ALIVE
+                )
+            return list(response["embeddings"])
+
+        batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Called from ingestion and worker threads, where no loop is running;
+        # the httpx pool is bound to its loop, so this run gets its own client
+        async def run():
+            async with AsyncClient(host=settings.OLLAMA_BASE_URL, timeout=settings.OLLAMA_TIMEOUT) as client:
+                return await self._aembed_all(client, texts)
+        return asyncio.run(run())
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed_all(get_shared_async_client(settings.OLLAMA_TIMEOUT), texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        response = get_shared_sync_client(settings.OLLAMA_TIMEOUT).embed(
+            model=self.model, input=text, keep_alive=settings.OLLAMA_KEEP_ALIVE
+        )
+        return list(response["embeddings"][0])
+
+    async def aembed_query(self, text: str) -> List[float]:
+        response = await get_shared_async_client(settings.OLLAMA_TIMEOUT).embed(
+            model=self.model, input=text, keep_alive=settings.OLLAMA_KEEP_ALIVE
+        )
+        return list(response["embeddings"][0])
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that reuses vectors already computed.
+
+    The embedding of a given text under a given model never changes. Document
+    vectors are kept in the on-disk embedding cache, so re-ingesting notes
+    only embeds new or edited chunks. Retrieval embeds the same topic strings
+    over and over, so query vectors are also memoized in process.
+    """
+    def __init__(self, embeddings: OllamaAsyncEmbeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        model = self.embeddings.model
+        cache = get_embedding_cache()
+        vectors = cache.get_many(model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            embedded = self.embeddings.embed_documents(missing_texts)
+            cache.put_many(model, missing_texts, embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = (self.embeddings.model, text)
+        with _QUERY_EMBEDDING_CACHE_LOCK:
+            vector = _QUERY_EMBEDDING_CACHE.pop(key, None)
+            if vector is not None:
+                _QUERY_EMBEDDING_CACHE[key] = vector
+                return list(vector)
+
+        cache = get_embedding_cache()
+        cached = cache.get_many(key[0], [text])[0]
+        if cached is None:
+            cached = self.embeddings.embed_query(text)
+            cache.put_many(key[0], [text], [cached])
+        vector = tuple(cached)
+
+        with _QUERY_EMBEDDING_CACHE_LOCK:
+            _QUERY_EMBEDDING_CACHE[key] = vector
+            while len(_QUERY_EMBEDDING_CACHE) > QUERY_EMBEDDING_CACHE_SIZE:
+                del _QUERY_EMBEDDING_CACHE[next(iter(_QUERY_EMBEDDING_CACHE))]
+        return list(vector)
+
+
+# Global instance; retrievals run in worker threads, so creation is locked
+_chroma_client = None
+_chroma_client_lock = threading.Lock()
+
+
+def get_chroma_client() -> Chroma:
+    """Get or create the global Chroma vector store, sharing one embeddings client."""
+    global _chroma_client
+    if _chroma_client is None:
+        with _chroma_client_lock:
+            if _chroma_client is None:
+                embeddings = OllamaAsyncEmbeddings(model=settings.LLM_MODEL)
+                _chroma_client = Chroma(
+                    persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
+                    embedding_function=CachedEmbeddings(embeddings),
+                    collection_name="study_materials",
+                    collection_metadata={"hnsw:search_ef": HNSW_SEARCH_EF}
+                )
+    return _chroma_client
+
+
+def query_documents(query: str, k: int) -> List[str]:
+    """
+    Texts of the k chunks nearest to query.
+
+    Queries the underlying Chroma collection directly: the caller only needs
+    the text, so LangChain's Document wrapping is skipped.
+    """
+    vectorstore = get_chroma_client()
+    embedding = vectorstore.embeddings.embed_query(query)
+    result = vectorstore._collection.query(
+        query_embeddings=[embedding], n_results=k, include=["documents"]
     )
+    return result["documents"][0]
@@ -1,6 +1,58 @@
-from backend.app.vectorstore.chroma_client import get_chroma_client
+import asyncio
+import threading
+import time
+from typing import List, Optional
+from backend.app.vectorstore.chroma_client import query_documents
+
+# Retrieved context only changes when notes are ingested, so results are reused
+# for CONTEXT_CACHE_TTL seconds. Least recently used entries are evicted first.
+CONTEXT_CACHE_SIZE = 512
+CONTEXT_CACHE_TTL = 600
+_CONTEXT_CACHE = {}
+_CONTEXT_CACHE_LOCK = threading.Lock()
+
+def _cached_context(key, now: float) -> Optional[str]:
+    with _CONTEXT_CACHE_LOCK:
+        entry = _CONTEXT_CACHE.pop(key, None)
+        if entry is not None and now - entry[0] < CONTEXT_CACHE_TTL:
+            _CONTEXT_CACHE[key] = entry
+            return entry[1]
+    return None
+
+def _store_context(key, now: float, context: str):
+    with _CONTEXT_CACHE_LOCK:
+        _CONTEXT_CACHE[key] = (now, context)
+        while len(_CONTEXT_CACHE) > CONTEXT_CACHE_SIZE:
+            del _CONTEXT_CACHE[next(iter(_CONTEXT_CACHE))]
+
+def _search(query: str, k: int) -> str:
+    return "\n\n".join(query_documents(query, k))
 
 def retrieve_context(query: str, k: int = 4):
-    vectorstore = get_chroma_client()
-    docs = vectorstore.similarity_search(query, k=k)
-    return "\n\n".join([doc.page_content for doc in docs])
+    key = (query, k)
+    now = time.monotonic()
+    context = _cached_context(key, now)
+    if context is None:
+        context = _search(query, k)
+        _store_context(key, now, context)
+    return context
+
+async def aretrieve_context(query: str, k: int = 4) -> str:
+    """retrieve_context without blocking the event loop: the query embedding
+    and Chroma search run in a worker thread."""
+    key = (query, k)
+    now = time.monotonic()
+    context = _cached_context(key, now)
+    if context is None:
+        context = await asyncio.to_thread(_search, query, k)
+        _store_context(key, now, context)
+    return context
+
+async def aretrieve_contexts(queries: List[str], k: int = 4) -> List[str]:
+    """Retrieve context for several queries concurrently, in query order."""
+    return list(await asyncio.gather(*(aretrieve_context(query, k) for query in queries)))
+
+def invalidate_context_cache():
+    """Drop all cached retrievals, e.g. after new documents are ingested."""
+    with _CONTEXT_CACHE_LOCK:
+        _CONTEXT_CACHE.clear()
@@ -3,23 +3,103 @@ import os
 # Add the project root to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from langchain_community.document_loaders import TextLoader, DirectoryLoader
-from langchain_text_splitters import CharacterTextSplitter
+import asyncio
+from pathlib import Path
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from backend.app.vectorstore.chroma_client import get_chroma_client
+from backend.app.vectorstore.retriever import invalidate_context_cache
 from backend.app.utils.logger import logger
 
+# Chunks embedded per add_texts call
+INGEST_BATCH_SIZE = 64
+
+# Note files read concurrently
+LOAD_WORKERS = 32
+
+# Queue bounds between pipeline stages; together they cap how much of the
+# corpus is held in memory at once
+RAW_QUEUE_SIZE = 64
+CHUNK_QUEUE_SIZE = 256
+
+# Concurrent add_texts batches. Each batch already fans out into concurrent
+# embedding requests, so a second worker only overlaps the Chroma write of one
+# batch with the embedding of the next
+EMBED_WORKERS = 2
+
+def load_text_file(path: Path) -> Document:
+    return Document(
+        page_content=path.read_text(encoding="utf-8", errors="ignore"),
+        metadata={"source": str(path)}
+    )
+
+def iter_note_paths(directory_path: str):
+    """Every .txt file under directory_path, skipping hidden paths."""
+    root = Path(directory_path)
+    for path in root.rglob("*.txt"):
+        if not any(part.startswith(".") for part in path.relative_to(root).parts):
+            yield path
+
+async def _ingest_pipeline(directory_path: str) -> int:
+    """Read, split and embed notes as a pipeline of bounded queues.
+
+    Returns:
+        Number of chunks added to the vector store
+    """
+    # Splits on paragraphs, then lines, then words, so chunks stay close to
+    # chunk_size instead of leaving tiny tails
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    vectorstore = get_chroma_client()
+    raw_docs: asyncio.Queue = asyncio.Queue(maxsize=RAW_QUEUE_SIZE)
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=CHUNK_QUEUE_SIZE)
+    added = 0
+    
+    async def load():
+        paths = iter_note_paths(directory_path)
+        while True:
+            window = [path for _, path in zip(range(LOAD_WORKERS), paths)]
+            if not window:
+                break
+            for doc in await asyncio.gather(*(asyncio.to_thread(load_text_file, path) for path in window)):
+                await raw_docs.put(doc)
+        await raw_docs.put(None)
+    
+    async def split():
+        while (doc := await raw_docs.get()) is not None:
+            for chunk in text_splitter.split_documents([doc]):
+                await chunks.put(chunk)
+        for _ in range(EMBED_WORKERS):
+            await chunks.put(None)
+    
+    async def embed():
+        nonlocal added
+        batch = []
+        while True:
+            chunk = await chunks.get()
+            if chunk is not None:
+                batch.append(chunk)
+            if batch and (chunk is None or len(batch) >= INGEST_BATCH_SIZE):
+                await vectorstore.aadd_texts(
+                    texts=[doc.page_content for doc in batch],
+                    metadatas=[doc.metadata for doc in batch]
+                )
+                added += len(batch)
+                batch = []
+            if chunk is None:
+                return
+    
+    await asyncio.gather(load(), split(), *(embed() for _ in range(EMBED_WORKERS)))
+    return added
+
 def ingest_documents(directory_path: str):
     logger.info(f"Ingesting documents from {directory_path}")
     
-    loader = DirectoryLoader(directory_path, glob="**/*.txt", loader_cls=TextLoader)
-    documents = loader.load()
-    
-    text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-    docs = text_splitter.split_documents(documents)
+    added = asyncio.run(_ingest_pipeline(directory_path))
+    logger.info(f"Embedded {added} chunks")
     
     vectorstore = get_chroma_client()
-    vectorstore.add_documents(docs)
     vectorstore.persist()
+    invalidate_context_cache()
     
     logger.info("Ingestion completed successfully.")
 
@@ -27,5 +107,5 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--path", type=str, required=True, help="Path to the directory containing study materials (.txt files)")
-    args = parser.parse_argument()
+    args = parser.parse_args()
     ingest_documents(args.path)
@@ -2,6 +2,11 @@
 Response Template Examples - Test Cases and Usage Scenarios
 """
 
+import sys
+import os
+# Add the project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from backend.app.services.response_templates import ResponseTemplates, TemplateSelector
 
 # ============================================================================
@@ -198,17 +203,17 @@ def example_assessment_complete():
 #     "content": "Assessment Complete ✓\n\nTopic: React Hooks\nQuestions: 10\nCorrect: 8 (80%)\nUpdated Mastery: 60% → 82%\nStatus: Proficient ✅\n\nExcellent improvement! You now understand the fundamentals of React Hooks well. Focus on useCallback and useContext next.\n\nNext steps:\n- Review incorrect questions\n- Start new assessment\n- Study weak areas",
 #     "template_type": "ASSESSMENT_COMPLETE",
 #     "requires_choice": False,
-#     "metrics": {
-#         "topic_name": "React Hooks",
-#         "total_questions": 10,
-#         "correct_answers": 8,
-#         "percentage": 80,
-#         "old_mastery": 0.6,
-#         "new_mastery": 0.82,
-#         "old_mastery_pct": 60,
-#         "new_mastery_pct": 82,
-#         "status": "Proficient ✅"
-#     }
+#     "metrics": AssessmentMetrics(
+#         topic_name="React Hooks",
+#         total_questions=10,
+#         correct_answers=8,
+#         percentage=80,
+#         old_mastery=0.6,
+#         new_mastery=0.82,
+#         old_mastery_pct=60,
+#         new_mastery_pct=82,
+#         status="Proficient ✅"
+#     )
 # }
 
 
@@ -254,25 +259,25 @@ def example_status_badges():
     template1 = ResponseTemplates.assessment_complete(
         "Topic", 10, 3, 0.0, 0.30, "Starting out"
     )
-    print(template1["metrics"]["status"])  # "Beginner 🔵"
+    print(template1["metrics"].status)  # "Beginner 🔵"
     
     # 50% - 69%: Intermediate
     template2 = ResponseTemplates.assessment_complete(
         "Topic", 10, 6, 0.4, 0.60, "Good progress"
     )
-    print(template2["metrics"]["status"])  # "Intermediate 🟡"
+    print(template2["metrics"].status)  # "Intermediate 🟡"
     
     # 70% - 89%: Proficient
     template3 = ResponseTemplates.assessment_complete(
         "Topic", 10, 8, 0.6, 0.80, "Well done"
     )
-    print(template3["metrics"]["status"])  # "Proficient ✅"
+    print(template3["metrics"].status)  # "Proficient ✅"
     
     # 90%+: Expert
     template4 = ResponseTemplates.assessment_complete(
         "Topic", 10, 10, 0.8, 1.0, "Perfect"
     )
-    print(template4["metrics"]["status"])  # "Expert 🌟"
+    print(template4["metrics"].status)  # "Expert 🌟"
 
 
 # ============================================================================
@@ -318,7 +323,7 @@ async def example_agent_integration():
 if __name__ == "__main__":
     print("Template Examples Generated Successfully")
     print("\nTo test, run:")
-    print("  python -c 'from response_templates_examples import *'")
+    print("  python -c 'from backend.scripts.response_templates_examples import *'")
     print("\nThen call any example function:")
     print("  t = example_topic_not_in_session()")
     print("  print(t['content'])")
@@ -0,0 +1,24 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from backend.app.config import settings
+from backend.app.memory import conversation
+
+
+def test_chat_memory_writes_reach_loaded_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "USER_DATA_DIRECTORY", str(tmp_path))
+    memory = conversation.get_conversation_memory("user")
+    assert memory.load_memory_variables({})["chat_history"] == []
+
+    # The agent appends through chat_memory, bypassing save_context
+    memory.chat_memory.add_message(HumanMessage(content="hi"))
+    memory.chat_memory.add_message(AIMessage(content="hello"))
+
+    memory = conversation.get_conversation_memory("user")
+    window = memory.load_memory_variables({})["chat_history"]
+    assert [m.content for m in window] == ["hi", "hello"]
+
+    window = memory.load_memory_variables({"max_messages": 1})["chat_history"]
+    assert [m.content for m in window] == ["hello"]
+    memory.chat_memory.add_message(HumanMessage(content="again"))
+    window = memory.load_memory_variables({"max_messages": 1})["chat_history"]
+    assert [m.content for m in window] == ["again"]